@@ -0,0 +1,8 @@
+"""
+Top-level directory for all of tree-decode's benchmarks.
+
+Unlike the tests, the benchmarks are not shipped with the package. Each
+module can be run as a script from the root of the repository, e.g.
+
+    python -m benchmarks.topology
+"""
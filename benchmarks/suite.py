@@ -0,0 +1,312 @@
+"""
+Benchmark decoding synthetic forests of varying size and shape.
+
+Times `get_tree_info`, `get_decision_info`, `get_estimators` and
+`write_to_buf` across forests of 1 to 1000 trees with 10^2 to 10^6 nodes
+each, and records the time and peak memory of each in a JSON results
+file, so that the results of different releases can be compared:
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --output new.json --compare results.json
+
+Peak memory is measured with `tracemalloc`, so it is only recorded on
+Python 3, and covers the memory allocated by Python and numpy.
+"""
+
+from __future__ import division, print_function
+
+from benchmarks.synthetic import make_forest
+from tree_decode import api, utils
+
+import numpy as np
+import platform
+import argparse
+import datetime
+import timeit
+import json
+import sys
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+TREE_COUNTS = (1, 10, 100, 1000)
+NODE_COUNTS = (10 ** 2, 10 ** 4, 10 ** 6)
+SHAPES = ("random",)
+
+# Forests with more nodes than this in total are skipped by default,
+# as rendering them takes minutes and several gigabytes of memory.
+MAX_TOTAL_NODES = 10 ** 7
+
+
+class NullBuffer(object):
+    """
+    A buffer that discards what is written to it, but counts its length.
+    """
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, val):
+        self.size += len(val)
+
+
+def get_benchmarks(model, data):
+    """
+    Get the functions to benchmark on a model.
+
+    Parameters
+    ----------
+    model : tree_decode.export.MappedForest
+        The model to benchmark on.
+    data : numpy.ndarray
+        A 2-D array of a single row of input data for the model.
+
+    Returns
+    -------
+    benchmarks : list
+        A list of (name, function) tuples, where each function takes
+        no arguments and runs the benchmark once.
+    """
+
+    return [
+        ("get_tree_info", lambda: api.get_tree_info(model)),
+        ("get_tree_info_dedupe", lambda: api.get_tree_info(model,
+                                                           dedupe=True)),
+        ("get_decision_info", lambda: api.get_decision_info(model, data)),
+        ("get_estimators", lambda: utils.get_estimators(model)),
+        ("write_to_buf", lambda: utils.write_to_buf(
+            api.iter_tree_info(model), NullBuffer())),
+    ]
+
+
+def time_call(func, repeat):
+    """
+    Time a function, starting from an empty cache of tree state.
+
+    Parameters
+    ----------
+    func : callable
+        The function to time, which takes no arguments.
+    repeat : int
+        The number of times to call the function.
+
+    Returns
+    -------
+    cold : float
+        The shortest time in seconds of a call with an empty cache.
+    warm : float
+        The shortest time in seconds of a call following another one.
+    """
+
+    cold, warm = [], []
+
+    for _ in range(repeat):
+        api.clear_cache()
+
+        for times in (cold, warm):
+            start = timeit.default_timer()
+            func()
+            times.append(timeit.default_timer() - start)
+
+    return min(cold), min(warm)
+
+
+def get_peak_memory(func):
+    """
+    Get the peak memory allocated by a function, starting from an empty
+    cache of tree state.
+
+    Parameters
+    ----------
+    func : callable
+        The function to measure, which takes no arguments.
+
+    Returns
+    -------
+    peak : int or None
+        The peak memory in bytes, or None if it can't be measured.
+    """
+
+    if tracemalloc is None:
+        return None
+
+    api.clear_cache()
+    tracemalloc.start()
+
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(tree_counts=TREE_COUNTS, node_counts=NODE_COUNTS, shapes=SHAPES,
+        max_total_nodes=MAX_TOTAL_NODES, repeat=3, random_state=0):
+    """
+    Run the benchmarks on every combination of forest size and shape.
+
+    Parameters
+    ----------
+    tree_counts : iterable of int
+        The numbers of trees in the forests.
+    node_counts : iterable of int
+        The (approximate) numbers of nodes in each tree of the forests.
+    shapes : iterable of str
+        The shapes of the trees. See `benchmarks.synthetic.make_tree_arrays`.
+    max_total_nodes : int, default 10^7
+        Forests with more nodes than this in total are skipped.
+    repeat : int, default 3
+        The number of times to time each benchmark.
+    random_state : int, default 0
+        The seed used to generate the forests and input data.
+
+    Returns
+    -------
+    results : list of dict
+        The results of each benchmark on each forest.
+    """
+
+    results = []
+    row = "{name:>18} {shape:>9} {trees:>6} {nodes:>8} {depth:>7} " \
+          "{cold:>10.4f} {warm:>10.4f} {memory:>12}"
+
+    print("{:>18} {:>9} {:>6} {:>8} {:>7} {:>10} {:>10} {:>12}".format(
+        "benchmark", "shape", "trees", "nodes", "depth",
+        "cold (s)", "warm (s)", "peak (B)"))
+
+    for shape in shapes:
+        for n_nodes in node_counts:
+            for n_estimators in tree_counts:
+                if n_estimators * n_nodes > max_total_nodes:
+                    continue
+
+                n_leaves = max(n_nodes // 2, 1)
+                model = make_forest(n_estimators, n_leaves, shape=shape,
+                                    random_state=random_state)
+
+                rng = np.random.RandomState(random_state)
+                data = rng.uniform(0, 10, size=(1, 10))
+
+                max_depth = max(int(utils.get_tree_state(e).topology[0].max())
+                                for e in model.estimators_)
+
+                for name, func in get_benchmarks(model, data):
+                    cold, warm = time_call(func, repeat)
+                    memory = get_peak_memory(func)
+
+                    result = {
+                        "benchmark": name,
+                        "shape": shape,
+                        "n_estimators": n_estimators,
+                        "n_nodes": 2 * n_leaves - 1,
+                        "max_depth": max_depth,
+                        "time": cold,
+                        "warm_time": warm,
+                        "peak_memory": memory,
+                    }
+                    results.append(result)
+
+                    print(row.format(name=name, shape=shape,
+                                     trees=n_estimators,
+                                     nodes=result["n_nodes"],
+                                     depth=max_depth, cold=cold, warm=warm,
+                                     memory=memory))
+
+    return results
+
+
+def get_metadata():
+    import tree_decode
+
+    return {
+        "tree_decode": tree_decode.__version__,
+        "numpy": np.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": datetime.datetime.utcnow().isoformat(),
+    }
+
+
+def _get_key(result):
+    return (result["benchmark"], result["shape"],
+            result["n_estimators"], result["n_nodes"])
+
+
+def compare(results, baseline):
+    """
+    Print how the results of the benchmarks compare to a baseline.
+
+    Parameters
+    ----------
+    results : list of dict
+        The results of the benchmarks, as returned by `run`.
+    baseline : list of dict
+        The results to compare against, e.g. those of a previous release.
+    """
+
+    previous = dict((_get_key(result), result) for result in baseline)
+    row = "{name:>18} {shape:>9} {trees:>6} {nodes:>8} " \
+          "{old:>10.4f} {new:>10.4f} {ratio:>8.2f}x"
+
+    print("{:>18} {:>9} {:>6} {:>8} {:>10} {:>10} {:>9}".format(
+        "benchmark", "shape", "trees", "nodes", "old (s)", "new (s)",
+        "speedup"))
+
+    for result in results:
+        old = previous.get(_get_key(result))
+
+        if old is None:
+            continue
+
+        print(row.format(name=result["benchmark"], shape=result["shape"],
+                         trees=result["n_estimators"],
+                         nodes=result["n_nodes"], old=old["time"],
+                         new=result["time"],
+                         ratio=old["time"] / max(result["time"], 1e-9)))
+
+
+def _parse_ints(arg):
+    return [int(float(val)) for val in arg.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--trees", type=_parse_ints, default=TREE_COUNTS,
+                        help="comma-separated numbers of trees per forest")
+    parser.add_argument("--nodes", type=_parse_ints, default=NODE_COUNTS,
+                        help="comma-separated numbers of nodes per tree, "
+                             "e.g. 1e2,1e4")
+    parser.add_argument("--shapes", type=lambda arg: arg.split(","),
+                        default=SHAPES, help="comma-separated tree shapes "
+                                             "(random, balanced, deep)")
+    parser.add_argument("--max-total-nodes", type=lambda arg: int(float(arg)),
+                        default=MAX_TOTAL_NODES,
+                        help="skip forests with more nodes than this")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="number of times to time each benchmark")
+    parser.add_argument("--output", help="path of the JSON results file")
+    parser.add_argument("--compare", help="path of a JSON results file "
+                                          "to compare against")
+    args = parser.parse_args(argv)
+
+    results = run(tree_counts=args.trees, node_counts=args.nodes,
+                  shapes=args.shapes, max_total_nodes=args.max_total_nodes,
+                  repeat=args.repeat)
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump({"metadata": get_metadata(), "results": results},
+                      f, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+        print()
+        compare(results, baseline)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Utilities for generating synthetic trees to benchmark against.
+"""
+
+from tree_decode.export import MappedForest, MappedTree, TreeArrays
+from tree_decode.utils import get_topology
+
+import numpy as np
+
+# Marks the feature and threshold of leaves, as in scikit-learn.
+TREE_UNDEFINED = -2
+
+
+def check_random_state(random_state):
+    if isinstance(random_state, np.random.RandomState):
+        return random_state
+
+    return np.random.RandomState(random_state)
+
+
+def make_tree_arrays(n_leaves, random_state=None, shape="random"):
+    """
+    Generate the node arrays of a random binary tree.
+
+    Nodes are numbered in depth-first order (left child first), which is
+    the order in which scikit-learn's default tree builder numbers them.
+
+    Parameters
+    ----------
+    n_leaves : int
+        The number of leaves in the tree. The tree will contain a total of
+        `2 * n_leaves - 1` nodes.
+    random_state : int or numpy.random.RandomState, default None
+        The seed or random number generator used to shape the tree.
+    shape : {"random", "balanced", "deep"}, default "random"
+        How the leaves below each node are split between its children:
+
+        * random - uniformly at random, giving a depth of O(log n) on average.
+        * balanced - evenly, giving the smallest possible depth.
+        * deep - one leaf to the left, giving a depth of `n_leaves - 1`.
+
+    Returns
+    -------
+    children_left : numpy.ndarray
+        The array mapping each node to its left child, or -1 for leaves.
+    children_right : numpy.ndarray
+        The array mapping each node to its right child, or -1 for leaves.
+    """
+
+    rng = check_random_state(random_state)
+
+    n_nodes = 2 * n_leaves - 1
+    children_left = np.full(n_nodes, -1, dtype=np.int64)
+    children_right = np.full(n_nodes, -1, dtype=np.int64)
+
+    # Each stack entry is (node ID, number of leaves below it).
+    stack = [(0, n_leaves)]
+
+    while len(stack) > 0:
+        node_id, leaves = stack.pop()
+
+        if leaves == 1:
+            continue
+
+        if shape == "balanced":
+            left_leaves = leaves // 2
+        elif shape == "deep":
+            left_leaves = 1
+        else:
+            left_leaves = rng.randint(1, leaves)
+
+        right_leaves = leaves - left_leaves
+
+        left_id = node_id + 1
+        right_id = left_id + 2 * left_leaves - 1
+
+        children_left[node_id] = left_id
+        children_right[node_id] = right_id
+
+        # The left subtree has to be numbered first, so it goes on top.
+        stack.append((right_id, right_leaves))
+        stack.append((left_id, left_leaves))
+
+    return children_left, children_right
+
+
+def make_tree(n_leaves, n_features=10, n_classes=3,
+              random_state=None, shape="random"):
+    """
+    Generate a random decision tree classifier.
+
+    The tree is not fitted on any data, but its arrays are consistent
+    with one that was: the class counts of each node are the sums of
+    those of its children.
+
+    Parameters
+    ----------
+    n_leaves : int
+        The number of leaves in the tree.
+    n_features : int, default 10
+        The number of features that the tree splits on.
+    n_classes : int, default 3
+        The number of classes that the tree predicts.
+    random_state : int or numpy.random.RandomState, default None
+        The seed or random number generator used to generate the tree.
+    shape : {"random", "balanced", "deep"}, default "random"
+        How the tree is shaped. See `make_tree_arrays`.
+
+    Returns
+    -------
+    tree : tree_decode.export.MappedTree
+        A tree that can be passed to our API.
+    """
+
+    rng = check_random_state(random_state)
+    children_left, children_right = make_tree_arrays(n_leaves, rng, shape)
+
+    n_nodes = children_left.shape[0]
+    node_depths, is_leaves = get_topology(children_left, children_right)
+
+    feature = rng.randint(0, n_features, size=n_nodes)
+    feature[is_leaves] = TREE_UNDEFINED
+
+    threshold = rng.uniform(0, 10, size=n_nodes)
+    threshold[is_leaves] = TREE_UNDEFINED
+
+    value = np.zeros((n_nodes, 1, n_classes))
+    value[is_leaves, 0] = rng.randint(0, 20, size=(n_leaves, n_classes))
+
+    # Fill in the class counts of the splits from the bottom up.
+    splits = np.flatnonzero(~is_leaves)
+    split_depths = node_depths[splits]
+
+    for depth in range(split_depths.max(initial=0), -1, -1):
+        node_ids = splits[split_depths == depth]
+        value[node_ids] = (value[children_left[node_ids]] +
+                           value[children_right[node_ids]])
+
+    arrays = {
+        "children_left": children_left,
+        "children_right": children_right,
+        "feature": feature,
+        "threshold": threshold,
+        "n_node_samples": value.sum(axis=(1, 2)).astype(np.int64),
+        "value": value,
+    }
+
+    tree = TreeArrays(arrays, n_features=n_features, n_classes=[n_classes])
+    return MappedTree(tree, classifier=True, classes=[np.arange(n_classes)])
+
+
+def make_forest(n_estimators, n_leaves, n_features=10, n_classes=3,
+                random_state=None, shape="random"):
+    """
+    Generate a random forest of decision tree classifiers.
+
+    Parameters
+    ----------
+    n_estimators : int
+        The number of trees in the forest.
+    n_leaves : int
+        The number of leaves in each tree.
+    n_features : int, default 10
+        The number of features that the trees split on.
+    n_classes : int, default 3
+        The number of classes that the trees predict.
+    random_state : int or numpy.random.RandomState, default None
+        The seed or random number generator used to generate the trees.
+    shape : {"random", "balanced", "deep"}, default "random"
+        How the trees are shaped. See `make_tree_arrays`.
+
+    Returns
+    -------
+    forest : tree_decode.export.MappedForest
+        A forest that can be passed to our API.
+    """
+
+    rng = check_random_state(random_state)
+    return MappedForest([make_tree(n_leaves, n_features, n_classes, rng,
+                                   shape)
+                         for _ in range(n_estimators)])
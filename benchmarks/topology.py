@@ -0,0 +1,69 @@
+"""
+Benchmark the computation of node depths and leaves in a tree.
+
+Compares `tree_decode.utils.get_topology` against the node-by-node
+stack traversal that `get_tree_info` originally used.
+"""
+
+from __future__ import print_function
+
+from benchmarks.synthetic import make_tree_arrays
+from tree_decode.utils import get_topology
+
+import numpy as np
+import timeit
+
+
+def stack_topology(children_left, children_right):
+    """
+    The original stack-based traversal, kept here for comparison.
+    """
+
+    n_nodes = children_left.shape[0]
+    node_depths = np.zeros(shape=n_nodes, dtype=np.int64)
+    is_leaves = np.zeros(shape=n_nodes, dtype=bool)
+
+    stack = [(0, -1)]
+
+    while len(stack) > 0:
+        node_id, parent_depth = stack.pop()
+        node_depths[node_id] = parent_depth + 1
+
+        if children_left[node_id] != children_right[node_id]:
+            stack.append((children_left[node_id], parent_depth + 1))
+            stack.append((children_right[node_id], parent_depth + 1))
+        else:
+            is_leaves[node_id] = True
+
+    return node_depths, is_leaves
+
+
+def main(leaf_counts=(50, 5000, 100000), repeat=3):
+    header = "{:>10} {:>12} {:>12} {:>11}"
+    row = "{n:>10} {loop:>12.5f} {vec:>12.5f} {speedup:>10.1f}x"
+
+    print(header.format("nodes", "stack (s)", "levels (s)", "speedup"))
+
+    for n_leaves in leaf_counts:
+        children_left, children_right = make_tree_arrays(n_leaves,
+                                                         random_state=0)
+
+        expected = stack_topology(children_left, children_right)
+        result = get_topology(children_left, children_right)
+
+        assert np.array_equal(expected[0], result[0])
+        assert np.array_equal(expected[1], result[1])
+
+        loop = min(timeit.repeat(lambda: stack_topology(children_left,
+                                                        children_right),
+                                 number=1, repeat=repeat))
+        vec = min(timeit.repeat(lambda: get_topology(children_left,
+                                                     children_right),
+                                number=1, repeat=repeat))
+
+        print(row.format(n=children_left.shape[0], loop=loop,
+                         vec=vec, speedup=loop / vec))
+
+
+if __name__ == "__main__":
+    main()
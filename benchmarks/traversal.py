@@ -0,0 +1,94 @@
+"""
+Benchmark following batches of rows down a tree.
+
+Compares `tree_decode.traversal.decision_path`, which advances all rows
+one level at a time, against the row-by-row traversal that `MappedTree`
+originally used and, for a fitted tree, against scikit-learn's own
+`decision_path` method.
+"""
+
+from __future__ import print_function
+
+from benchmarks.synthetic import check_random_state, make_tree
+from tree_decode import traversal, utils
+
+import numpy as np
+import timeit
+
+
+def row_paths(tree, data):
+    """
+    The original row-by-row traversal, kept here for comparison.
+    """
+
+    paths = [utils.get_decision_path(tree, row) for row in data]
+
+    indptr = np.cumsum([0] + [len(path) for path in paths])
+    indices = np.array([node_id for path in paths for node_id in path],
+                       dtype=np.intp)
+
+    return indptr, indices
+
+
+def make_fitted_tree(n_rows=20000, n_features=10, random_state=None):
+    """
+    Fit a decision tree of scikit-learn on noisy synthetic data.
+    """
+
+    from sklearn.tree import DecisionTreeRegressor
+
+    rng = check_random_state(random_state)
+    data = rng.uniform(0, 10, size=(n_rows, n_features))
+    target = data[:, 0] * data[:, 1] + rng.normal(size=n_rows)
+
+    return DecisionTreeRegressor(random_state=0).fit(data, target)
+
+
+def time_func(func, repeat):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main(row_counts=(1, 100, 10000), repeat=3):
+    header = "{:>10} {:>8} {:>8} {:>12} {:>12} {:>12}"
+    row = "{tree:>10} {nodes:>8} {rows:>8} {loop:>12.5f} " \
+          "{levels:>12.5f} {sklearn:>12}"
+
+    print(header.format("tree", "nodes", "rows", "rows (s)",
+                        "levels (s)", "sklearn (s)"))
+
+    fitted = make_fitted_tree(random_state=0)
+    estimators = [("fitted", fitted),
+                  ("random", make_tree(5000, random_state=0)),
+                  ("deep", make_tree(1000, random_state=0, shape="deep"))]
+
+    rng = np.random.RandomState(0)
+
+    for name, estimator in estimators:
+        tree = estimator.tree_
+
+        for n_rows in row_counts:
+            data = rng.uniform(0, 10, size=(n_rows, tree.n_features))
+            data = utils.check_input(data, tree.n_features)
+
+            expected = row_paths(tree, data)
+            result = traversal.decision_path(tree, data)
+
+            assert np.array_equal(expected[0], result[0])
+            assert np.array_equal(expected[1], result[1])
+
+            loop = time_func(lambda: row_paths(tree, data), repeat)
+            levels = time_func(lambda: traversal.decision_path(tree, data),
+                               repeat)
+
+            if estimator is fitted:
+                sklearn = "{:.5f}".format(time_func(
+                    lambda: estimator.decision_path(data), repeat))
+            else:
+                sklearn = "-"
+
+            print(row.format(tree=name, nodes=tree.node_count, rows=n_rows,
+                             loop=loop, levels=levels, sklearn=sklearn))
+
+
+if __name__ == "__main__":
+    main()
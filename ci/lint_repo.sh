@@ -4,4 +4,10 @@ echo "Linting repository..."
 source activate decode
 
 flake8 setup.py
-flake8 tree_decode --filename=*.py
+
+# The asyncio variants use syntax that only exists on Python 3.5+.
+if python -c "import sys; sys.exit(sys.version_info >= (3, 5))"; then
+    flake8 tree_decode --filename=*.py --exclude=aio.py
+else
+    flake8 tree_decode --filename=*.py
+fi
@@ -1,6 +1,9 @@
 from setuptools import setup
+from setuptools.command.build_py import build_py
 from tree_decode import __version__ as decode_version
 
+import sys
+
 SHORT_DESCRIPTION = "Scikit-Learn Decision Tree Decoder"
 
 LONG_DESCRIPTION = """
@@ -10,6 +13,25 @@ makes it easier to understand how trees work and more importantly,
 diagnose their issues when they produce unexpected results.
 """
 
+# Modules that use syntax that only exists on Python 3.5+.
+PY35_MODULES = ["aio"]
+
+
+class BuildPy(build_py):
+    """
+    Leave out the modules that can't be compiled on older Pythons.
+    """
+
+    def find_package_modules(self, package, package_dir):
+        modules = build_py.find_package_modules(self, package, package_dir)
+
+        if sys.version_info >= (3, 5):
+            return modules
+
+        return [(pkg, module, filename) for pkg, module, filename in modules
+                if not (pkg == "tree_decode" and module in PY35_MODULES)]
+
+
 GITHUB_URL = "https://github.com/gfyoung/tree-decode"
 BUGTRACK_URL = GITHUB_URL + "/issues"
 
@@ -34,6 +56,7 @@ setup(
                     "numpy >= 1.6.1",
                     "scipy >= 0.9"],
     zip_safe=False,
+    cmdclass={"build_py": BuildPy},
     classifiers=[
         "Development Status :: 5 - Production/Stable",
         "Environment :: Console",
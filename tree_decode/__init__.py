@@ -1,4 +1,4 @@
-from .api import *  # noqa
+import sys
 
 __version__ = "0.4.0"
 
@@ -21,6 +21,34 @@ The decision tree classes that scikit-learn currently supports are:
 * ExtraTreesRegressor
 """
 
+# The names of our API, which is only imported once it is first used.
+_API_NAMES = ["get_tree_info", "iter_tree_info", "get_model_diff",
+              "get_tree_table", "get_node_coverage", "get_feature_usage",
+              "get_decision_info", "iter_decision_info", "get_decision_paths",
+              "get_path_info", "load_decision_paths", "get_contributions",
+              "get_tree_at", "get_cache_info", "set_cache_size",
+              "clear_cache", "export_model", "import_model", "Profiler"]
+
+__all__ = _API_NAMES + ["demo", "test"]
+
+if sys.version_info >= (3, 7):
+    from importlib import import_module
+
+    def __getattr__(name):
+        if name in _API_NAMES or name == "api":
+            # `from . import api` would recurse into this function.
+            api = import_module(".api", __name__)
+            return api if name == "api" else getattr(api, name)
+
+        msg = "module {module!r} has no attribute {name!r}"
+        raise AttributeError(msg.format(module=__name__, name=name))
+
+    def __dir__():
+        return sorted(set(globals()) | set(__all__))
+else:
+    # Module-level `__getattr__` is not supported, so import eagerly.
+    from .api import *  # noqa
+
 
 def demo():
     """
@@ -31,6 +59,8 @@ def demo():
     from sklearn.tree import DecisionTreeClassifier
     from sklearn.datasets import load_iris
 
+    from .api import get_decision_info, get_tree_info
+
     iris = load_iris()
     y = iris.target
     x = iris.data
@@ -39,33 +69,33 @@ def demo():
     estimator = DecisionTreeClassifier(max_leaf_nodes=3, random_state=0)
 
     estimator.fit(x_train, y_train)
-    print(get_tree_info(estimator))  # noqa
+    print(get_tree_info(estimator))
 
     names = {0: "Sepal Length", 1: "Sepal Width",
              2: "Petal Length", 3: "Petal Width"}
-    print(get_tree_info(estimator, names=names))  # noqa
+    print(get_tree_info(estimator, names=names))
 
-    print(get_tree_info(estimator, precision=None))  # noqa
-    print(get_tree_info(estimator, normalize=False))  # noqa
-    print(get_tree_info(estimator, label_index=2))  # noqa
-    print(get_tree_info(estimator, tab_size=2))  # noqa
+    print(get_tree_info(estimator, precision=None))
+    print(get_tree_info(estimator, normalize=False))
+    print(get_tree_info(estimator, label_index=2))
+    print(get_tree_info(estimator, tab_size=2))
 
     index = 1
     data = x_test[[index]]
     print("Analyzing: " + str(data) + "\n")
-    print(get_decision_info(estimator, data))  # noqa
+    print(get_decision_info(estimator, data))
 
     index = 2
     data = x_test[[index]]
     print("Analyzing: " + str(data) + "\n")
-    print(get_decision_info(estimator, data, precision=None))  # noqa
+    print(get_decision_info(estimator, data, precision=None))
 
     index = 3
     data = x_test[[index]]
     print("Analyzing: " + str(data) + "\n")
-    print(get_decision_info(estimator, data, names=names))  # noqa
-    print(get_decision_info(estimator, data, label_index=2))  # noqa
-    print(get_decision_info(estimator, data, tab_size=2))  # noqa
+    print(get_decision_info(estimator, data, names=names))
+    print(get_decision_info(estimator, data, label_index=2))
+    print(get_decision_info(estimator, data, tab_size=2))
 
 
 def test():
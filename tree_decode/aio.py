@@ -0,0 +1,175 @@
+"""
+Asynchronous variants of our tree-decoding API, for use with asyncio.
+
+Decoding a large model takes long enough to stall an event loop, so these
+variants run the work in an executor, a chunk of output at a time, and
+write the output to an asyncio stream writer as it is produced.
+
+This module requires Python 3.5 or later, so it is not imported by
+`tree_decode` itself:
+
+>>> from tree_decode import aio
+>>> await aio.get_tree_info(model, writer)
+"""
+
+from . import api
+
+import asyncio
+
+__all__ = ["get_tree_info", "get_decision_info"]
+
+# The number of characters of output produced by the executor at a time.
+_CHUNK_SIZE = 2 ** 16
+
+
+async def get_tree_info(model, writer=None, executor=None,
+                        chunk_size=_CHUNK_SIZE, encoding="utf-8", **kwargs):
+    """
+    Asynchronously get the structure of the tree(s) of a tree-based model.
+
+    The output is the same as that of `tree_decode.get_tree_info`. It is
+    generated in the executor one chunk at a time, so that the event loop
+    stays responsive and the output never has to be held in memory in its
+    entirety. If the call is cancelled, at most one more chunk is generated.
+
+    Parameters
+    ----------
+    model : sklearn.ensemble.forest.BaseForest or
+            sklearn.tree.tree.BaseDecisionTree
+        The tree-based model that we are to analyze.
+    writer : asyncio.StreamWriter, default None
+        The stream to which to write the output. Each chunk is written and
+        drained before the next one is generated. If none is provided, the
+        string output is returned.
+    executor : concurrent.futures.Executor, default None
+        The executor in which to generate the output. If none is provided,
+        the default executor of the event loop is used.
+    chunk_size : int, default 65536
+        The (approximate) number of characters of output per chunk.
+    encoding : str, default "utf-8"
+        The encoding with which to write the output to the stream.
+    **kwargs : keyword arguments
+        Any other arguments of `tree_decode.iter_tree_info`, such as
+        `precision` or `estimators`.
+
+    Returns
+    -------
+    output_or_nothing : If a writer was provided, nothing is returned.
+                        Otherwise, the string output is returned.
+
+    Raises
+    ------
+    NotImplementedError : the model is not supported for extracting info.
+    IndexError : the label index provided was out of bounds on the array of
+                 output scores provided at each node.
+    NotFittedError : the model was not properly fitted yet.
+    """
+
+    loop = asyncio.get_event_loop()
+    lines = await loop.run_in_executor(executor, _call,
+                                       api.iter_tree_info, model, kwargs)
+    chunks = []
+
+    while True:
+        chunk = await loop.run_in_executor(executor, _read_chunk,
+                                           lines, chunk_size)
+
+        if not chunk:
+            break
+
+        if writer is None:
+            chunks.append(chunk)
+        else:
+            writer.write(chunk.encode(encoding))
+            await writer.drain()
+
+    if writer is None:
+        return "".join(chunks)
+
+
+async def get_decision_info(model, data, writer=None, executor=None,
+                            chunk_size=_CHUNK_SIZE, encoding="utf-8",
+                            **kwargs):
+    """
+    Asynchronously get the decision process for a tree on a piece of data.
+
+    The output is the same as that of `tree_decode.get_decision_info`, and
+    is computed in the executor.
+
+    Parameters
+    ----------
+    model : sklearn.ensemble.forest.BaseForest or
+            sklearn.tree.tree.BaseDecisionTree
+        The tree-based model that we are to analyze.
+    data : np.ndarray
+        A 2-D array compromising ONE piece of input data.
+    writer : asyncio.StreamWriter, default None
+        The stream to which to write the output. It is written in chunks,
+        each of which is drained before the next one is written. If none is
+        provided, the string output is returned.
+    executor : concurrent.futures.Executor, default None
+        The executor in which to compute the output. If none is provided,
+        the default executor of the event loop is used.
+    chunk_size : int, default 65536
+        The number of characters of output written to the stream at a time.
+    encoding : str, default "utf-8"
+        The encoding with which to write the output to the stream.
+    **kwargs : keyword arguments
+        Any other arguments of `tree_decode.iter_decision_info`, such as
+        `precision` or `estimators`.
+
+    Returns
+    -------
+    output_or_nothing : If a writer was provided, nothing is returned.
+                        Otherwise, the string output is returned.
+
+    Raises
+    ------
+    NotImplementedError : the model is not supported or has a prediction
+                          method that could not be recognized.
+    IndexError : the label index provided was out of bounds on the array of
+                 output scores provided at each node.
+    NotFittedError : the model was not properly fitted yet.
+    """
+
+    loop = asyncio.get_event_loop()
+    output = await loop.run_in_executor(executor, _explain_row,
+                                        model, data, kwargs)
+
+    if writer is None:
+        return output
+
+    for start in range(0, len(output), chunk_size):
+        writer.write(output[start:start + chunk_size].encode(encoding))
+        await writer.drain()
+
+
+def _call(func, model, kwargs):
+    return func(model, **kwargs)
+
+
+def _explain_row(model, data, kwargs):
+    return next(api.iter_decision_info(model, data[:1], **kwargs))
+
+
+def _read_chunk(lines, chunk_size):
+    """
+    Join lines from a generator until there are enough for a chunk.
+
+    Returns
+    -------
+    chunk : str
+        The joined lines, which is empty once the generator is exhausted.
+    """
+
+    chunk = []
+    length = 0
+
+    for line in lines:
+        chunk.append(line)
+        length += len(line)
+
+        if length >= chunk_size:
+            break
+
+    return "".join(chunk)
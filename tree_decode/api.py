@@ -1,17 +1,50 @@
-from sklearn.preprocessing import normalize as normalize_values
-from . import utils
+from functools import partial
+from . import codegen, export, paths, profiling, utils
 
 import numpy as np
+import weakref
 
-__all__ = ["get_tree_info", "get_decision_info", "get_tree_at"]
+__all__ = ["get_tree_info", "iter_tree_info", "get_model_diff",
+           "get_tree_table", "get_node_coverage", "get_feature_usage",
+           "get_decision_info", "iter_decision_info", "get_decision_paths",
+           "get_path_info", "load_decision_paths", "get_contributions",
+           "get_tree_at", "get_cache_info", "set_cache_size",
+           "clear_cache", "export_model", "import_model", "Profiler"]
 
 # Surface this function in the API to enable
 # ease of accessing trees in an ensemble class.
 get_tree_at = utils.get_tree_at
 
+# Surface these functions in the API to enable decoding
+# models without having to unpickle them in every process.
+export_model = export.export_model
+import_model = export.import_model
+
+# Surface this function in the API to enable reading
+# decision paths saved by `get_decision_paths`.
+load_decision_paths = paths.load_decision_paths
+
+# Surface this class in the API to enable
+# measuring where the time of a call goes.
+Profiler = profiling.Profiler
+
+
+# The functions compiled by `_get_compiled_explainer`, by estimator. Unlike
+# the rest of the state of a tree, which is evicted from the (bounded) tree
+# cache, they live as long as their estimator, as compiling them takes far
+# longer than the calls that they speed up.
+_compiled_explainers = weakref.WeakKeyDictionary()
+
+# The columns returned by `get_tree_table`.
+_TABLE_COLUMNS = ("tree", "node", "depth", "is_leaf", "feature", "threshold",
+                  "left", "right", "n_node_samples", "value")
+
 
 def get_tree_info(model, normalize=True, precision=3, names=None,
-                  label_index=None, tab_size=5, filepath_or_buffer=None):
+                  label_index=None, tab_size=5, filepath_or_buffer=None,
+                  n_jobs=None, profiler=None, max_depth=None, root_node=None,
+                  estimators=None, backend="threads", coverage=None,
+                  dedupe=False):
     """
     Print out the structure of the tree(s) of a tree-based model.
 
@@ -47,7 +80,46 @@ def get_tree_info(model, normalize=True, precision=3, names=None,
         The amount of tabbing to be used when displaying indented lines.
     filepath_or_buffer : str or file handle, default None
         The file or buffer to which to write the output. If none is provided,
-        we return the string output as given.
+        we return the string output as given. The output is written as it is
+        generated, so it is never held in memory in its entirety.
+    n_jobs : int, default None
+        The number of threads over which to spread the estimators of an
+        ensemble model. None means 1, and -1 means using all processors.
+        The output is the same regardless of the number of threads.
+    profiler : Profiler, default None
+        A profiler with which to record the time spent in each stage
+        of the call for each estimator. See `Profiler` for the stages.
+    max_depth : int, default None
+        The maximum depth of the nodes to display, relative to `root_node`.
+        Nodes below it are not visited at all. If None is provided, nodes
+        are displayed down to the leaves.
+    root_node : int, default None
+        The ID of the node at which to start displaying each tree. Only
+        the subtree below it is visited, and depths are displayed relative
+        to it. If None is provided, the trees are displayed from the root.
+    estimators : int, slice, array-like of int or bool, default None
+        The indices of the estimators of an ensemble model to decode, a
+        slice of them, or a boolean mask over them. The other estimators
+        are not touched, and the selected ones keep their original index
+        in the output. If None is provided, all estimators are decoded.
+    backend : {"threads", "processes"}, default "threads"
+        How to spread the estimators when `n_jobs` is more than one. Threads
+        only run the formatting of the output one at a time, so processes
+        are faster on large ensembles. The trees are then published to the
+        processes through shared memory, which requires Python 3.8+.
+    coverage : dict, default None
+        The node coverage of a dataset, as returned by `get_node_coverage`.
+        If provided, the number of rows that go through each node of the
+        tree(s) is displayed alongside it.
+    dedupe : bool, default False
+        Whether to display each distinct subtree only once. A subtree with
+        the same decisions (at the displayed precision) and leaf scores as
+        one already displayed, in the same tree or an earlier one, is then
+        displayed as a single line referring back to it. The trees are
+        rendered one after another, whatever the value of `n_jobs`, as
+        each tree refers back to those before it. This cannot be combined
+        with `max_depth`, as the subtrees referred back to would not be
+        displayed in full.
 
     Returns
     -------
@@ -58,235 +130,2198 @@ def get_tree_info(model, normalize=True, precision=3, names=None,
     ------
     NotImplementedError : the model is not supported for extracting info.
     IndexError : the label index provided was out of bounds on the array of
-                 output scores provided at each node.
+                 output scores provided at each node, or the root node
+                 provided was out of bounds on a tree, or the estimators
+                 selected were out of bounds.
+    ValueError : the maximum depth provided was negative, no estimators
+                 were selected, the backend is not supported, the
+                 coverage provided does not cover the estimators, or
+                 the maximum depth was combined with `dedupe`.
+    NotFittedError : the model was not properly fitted yet.
+    """
+
+    lines = iter_tree_info(model, normalize=normalize, precision=precision,
+                           names=names, label_index=label_index,
+                           tab_size=tab_size, n_jobs=n_jobs,
+                           profiler=profiler, max_depth=max_depth,
+                           root_node=root_node, estimators=estimators,
+                           backend=backend, coverage=coverage,
+                           dedupe=dedupe)
+
+    if filepath_or_buffer is None:
+        return "".join(lines)
+
+    utils.write_to_buf(lines, filepath_or_buffer, profiler=profiler)
+
+
+def iter_tree_info(model, normalize=True, precision=3, names=None,
+                   label_index=None, tab_size=5, n_jobs=None,
+                   profiler=None, max_depth=None, root_node=None,
+                   estimators=None, backend="threads", coverage=None,
+                   dedupe=False):
+    """
+    Generate the structure of the tree(s) of a tree-based model line by line.
+
+    This is the streaming counterpart of `get_tree_info`. Joining together
+    the lines that are generated gives the output of `get_tree_info`.
+
+    Parameters
+    ----------
+    model : sklearn.ensemble.forest.BaseForest or
+            sklearn.tree.tree.BaseDecisionTree
+        The tree-based model that we are to analyze.
+    normalize : bool, default True
+        Whether to normalize the label scores at the leaves so that they
+        fall into the range [0, 1].
+    precision : int or None, default 3
+        The decimal precision with which we display our cutoffs and leaf
+        scores. If None is passed in, no rounding is performed.
+    names : dict, default None
+        A mapping from feature indices to string names.
+    label_index : int, default None
+        Whether we want to display the leaf score for a particular output.
+    tab_size : int, default 5
+        The amount of tabbing to be used when displaying indented lines.
+    n_jobs : int, default None
+        The number of threads over which to spread the estimators of an
+        ensemble model. None means 1, and -1 means using all processors.
+        The output is the same regardless of the number of threads.
+    profiler : Profiler, default None
+        A profiler with which to record the time spent in each stage
+        of the call for each estimator. See `Profiler` for the stages.
+    max_depth : int, default None
+        The maximum depth of the nodes to generate, relative to `root_node`.
+    root_node : int, default None
+        The ID of the node at which to start generating each tree.
+    estimators : int, slice, array-like of int or bool, default None
+        The indices of the estimators of an ensemble model to decode, a
+        slice of them, or a boolean mask over them.
+    backend : {"threads", "processes"}, default "threads"
+        How to spread the estimators when `n_jobs` is more than one.
+    coverage : dict, default None
+        The node coverage of a dataset, as returned by `get_node_coverage`,
+        to display alongside the nodes.
+    dedupe : bool, default False
+        Whether to display each distinct subtree only once, referring back
+        to it from its repeats.
+
+    Returns
+    -------
+    lines : generator
+        A generator of the lines of output, including line breaks.
+
+    Raises
+    ------
+    NotImplementedError : the model is not supported for extracting info.
+    IndexError : the label index provided was out of bounds on the array of
+                 output scores provided at each node, or the root node
+                 provided was out of bounds on a tree, or the estimators
+                 selected were out of bounds.
+    ValueError : the maximum depth provided was negative, no estimators
+                 were selected, the backend is not supported, the
+                 coverage provided does not cover the estimators, or
+                 the maximum depth was combined with `dedupe`.
     NotFittedError : the model was not properly fitted yet.
     """
 
+    from . import parallel
+
     utils.check_model_type(model)
     utils.check_is_fitted(model)
+    parallel.check_backend(backend)
 
-    output = ""
-    names = names or {}
-    print_tab = utils.get_tab(size=tab_size)
-    estimators = utils.get_estimators(model)
+    items = utils.select_estimators(utils.get_estimators(model), estimators)
 
-    for index, estimator in enumerate(estimators):
-        output += "\n\nInfo for Decision Tree {ind}\n\n".format(ind=index)
-        tree = estimator.tree_
+    # Validate here rather than at the leaves, so that
+    # we fail before any output has been generated.
+    _check_label_index(items, label_index)
 
-        n_nodes = tree.node_count
-        children_left = tree.children_left
-        children_right = tree.children_right
+    if max_depth is not None and max_depth < 0:
+        msg = "max_depth must be non-negative, got {max_depth}"
+        raise ValueError(msg.format(max_depth=max_depth))
 
-        features = tree.feature
-        thresholds = tree.threshold
+    if dedupe and max_depth is not None:
+        raise ValueError("max_depth cannot be combined with dedupe")
 
-        node_depths = np.zeros(shape=n_nodes, dtype=np.int64)
-        is_leaves = np.zeros(shape=n_nodes, dtype=bool)
+    if root_node is not None:
+        for index, estimator in items:
+            n_nodes = estimator.tree_.node_count
 
-        stack = [(0, -1)]
+            if not 0 <= root_node < n_nodes:
+                msg = ("Node {root_node} is out of bounds on "
+                       "decision tree {ind} with {n} nodes")
+                raise IndexError(msg.format(root_node=root_node, ind=index,
+                                            n=n_nodes))
 
-        while len(stack) > 0:
-            node_id, parent_depth = stack.pop()
-            node_depths[node_id] = parent_depth + 1
+    return _iter_tree_info(items, normalize=normalize,
+                           precision=precision, names=names or {},
+                           label_index=label_index, tab_size=tab_size,
+                           n_jobs=utils.get_n_jobs(n_jobs), profiler=profiler,
+                           max_depth=max_depth, root_node=root_node,
+                           backend=backend,
+                           coverage=_get_coverage_counts(coverage, items),
+                           dedupe=dedupe)
 
-            # Check if we are at a leaf or not.
-            if children_left[node_id] != children_right[node_id]:
-                stack.append((children_left[node_id], parent_depth + 1))
-                stack.append((children_right[node_id], parent_depth + 1))
-            else:
-                is_leaves[node_id] = True
 
-        previous_leaf = False
-        previous_depth = -1
+def _check_label_index(items, label_index):
+    """
+    Check that a label index is in bounds on the scores of the estimators.
+
+    Raises
+    ------
+    IndexError : the label index provided was out of bounds on the array of
+                 output scores provided at each node.
+    """
+
+    if label_index is None:
+        return
+
+    for index, estimator in items:
+        prob_counts = estimator.tree_.value.shape[2]
+
+        if not -prob_counts <= label_index < prob_counts:
+            msg = ("Index {label_index} is out of bounds on "
+                   "decision tree {ind} with {n} possible outputs")
+            raise IndexError(msg.format(n=prob_counts, ind=index,
+                                        label_index=label_index))
+
+
+def _get_coverage_counts(coverage, items):
+    """
+    Get the row counts of each node of the estimators from `coverage`.
+
+    Returns
+    -------
+    counts : dict or None
+        A mapping from the index of each estimator to a list of the
+        number of rows that go through each of its nodes, or None if
+        no coverage was provided.
+
+    Raises
+    ------
+    ValueError : the coverage does not cover all nodes of the estimators.
+    """
+
+    if coverage is None:
+        return None
+
+    counts = {}
+
+    for index, estimator in items:
+        n_nodes = estimator.tree_.node_count
+        mask = coverage["tree"] == index
+
+        if np.count_nonzero(mask) != n_nodes:
+            msg = "The coverage does not cover decision tree {ind}"
+            raise ValueError(msg.format(ind=index))
+
+        tree_counts = np.zeros(n_nodes, dtype=np.int64)
+        tree_counts[coverage["node"][mask]] = coverage["count"][mask]
+
+        counts[index] = tree_counts.tolist()
+
+    return counts
+
+
+def _iter_tree_info(items, normalize, precision, names, label_index,
+                    tab_size, n_jobs, profiler, max_depth, root_node,
+                    backend, coverage, dedupe):
+    """
+    Generate the lines of `iter_tree_info` for a validated list of
+    (index, estimator) tuples.
+    """
+
+    # The subtrees displayed and scores formatted
+    # so far, which are shared by all estimators.
+    references = {} if dedupe else None
+    formatted = {} if dedupe else None
+
+    options = dict(normalize=normalize, precision=precision, names=names,
+                   label_index=label_index, print_tab=utils.get_tab(tab_size),
+                   profiler=profiler, max_depth=max_depth, root_node=root_node,
+                   coverage=coverage, references=references,
+                   formatted=formatted)
+
+    if utils.get_n_jobs(n_jobs) == 1 or dedupe:
+        for item in items:
+            for line in _iter_estimator_lines(item, **options):
+                yield line
+    else:
+        if backend == "processes":
+            from . import parallel
+
+            # The profiler can't be shared with the processes,
+            # which instead report their statistics to it.
+            del options["profiler"]
+            infos = parallel.iter_tree_info(items, options, n_jobs,
+                                            profiler=profiler)
+        else:
+            render = partial(_get_estimator_info, **options)
+            infos = utils.map_estimators(render, items, n_jobs=n_jobs)
+
+        for info in infos:
+            for line in info.splitlines(True):
+                yield line
+
+
+def _get_estimator_info(item, **options):
+    """
+    Get the output of `iter_tree_info` for a single estimator as a string.
+    """
+
+    return "".join(_iter_estimator_lines(item, **options))
+
+
+def _iter_estimator_lines(item, **options):
+    """
+    Generate the lines of `iter_tree_info` for a single estimator,
+    recording the time spent rendering them if there is a profiler.
+    """
+
+    lines = _iter_estimator_info(item, **options)
+    profiler = options["profiler"]
+
+    if profiler is None:
+        return lines
+
+    return profiling.profile_lines(lines, profiler, item[0])
+
+
+def _iter_estimator_info(item, normalize, precision, names, label_index,
+                         print_tab, profiler, max_depth, root_node,
+                         coverage, references, formatted):
+    """
+    Generate the lines of `iter_tree_info` for a single estimator.
+
+    Parameters
+    ----------
+    item : tuple
+        The index of the estimator in the model and the estimator itself.
+    references : dict or None
+        If subtrees are deduplicated, a mapping from the hash of each
+        subtree displayed so far to the (index, node ID) at which it was
+        displayed, which is updated with the subtrees of this estimator.
+    formatted : dict or None
+        If subtrees are deduplicated, the leaf scores formatted so far,
+        which is updated with the scores of this estimator.
+    """
+
+    index, estimator = item
+
+    yield "\n\nInfo for Decision Tree {ind}\n\n".format(ind=index)
+
+    references_to = None
+
+    if references is not None:
+        nodes, references_to = _get_dedupe_nodes(
+            estimator, normalize, precision, label_index, profiler, index,
+            root_node or 0, references, formatted)
+    elif max_depth is None and root_node is None:
+        nodes = _get_tree_nodes(estimator, normalize, precision,
+                                label_index, profiler, index)
+    else:
+        nodes = _get_region_nodes(estimator.tree_, normalize, precision,
+                                  label_index, profiler, index,
+                                  max_depth, root_node or 0)
+
+    if coverage is not None:
+        # Only the labels of the nodes mention their number of rows.
+        counts = coverage[index]
+        labels = ["{node} (rows = {count})".format(node=node_id,
+                                                   count=counts[node_id])
+                  for node_id in nodes[0]]
+        nodes = (labels,) + nodes[1:]
+
+    if references_to is None:
+        references_to = [None] * len(nodes[0])
+
+    previous_leaf = False
+    previous_depth = -1
+
+    for (i, node_depth, is_leaf, left, right, feature, cutoff, score,
+         reference) in zip(*(nodes + (references_to,))):
+        tabbing = node_depth * print_tab
+
+        # A line referring back to a subtree stands in for the whole
+        # subtree, so it is spaced out like a leaf.
+        if reference is not None:
+            if previous_leaf:
+                if previous_depth > 0 and previous_depth > node_depth:
+                    yield "\n"  # Readability
+
+            ref_index, ref_id = reference
+            ref_info = "{tabbing}node={label}: same as node {ref}"
+
+            if ref_index != index:
+                ref_info += " of Decision Tree {ref_index}"
+
+            yield (ref_info.format(tabbing=tabbing, label=i, ref=ref_id,
+                                   ref_index=ref_index) + ".\n")
+
+            previous_depth = node_depth
+            previous_leaf = True
+        elif is_leaf:
+            if previous_leaf:
+                if previous_depth > 0 and previous_depth > node_depth:
+                    yield "\n"  # Readability
+
+            leaf_info = "{tabbing}node={label} left node: {score}"
+            yield (leaf_info.format(tabbing=tabbing, label=i,
+                                    score=score) + "\n")
+
+            previous_depth = node_depth
+            previous_leaf = True
+        else:
+            if previous_leaf:
+                previous_leaf = False
+                yield "\n"  # Readability
+
+            default = "feature {name}".format(name=feature)
+            name = names.get(feature, default)
+
+            node_info = ("{tabbing}node={label}: go to node {left} if "
+                         "{name} <= {cutoff} else to node {right}.")
+            yield (node_info.format(tabbing=tabbing, label=i, left=left,
+                                    name=name, cutoff=cutoff,
+                                    right=right) + "\n")
+
+
+def _get_tree_nodes(estimator, normalize, precision,
+                    label_index, profiler, index):
+    """
+    Get the information to display about each node of a whole tree.
+
+    Returns
+    -------
+    nodes : tuple
+        The IDs of the nodes in the order in which to display them, and
+        lists of the depth, whether it is a leaf, the left and right child,
+        the feature, the formatted threshold and the formatted scores of
+        each of those nodes.
+    """
+
+    tree = estimator.tree_
+    state = utils.get_tree_state(estimator)
+
+    with profiling.stage(profiler, "topology", index) as topology:
+        node_depths, is_leaves = state.topology
+        topology.nodes = tree.node_count
+
+    if normalize:
+        with profiling.stage(profiler, "normalize", index):
+            state.normalized_values
+
+    # The formatted strings take several times the memory of the arrays
+    # of the tree, so they are only kept for the duration of the call.
+    with profiling.stage(profiler, "format", index):
+        cutoffs = _format_thresholds(tree, precision)
+        scores = _format_leaf_scores(state, normalize, precision,
+                                     label_index)
+
+    return (range(tree.node_count), node_depths.tolist(), is_leaves.tolist(),
+            tree.children_left.tolist(), tree.children_right.tolist(),
+            tree.feature.tolist(), cutoffs, scores)
+
+
+def _get_region_nodes(tree, normalize, precision, label_index,
+                      profiler, index, max_depth, root_node):
+    """
+    Get the information to display about each node of a region of a tree,
+    without visiting any of the other nodes of the tree.
+
+    See `_get_tree_nodes` for the information returned.
+    """
+
+    with profiling.stage(profiler, "topology", index) as topology:
+        node_ids, node_depths, is_leaves = utils.get_subtree(
+            tree.children_left, tree.children_right,
+            root_node=root_node, max_depth=max_depth)
+        topology.nodes = node_ids.shape[0]
+
+    return _format_nodes(tree, node_ids, node_depths, is_leaves, normalize,
+                         precision, label_index, profiler, index)
+
+
+def _get_dedupe_nodes(estimator, normalize, precision, label_index,
+                      profiler, index, root_node, references, formatted):
+    """
+    Get the information to display about each node of a tree (or region
+    of it), leaving out the subtrees that repeat one already displayed.
+
+    Only the nodes that are displayed are formatted, so the repeats
+    save the time of formatting them as well as their output. Leaves
+    are the smallest subtrees, so identical leaf scores are likewise
+    only formatted once, across all of the trees.
+
+    Returns
+    -------
+    nodes : tuple
+        The information about the nodes displayed, as `_get_tree_nodes`.
+    references_to : list
+        The (index, node ID) of the subtree that each of those nodes
+        refers back to, or None for nodes that are displayed in full.
+    """
+
+    tree = estimator.tree_
+
+    with profiling.stage(profiler, "topology", index) as topology:
+        node_ids, node_depths, is_leaves = utils.get_subtree(
+            tree.children_left, tree.children_right, root_node=root_node)
+        topology.nodes = node_ids.shape[0]
+
+    with profiling.stage(profiler, "dedupe", index):
+        hashes = _get_dedupe_hashes(estimator, normalize, precision,
+                                    label_index)[node_ids]
 
-        for i in range(n_nodes):
-            node_depth = node_depths[i]
-            tabbing = node_depth * print_tab
+        positions = []
+        references_to = []
 
-            if is_leaves[i]:
-                if previous_leaf:
-                    if previous_depth > 0 and previous_depth > node_depth:
-                        output += "\n"  # Readability
+        # The nodes below a node that refers back to another subtree are
+        # hidden. Nodes are displayed in order of their IDs, in which a
+        # parent always comes before its children, so the nodes to hide
+        # are known by the time we get to them. They don't necessarily
+        # directly follow the node referring back, e.g. in best-first trees.
+        hidden = set()
 
-                probs = tree.value[i][:]
+        for position, (node_id, is_leaf, left, right,
+                       subtree_hash) in enumerate(zip(
+                           node_ids.tolist(), is_leaves.tolist(),
+                           tree.children_left[node_ids].tolist(),
+                           tree.children_right[node_ids].tolist(),
+                           hashes.tolist())):
+            if node_id in hidden:
+                if not is_leaf:
+                    hidden.update((left, right))
 
-                if normalize:
-                    probs = normalize_values(probs, norm="l1")
+                continue
 
-                probs = utils.maybe_round(probs, precision=precision)
+            reference = None
 
-                if label_index is not None:
-                    try:
-                        prob = probs[0][label_index]
-                        score = "score = {score}".format(score=prob)
-                    except IndexError:
-                        msg = ("Index {label_index} is out of bounds on "
-                               "decision tree {ind} with {n} possible outputs")
-                        prob_counts = probs.shape[1]
+            if not is_leaf:
+                reference = references.get(subtree_hash)
 
-                        raise IndexError(msg.format(n=prob_counts, ind=index,
-                                                    label_index=label_index))
+                if reference is None:
+                    references[subtree_hash] = (index, node_id)
                 else:
-                    score = "scores = {scores}".format(scores=probs)
+                    hidden.update((left, right))
 
-                leaf_info = "{tabbing}node={label} left node: {score}"
-                output += (leaf_info.format(tabbing=tabbing, label=i,
-                                            score=score) + "\n")
+            positions.append(position)
+            references_to.append(reference)
 
-                previous_depth = node_depth
-                previous_leaf = True
-            else:
-                if previous_leaf:
-                    previous_leaf = False
-                    output += "\n"  # Readability
+    nodes = _format_nodes(tree, node_ids[positions], node_depths[positions],
+                          is_leaves[positions], normalize, precision,
+                          label_index, profiler, index, formatted=formatted)
+    return nodes, references_to
 
-                feature = features[i]
-                threshold = thresholds[i]
-                cutoff = utils.maybe_round(threshold, precision=precision)
 
-                default = "feature {name}".format(name=feature)
-                name = names.get(feature, default)
+def _format_nodes(tree, node_ids, node_depths, is_leaves, normalize,
+                  precision, label_index, profiler, index, formatted=None):
+    """
+    Get the information to display about the given nodes of a tree,
+    formatting the thresholds and scores of only those nodes.
+
+    See `_get_tree_nodes` for the information returned.
+    """
 
-                node_info = ("{tabbing}node={label}: go to node {left} if "
-                             "{name} <= {cutoff} else to node {right}.")
-                output += (node_info.format(tabbing=tabbing, label=i,
-                                            left=children_left[i],
-                                            name=name, cutoff=cutoff,
-                                            right=children_right[i]) + "\n")
+    leaf_ids = node_ids[is_leaves]
+    values = tree.value[leaf_ids]
 
-    utils.write_to_buf(output, filepath_or_buffer)
-    return output if filepath_or_buffer is None else None
+    if normalize:
+        with profiling.stage(profiler, "normalize", index):
+            values = utils.normalize_values(values)
 
+    with profiling.stage(profiler, "format", index):
+        thresholds = utils.maybe_round(tree.threshold[node_ids],
+                                       precision=precision)
+        cutoffs = utils.format_numbers(thresholds)
 
-def get_decision_info(model, data, precision=3, names=None,
-                      label_index=None, tab_size=5, filepath_or_buffer=None):
+        scores = [None] * node_ids.shape[0]
+        leaf_scores = _format_scores(values, precision, label_index,
+                                     formatted=formatted)
+
+        for position, score in zip(np.flatnonzero(is_leaves).tolist(),
+                                   leaf_scores):
+            scores[position] = score
+
+    return (node_ids.tolist(), node_depths.tolist(), is_leaves.tolist(),
+            tree.children_left[node_ids].tolist(),
+            tree.children_right[node_ids].tolist(),
+            tree.feature[node_ids].tolist(), cutoffs, scores)
+
+
+def _format_thresholds(tree, precision):
     """
-    Get the decision process for a tree on a piece of data.
+    Format the decision thresholds of all nodes of a tree at once.
+    """
+
+    thresholds = utils.maybe_round(tree.threshold, precision=precision)
+    return utils.format_numbers(thresholds)
+
+
+def _format_leaf_scores(state, normalize, precision, label_index):
+    """
+    Format the scores of all leaves of a tree at once for `iter_tree_info`.
+
+    Returns
+    -------
+    scores : list
+        The formatted scores of each node, or None for nodes
+        that are not leaves.
+    """
+
+    _, is_leaves = state.topology
+    leaf_ids = np.flatnonzero(is_leaves)
+
+    values = state.normalized_values if normalize else state.tree.value
+    scores = [None] * is_leaves.shape[0]
+
+    for leaf_id, score in zip(leaf_ids.tolist(),
+                              _format_scores(values[leaf_ids], precision,
+                                             label_index)):
+        scores[leaf_id] = score
+
+    return scores
+
+
+def _format_scores(values, precision, label_index, formatted=None):
+    """
+    Format the scores of leaves for `iter_tree_info`.
 
     Parameters
     ----------
-    model : sklearn.ensemble.forest.BaseForest or
-            sklearn.tree.tree.BaseDecisionTree
-        The tree-based model that we are to analyze. Can be an individual
-        estimator (e.g. DecisionTreeClassifier) or an ensemble model
-        (e.g. RandomForestRegressor).
-    data : np.ndarray
-        A 2-D array compromising ONE piece of input data.
+    values : numpy.ndarray
+        The (normalized) values of the leaves, as a 3-D array.
+    formatted : dict, default None
+        The scores formatted so far, to reuse for identical scores.
+        See `utils.format_arrays`.
+
+    Returns
+    -------
+    scores : list
+        The formatted scores of each of the leaves.
+    """
+
+    values = utils.maybe_round(values, precision=precision)
+
+    if label_index is not None:
+        strings = utils.format_numbers(values[:, 0, label_index])
+        template = "score = {score}"
+    else:
+        strings = utils.format_arrays(values, formatted=formatted)
+        template = "scores = {score}"
+
+    return [template.format(score=string) for string in strings]
+
+
+def _get_dedupe_hashes(estimator, normalize, precision, label_index):
+    """
+    Get the hashes of the subtrees of an estimator for `iter_tree_info`.
+
+    Only what is displayed is hashed, i.e. the thresholds and the (selected)
+    scores at the displayed precision, so that subtrees are the same if and
+    only if they are displayed the same. The hashes are computed once and
+    kept in the state of the tree.
+    """
+
+    def compute_hashes():
+        tree = estimator.tree_
+        n_nodes = tree.node_count
+
+        node_depths, _ = state.topology
+        values = state.normalized_values if normalize else tree.value
+        values = utils.maybe_round(values[:n_nodes], precision=precision)
+
+        if label_index is not None:
+            values = values[:, 0, label_index]
+
+        thresholds = utils.maybe_round(tree.threshold[:n_nodes],
+                                       precision=precision)
+
+        # Adding zero turns negative zeros, which are displayed
+        # like zeros but have different bits, into zeros.
+        return utils.hash_subtrees(
+            tree.children_left[:n_nodes], tree.children_right[:n_nodes],
+            node_depths, tree.feature[:n_nodes], thresholds + 0.0,
+            values + 0.0)
+
+    state = utils.get_tree_state(estimator)
+    return state.get_table("dedupe_hashes", (normalize, precision,
+                                             label_index), compute_hashes)
+
+
+def get_model_diff(old_model, new_model, normalize=True, precision=3,
+                   names=None, label_index=None, tab_size=5,
+                   filepath_or_buffer=None):
+    """
+    Get the changes between the structure of two versions of a model.
+
+    Each tree of the new model is compared to the tree with the same index
+    in the old model. The subtree below every node is hashed from the node
+    arrays of its tree, so that identical subtrees are skipped at once by
+    comparing their hashes, and only the nodes whose decision or scores
+    changed are visited and displayed. The hashes are kept in the state of
+    each tree, like its topology.
+
+    Parameters
+    ----------
+    old_model : sklearn.ensemble.forest.BaseForest or
+                sklearn.tree.tree.BaseDecisionTree
+        The previous version of the model.
+    new_model : sklearn.ensemble.forest.BaseForest or
+                sklearn.tree.tree.BaseDecisionTree
+        The current version of the model.
+    normalize : bool, default True
+        Whether to normalize the label scores at the leaves so that they
+        fall into the range [0, 1]. Leaves whose normalized scores did not
+        change are then not displayed, even if their unnormalized scores
+        (e.g. the number of samples of each label) changed.
     precision : int or None, default 3
         The decimal precision with which we display our cutoffs and leaf
         scores. If None is passed in, no rounding is performed.
     names : dict, default None
-        A mapping from feature indices to string names. By default, when we
-        display the non-leaf node forks, we write something like "Feature {i}
-        Score <= {cutoff}," where "i" is an integer. If names are provided,
-        we will map "i" to a particular string name and write instead,
-        "{feature-name} <= {cutoff}."
+        A mapping from feature indices to string names.
     label_index : int, default None
-        Whether we want to display the leaf score for a particular output (e.g.
-        classification). If an integer is provided, we will index into the
-        scores array at each leaf and only display that score. Otherwise, the
-        entire scores array will be displayed. Note that labels are 0-indexed.
+        Whether we want to display the leaf score for a particular output.
     tab_size : int, default 5
         The amount of tabbing to be used when displaying indented lines.
     filepath_or_buffer : str or file handle, default None
         The file or buffer to which to write the output. If none is provided,
-        we return the string output as given.
+        we return the string output as given. The output is written as it is
+        generated, so it is never held in memory in its entirety.
 
     Returns
     -------
     output_or_nothing : If a filepath or buffer was provided, nothing is
                         returned. Otherwise, the string output is returned.
+                        It lists the changed nodes of each tree, indented
+                        by depth and labeled with their ID in the new tree,
+                        followed by what they were in the old tree. Nodes
+                        below a leaf that became a decision are all listed.
+                        The output is empty if the models are the same.
 
     Raises
     ------
-    NotImplementedError : the model is not supported or has a prediction
-                          method that could not be recognized.
+    NotImplementedError : the models are not supported for extracting info.
     IndexError : the label index provided was out of bounds on the array of
                  output scores provided at each node.
-    NotFittedError : the model was not properly fitted yet.
+    NotFittedError : the models were not properly fitted yet.
     """
 
-    utils.check_model_type(model)
-    utils.check_is_fitted(model)
-
-    output = ""
-    names = names or {}
+    for model in (old_model, new_model):
+        utils.check_model_type(model)
+        utils.check_is_fitted(model)
 
-    predict_methods = ("predict_proba", "predict")
-    predict_method = None
+    old_estimators = utils.get_estimators(old_model)
+    new_estimators = utils.get_estimators(new_model)
 
-    for possible_method in predict_methods:
-        if hasattr(model, possible_method):
-            predict_method = possible_method
-            break
+    for estimators in (old_estimators, new_estimators):
+        _check_label_index(list(enumerate(estimators)), label_index)
 
-    if predict_method is None:
-        klass = type(model).__name__
-        msg = "{klass} has an unrecognizable predict method"
-        raise NotImplementedError(msg.format(klass=klass))
+    lines = _iter_model_diff(old_estimators, new_estimators, normalize,
+                             precision, names or {}, label_index,
+                             utils.get_tab(size=tab_size))
 
-    estimators = utils.get_estimators(model)
+    if filepath_or_buffer is None:
+        return "".join(lines)
 
-    for index, estimator in enumerate(estimators):
-        node_indicator = estimator.decision_path(data)
-        node_index = node_indicator.indices[node_indicator.indptr[0]:
-                                            node_indicator.indptr[1]]
+    utils.write_to_buf(lines, filepath_or_buffer)
 
-        probs = getattr(estimator, predict_method)(data)[0]
-        probs = np.atleast_1d(probs)
 
-        if label_index is not None:
-            try:
-                probs = probs[label_index]
-            except IndexError:
-                msg = ("Index {label_index} is out of bounds on "
-                       "decision tree {ind} with {n} possible outputs")
-                prob_counts = probs.shape[0]
+def _iter_model_diff(old_estimators, new_estimators, normalize, precision,
+                     names, label_index, print_tab):
+    """
+    Generate the lines of `get_model_diff` for validated estimators.
+    """
 
-                raise IndexError(msg.format(n=prob_counts, ind=index,
-                                            label_index=label_index))
+    for index, (old, new) in enumerate(zip(old_estimators, new_estimators)):
+        changes = _diff_trees(old, new, normalize)
 
-        probs = utils.maybe_round(probs, precision=precision)
+        if changes:
+            yield "\n\nDiff for Decision Tree {ind}\n\n".format(ind=index)
 
-        tree = estimator.tree_
-        features = tree.feature
-        thresholds = tree.threshold
+            for line in _render_diff(old, new, changes, normalize, precision,
+                                     names, label_index, print_tab):
+                yield line
 
-        output += "\nDecision Path for Tree {ind}:\n".format(ind=index)
-        leaf_id = estimator.apply(data)
+    n_old, n_new = len(old_estimators), len(new_estimators)
 
-        print_tab = utils.get_tab(size=tab_size)
+    for index in range(n_new, n_old):
+        yield "\n\nDecision Tree {ind} was removed\n".format(ind=index)
 
-        for node_id in node_index:
-            output += print_tab
+    for index in range(n_old, n_new):
+        n_nodes = new_estimators[index].tree_.node_count
+        yield ("\n\nDecision Tree {ind} was added with {n} nodes\n"
+               .format(ind=index, n=n_nodes))
 
-            if leaf_id[0] != node_id:
-                feature = features[node_id]
-                feature_score = data[0, feature]
-                feature_threshold = thresholds[node_id]
 
-                default = "Feature {name} Score".format(name=feature)
-                name = names.get(feature, default)
+def _get_subtree_hashes(estimator, normalize):
+    """
+    Get the hashes of the subtrees of an estimator for `get_model_diff`.
 
-                if feature_score <= thresholds[node_id]:
-                    threshold_sign = "<="
-                else:
-                    threshold_sign = ">"
+    The hashes are computed once and kept in the state of the tree.
+    """
 
-                feature_score = utils.maybe_round(feature_score,
-                                                  precision=precision)
-                feature_threshold = utils.maybe_round(feature_threshold,
-                                                      precision=precision)
+    def compute_hashes():
+        tree = estimator.tree_
+        n_nodes = tree.node_count
+
+        node_depths, _ = state.topology
+        values = state.normalized_values if normalize else tree.value
+
+        return utils.hash_subtrees(
+            tree.children_left[:n_nodes], tree.children_right[:n_nodes],
+            node_depths, tree.feature[:n_nodes], tree.threshold[:n_nodes],
+            values[:n_nodes])
+
+    state = utils.get_tree_state(estimator)
+    return state.get_table("subtree_hashes", normalize, compute_hashes)
+
+
+def _diff_trees(old, new, normalize):
+    """
+    Find the nodes that changed between two versions of an estimator.
+
+    Returns
+    -------
+    changes : list
+        The (old_id, new_id, depth) tuples of the nodes that changed, in
+        depth-first order of the new tree. For nodes in a subtree of the
+        new tree that replaced a leaf, or was replaced by one, the old ID
+        is None.
+    """
+
+    old_tree, new_tree = old.tree_, new.tree_
+
+    old_hashes = _get_subtree_hashes(old, normalize)
+    new_hashes = _get_subtree_hashes(new, normalize)
+
+    old_left, old_right = old_tree.children_left, old_tree.children_right
+    new_left, new_right = new_tree.children_left, new_tree.children_right
+
+    changes = []
+    stack = [(0, 0, 0)]
+
+    while stack:
+        old_id, new_id, depth = stack.pop()
+
+        if old_id is None:
+            changes.append((None, new_id, depth))
+
+            if new_left[new_id] != new_right[new_id]:
+                stack.append((None, new_right[new_id], depth + 1))
+                stack.append((None, new_left[new_id], depth + 1))
+
+            continue
+
+        # The subtrees are the same, so none of their nodes changed.
+        if old_hashes[old_id] == new_hashes[new_id]:
+            continue
+
+        old_split = old_left[old_id] != old_right[old_id]
+        new_split = new_left[new_id] != new_right[new_id]
+
+        if old_split and new_split:
+            if (old_tree.feature[old_id] != new_tree.feature[new_id] or
+                    old_tree.threshold[old_id] != new_tree.threshold[new_id]):
+                changes.append((old_id, new_id, depth))
+
+            stack.append((old_right[old_id], new_right[new_id], depth + 1))
+            stack.append((old_left[old_id], new_left[new_id], depth + 1))
+        else:
+            changes.append((old_id, new_id, depth))
+
+            # The whole subtree of a new decision is new.
+            if new_split:
+                stack.append((None, new_right[new_id], depth + 1))
+                stack.append((None, new_left[new_id], depth + 1))
+
+    return changes
+
+
+def _render_diff(old, new, changes, normalize, precision, names,
+                 label_index, print_tab):
+    """
+    Generate the lines of the nodes that changed between two versions
+    of an estimator.
+    """
+
+    def describe(tree, values, node_id):
+        left = tree.children_left[node_id]
+        right = tree.children_right[node_id]
+
+        if left == right:
+            score, = _format_scores(values[[node_id]], precision,
+                                    label_index)
+            return "left node: " + score
+
+        feature = tree.feature[node_id]
+        default = "feature {name}".format(name=feature)
+
+        cutoff = utils.maybe_round(tree.threshold[node_id],
+                                   precision=precision)
+        cutoff, = utils.format_numbers(np.array([cutoff]))
+
+        return ("go to node {left} if {name} <= {cutoff} else to node "
+                "{right}.".format(left=left, right=right, cutoff=cutoff,
+                                  name=names.get(feature, default)))
+
+    old_values = _get_diff_values(old, normalize)
+    new_values = _get_diff_values(new, normalize)
+
+    for old_id, new_id, depth in changes:
+        info = describe(new.tree_, new_values, new_id)
+        separator = " " if info.startswith("left") else ": "
+
+        line = "{tabbing}node={label}{separator}{info}".format(
+            tabbing=depth * print_tab, label=new_id, separator=separator,
+            info=info)
+
+        if old_id is not None:
+            if old_id != new_id:
+                line += " (was node={label}".format(label=old_id)
+            else:
+                line += " (was"
+
+            line += ": {info})".format(
+                info=describe(old.tree_, old_values, old_id))
+
+        yield line + "\n"
+
+
+def _get_diff_values(estimator, normalize):
+    state = utils.get_tree_state(estimator)
+    return state.normalized_values if normalize else estimator.tree_.value
+
+
+def get_tree_table(model, normalize=True):
+    """
+    Get the structure of the tree(s) of a tree-based model as arrays.
+
+    This provides the same information as `get_tree_info`, but as columns
+    of a table with one row per node, across all of the trees. Nodes are
+    ordered by tree and then by node ID.
+
+    Parameters
+    ----------
+    model : sklearn.ensemble.forest.BaseForest or
+            sklearn.tree.tree.BaseDecisionTree
+        The tree-based model that we are to analyze.
+    normalize : bool, default True
+        Whether to normalize the label scores at the nodes so that they
+        fall into the range [0, 1].
+
+    Returns
+    -------
+    table : dict
+        A mapping from column names to arrays, with one entry per node:
+
+        * "tree" : the index of the tree that the node belongs to.
+        * "node" : the ID of the node within its tree.
+        * "depth" : the depth of the node, with roots at depth zero.
+        * "is_leaf" : whether the node is a leaf.
+        * "feature" : the feature index of the node's decision.
+        * "threshold" : the cutoff of the node's decision.
+        * "left" : the ID of the node's left child.
+        * "right" : the ID of the node's right child.
+        * "n_node_samples" : the number of training samples at the node.
+        * "value" : the label scores of the node, as a 3-D array of shape
+                    (n_nodes, n_outputs, max_n_classes).
+
+        For leaves, "feature", "threshold", "left" and "right" hold the
+        placeholder values that scikit-learn uses for them.
+
+    Raises
+    ------
+    NotImplementedError : the model is not supported for extracting info.
+    NotFittedError : the model was not properly fitted yet.
+    """
+
+    utils.check_model_type(model)
+    utils.check_is_fitted(model)
+
+    columns = dict((name, []) for name in _TABLE_COLUMNS)
+    estimators = utils.get_estimators(model)
+
+    for index, estimator in enumerate(estimators):
+        tree = estimator.tree_
+        n_nodes = tree.node_count
+
+        state = utils.get_tree_state(estimator)
+        node_depths, is_leaves = state.topology
+
+        values = state.normalized_values if normalize else tree.value
+
+        columns["tree"].append(np.full(n_nodes, index, dtype=np.int64))
+        columns["node"].append(np.arange(n_nodes, dtype=np.int64))
+        columns["depth"].append(node_depths)
+        columns["is_leaf"].append(is_leaves)
+        columns["feature"].append(tree.feature[:n_nodes])
+        columns["threshold"].append(tree.threshold[:n_nodes])
+        columns["left"].append(tree.children_left[:n_nodes])
+        columns["right"].append(tree.children_right[:n_nodes])
+        columns["n_node_samples"].append(tree.n_node_samples[:n_nodes])
+        columns["value"].append(values[:n_nodes])
+
+    return dict((name, np.concatenate(arrays))
+                for name, arrays in columns.items())
+
+
+def get_node_coverage(model, data, chunk_size=None,
+                      estimators=None, n_jobs=None):
+    """
+    Count how many rows of a dataset go through each node of the tree(s).
+
+    This shows which branches are never taken (i.e. dead branches) and how
+    the rows are spread over the leaves, e.g. to compare production data
+    against training data (see the "n_node_samples" of `get_tree_table`).
+
+    Only the leaf of each row is looked up, and the counts of the leaves
+    are then summed up the trees, so the whole decision paths of the rows
+    are never materialized.
+
+    Parameters
+    ----------
+    model : sklearn.ensemble.forest.BaseForest or
+            sklearn.tree.tree.BaseDecisionTree
+        The tree-based model that we are to analyze.
+    data : np.ndarray
+        A 2-D array of shape (n_rows, n_features) of input data.
+    chunk_size : int, default None
+        The number of rows that are looked up at once. Memory use grows
+        with the size of the chunks. If None is provided, all of the rows
+        are looked up at once.
+    estimators : int, slice, array-like of int or bool, default None
+        The indices of the estimators of an ensemble model to analyze, a
+        slice of them, or a boolean mask over them.
+    n_jobs : int, default None
+        The number of threads over which to spread the estimators of an
+        ensemble model. None means 1, and -1 means using all processors.
+
+    Returns
+    -------
+    coverage : dict
+        A mapping from column names to arrays, with one entry per node,
+        ordered by tree and then by node ID like `get_tree_table`:
+
+        * "tree" : the index of the tree that the node belongs to.
+        * "node" : the ID of the node within its tree.
+        * "is_leaf" : whether the node is a leaf.
+        * "count" : the number of rows that go through the node.
+        * "fraction" : the fraction of the rows that go through the node.
+                       For leaves, this is their occupancy.
+
+        It can also be passed to `get_tree_info` to display the counts.
+
+    Raises
+    ------
+    NotImplementedError : the model is not supported for extracting info.
+    ValueError : the input data is not a 2-D array of finite values, or it
+                 does not have the number of features of the model.
+    NotFittedError : the model was not properly fitted yet.
+    """
+
+    utils.check_model_type(model)
+    utils.check_is_fitted(model)
+
+    items = utils.select_estimators(utils.get_estimators(model), estimators)
+    n_features = items[0][1].tree_.n_features
+
+    n_rows = data.shape[0]
+    chunk_size = chunk_size or max(n_rows, 1)
+
+    leaf_counts = [np.zeros(estimator.tree_.node_count, dtype=np.int64)
+                   for _, estimator in items]
+
+    for start in range(0, n_rows, chunk_size):
+        chunk = utils.check_input(data[start:start + chunk_size], n_features)
+        count = partial(_count_leaves, data=chunk)
+
+        for counts, chunk_counts in zip(leaf_counts, utils.map_estimators(
+                count, items, n_jobs=n_jobs)):
+            counts += chunk_counts
+
+    columns = dict((name, []) for name in ("tree", "node", "is_leaf", "count"))
+
+    for (index, estimator), counts in zip(items, leaf_counts):
+        tree = estimator.tree_
+        n_nodes = tree.node_count
+
+        node_depths, is_leaves = utils.get_tree_state(estimator).topology
+        counts = utils.sum_over_subtrees(tree.children_left[:n_nodes],
+                                         tree.children_right[:n_nodes],
+                                         node_depths, counts)
+
+        columns["tree"].append(np.full(n_nodes, index, dtype=np.int64))
+        columns["node"].append(np.arange(n_nodes, dtype=np.int64))
+        columns["is_leaf"].append(is_leaves)
+        columns["count"].append(counts)
+
+    columns = dict((name, np.concatenate(arrays))
+                   for name, arrays in columns.items())
+    columns["fraction"] = columns["count"] / float(max(n_rows, 1))
+
+    return columns
+
+
+def _count_leaves(item, data):
+    """
+    Count how many rows of a chunk of data end up in each leaf of a tree.
+    """
+
+    _, estimator = item
+    leaf_ids = estimator.apply(data)
+
+    return np.bincount(leaf_ids, minlength=estimator.tree_.node_count)
+
+
+def get_feature_usage(model, names=None, estimators=None):
+    """
+    Get statistics on how the features are used by the tree(s) of a model.
+
+    The statistics are computed at once from the decisions of all of the
+    trees, so they are cheap to get even for ensembles of many trees.
+
+    Parameters
+    ----------
+    model : sklearn.ensemble.forest.BaseForest or
+            sklearn.tree.tree.BaseDecisionTree
+        The tree-based model that we are to analyze.
+    names : dict, default None
+        A mapping from feature indices to string names. By default, feature
+        "i" is named "feature i," as in `get_tree_info`.
+    estimators : int, slice, array-like of int or bool, default None
+        The indices of the estimators of an ensemble model to analyze, a
+        slice of them, or a boolean mask over them.
+
+    Returns
+    -------
+    usage : dict
+        A mapping from column names to arrays, with one entry per feature,
+        ordered by feature index:
+
+        * "feature" : the index of the feature.
+        * "name" : the name of the feature.
+        * "n_splits" : the number of decisions made on the feature.
+        * "n_trees" : the number of trees with decisions on the feature.
+        * "n_node_samples" : the total number of training samples at the
+                             decisions made on the feature.
+        * "sample_usage" : "n_node_samples" divided by the total number of
+                           training samples at the roots of the trees.
+        * "thresholds" : the sorted cutoffs of the decisions made on the
+                         feature, as an object array of arrays.
+
+    Raises
+    ------
+    NotImplementedError : the model is not supported for extracting info.
+    NotFittedError : the model was not properly fitted yet.
+    """
+
+    utils.check_model_type(model)
+    utils.check_is_fitted(model)
+
+    items = utils.select_estimators(utils.get_estimators(model), estimators)
+    trees = [estimator.tree_ for _, estimator in items]
+
+    n_features = trees[0].n_features
+    names = names or {}
+
+    tree_ids = np.repeat(np.arange(len(trees)),
+                         [tree.node_count for tree in trees])
+    features = np.concatenate([tree.feature[:tree.node_count]
+                               for tree in trees])
+    thresholds = np.concatenate([tree.threshold[:tree.node_count]
+                                 for tree in trees])
+    n_node_samples = np.concatenate([tree.n_node_samples[:tree.node_count]
+                                     for tree in trees])
+
+    # Leaves have a negative placeholder as their feature.
+    splits = features >= 0
+    tree_ids = tree_ids[splits]
+    features = features[splits]
+    thresholds = thresholds[splits]
+    n_node_samples = n_node_samples[splits]
+
+    n_splits = np.bincount(features, minlength=n_features)
+    total_samples = np.bincount(features, weights=n_node_samples,
+                                minlength=n_features)
+
+    pairs = np.unique(tree_ids * n_features + features)
+    n_trees = np.bincount(pairs % n_features, minlength=n_features)
+
+    n_root_samples = sum(int(tree.n_node_samples[0]) for tree in trees)
+
+    # Group the cutoffs by feature, and then sort each group on its own,
+    # which is faster than sorting by feature and cutoff all at once.
+    order = np.argsort(features, kind="mergesort")
+    groups = np.split(thresholds[order], np.cumsum(n_splits)[:-1])
+
+    sorted_thresholds = np.empty(n_features, dtype=object)
+
+    for feature, group in enumerate(groups):
+        group.sort()
+        sorted_thresholds[feature] = group
+
+    feature_ids = np.arange(n_features, dtype=np.int64)
+    feature_names = [names.get(feature, "feature {name}".format(
+        name=feature)) for feature in feature_ids.tolist()]
+
+    return {
+        "feature": feature_ids,
+        "name": np.array(feature_names, dtype=object),
+        "n_splits": n_splits.astype(np.int64),
+        "n_trees": n_trees.astype(np.int64),
+        "n_node_samples": total_samples.astype(np.int64),
+        "sample_usage": total_samples / float(max(n_root_samples, 1)),
+        "thresholds": sorted_thresholds,
+    }
+
+
+def get_decision_info(model, data, precision=3, names=None,
+                      label_index=None, tab_size=5, filepath_or_buffer=None,
+                      n_jobs=None, profiler=None, estimators=None,
+                      compiled=False):
+    """
+    Get the decision process for a tree on a piece of data.
+
+    Parameters
+    ----------
+    model : sklearn.ensemble.forest.BaseForest or
+            sklearn.tree.tree.BaseDecisionTree
+        The tree-based model that we are to analyze. Can be an individual
+        estimator (e.g. DecisionTreeClassifier) or an ensemble model
+        (e.g. RandomForestRegressor).
+    data : np.ndarray
+        A 2-D array compromising ONE piece of input data.
+    precision : int or None, default 3
+        The decimal precision with which we display our cutoffs and leaf
+        scores. If None is passed in, no rounding is performed.
+    names : dict, default None
+        A mapping from feature indices to string names. By default, when we
+        display the non-leaf node forks, we write something like "Feature {i}
+        Score <= {cutoff}," where "i" is an integer. If names are provided,
+        we will map "i" to a particular string name and write instead,
+        "{feature-name} <= {cutoff}."
+    label_index : int, default None
+        Whether we want to display the leaf score for a particular output (e.g.
+        classification). If an integer is provided, we will index into the
+        scores array at each leaf and only display that score. Otherwise, the
+        entire scores array will be displayed. Note that labels are 0-indexed.
+    tab_size : int, default 5
+        The amount of tabbing to be used when displaying indented lines.
+    filepath_or_buffer : str or file handle, default None
+        The file or buffer to which to write the output. If none is provided,
+        we return the string output as given.
+    n_jobs : int, default None
+        The number of threads over which to spread the estimators of an
+        ensemble model. None means 1, and -1 means using all processors.
+        The output is the same regardless of the number of threads.
+    profiler : Profiler, default None
+        A profiler with which to record the time spent in each stage
+        of the call for each estimator. See `Profiler` for the stages.
+    estimators : int, slice, array-like of int or bool, default None
+        The indices of the estimators of an ensemble model to decode, a
+        slice of them, or a boolean mask over them. The other estimators
+        are not touched, and the selected ones keep their original index
+        in the output. If None is provided, all estimators are decoded.
+    compiled : bool, default False
+        Whether to explain the row with Python functions generated from the
+        trees, which follow their decisions with nested if/else statements
+        and have the lines of the output prebuilt. The function of a tree
+        is compiled on first use and kept for as long as the tree exists, so
+        that later calls with the same options are much faster. Trees that
+        are too deep to compile are explained as usual. The output is the
+        same either way.
+
+    Returns
+    -------
+    output_or_nothing : If a filepath or buffer was provided, nothing is
+                        returned. Otherwise, the string output is returned.
+
+    Raises
+    ------
+    NotImplementedError : the model is not supported or has a prediction
+                          method that could not be recognized.
+    IndexError : the label index provided was out of bounds on the array of
+                 output scores provided at each node, or the estimators
+                 selected were out of bounds.
+    NotFittedError : the model was not properly fitted yet.
+    """
+
+    explanations = iter_decision_info(model, data[:1], precision=precision,
+                                      names=names, label_index=label_index,
+                                      tab_size=tab_size, n_jobs=n_jobs,
+                                      profiler=profiler,
+                                      estimators=estimators,
+                                      compiled=compiled)
+    output = next(explanations)
+
+    utils.write_to_buf(output, filepath_or_buffer, profiler=profiler)
+    return output if filepath_or_buffer is None else None
+
+
+def iter_decision_info(model, data, precision=3, names=None,
+                       label_index=None, tab_size=5, chunk_size=None,
+                       n_jobs=None, profiler=None, estimators=None,
+                       compiled=False):
+    """
+    Generate the decision process for a tree on each row of a batch of data.
+
+    Each estimator decides on all of the rows of a chunk at once, instead
+    of once for each row as would happen when calling `get_decision_info`
+    on every row separately.
+
+    Parameters
+    ----------
+    model : sklearn.ensemble.forest.BaseForest or
+            sklearn.tree.tree.BaseDecisionTree
+        The tree-based model that we are to analyze.
+    data : np.ndarray
+        A 2-D array of shape (n_rows, n_features) of input data.
+    precision : int or None, default 3
+        The decimal precision with which we display our cutoffs and leaf
+        scores. If None is passed in, no rounding is performed.
+    names : dict, default None
+        A mapping from feature indices to string names.
+    label_index : int, default None
+        Whether we want to display the leaf score for a particular output.
+    tab_size : int, default 5
+        The amount of tabbing to be used when displaying indented lines.
+    chunk_size : int, default None
+        The number of rows for which the estimators decide at once. Larger
+        chunks require more memory. If None is provided, all of the rows
+        are processed as a single chunk.
+    n_jobs : int, default None
+        The number of threads over which to spread the estimators of an
+        ensemble model. None means 1, and -1 means using all processors.
+        The output is the same regardless of the number of threads.
+    profiler : Profiler, default None
+        A profiler with which to record the time spent in each stage
+        of the call for each estimator. See `Profiler` for the stages.
+    estimators : int, slice, array-like of int or bool, default None
+        The indices of the estimators of an ensemble model to decode, a
+        slice of them, or a boolean mask over them.
+    compiled : bool, default False
+        Whether to explain chunks of a single row with Python functions
+        compiled from the trees. See `get_decision_info`.
+
+    Returns
+    -------
+    explanations : generator
+        A generator of the output of `get_decision_info`, one for each row
+        of the input data and in the same order.
+
+    Raises
+    ------
+    NotImplementedError : the model is not supported or has a prediction
+                          method that could not be recognized.
+    IndexError : the label index provided was out of bounds on the array of
+                 output scores provided at each node, or the estimators
+                 selected were out of bounds.
+    NotFittedError : the model was not properly fitted yet.
+    """
+
+    utils.check_model_type(model)
+    utils.check_is_fitted(model)
+
+    predict_method = _get_predict_method(model)
+
+    items = utils.select_estimators(utils.get_estimators(model), estimators)
+    return _iter_decision_info(items, data, predict_method,
+                               precision=precision, names=names or {},
+                               label_index=label_index, tab_size=tab_size,
+                               chunk_size=chunk_size,
+                               n_jobs=utils.get_n_jobs(n_jobs),
+                               profiler=profiler, compiled=compiled)
+
+
+def _get_predict_method(model):
+    """
+    Get the name of the method with which a model scores its input.
+
+    Raises
+    ------
+    NotImplementedError : the model has no prediction method that we
+                          could recognize.
+    """
+
+    predict_methods = ("predict_proba", "predict")
+
+    for possible_method in predict_methods:
+        if hasattr(model, possible_method):
+            return possible_method
+
+    klass = type(model).__name__
+    msg = "{klass} has an unrecognizable predict method"
+    raise NotImplementedError(msg.format(klass=klass))
+
+
+def _iter_decision_info(items, data, predict_method, precision, names,
+                        label_index, tab_size, chunk_size, n_jobs, profiler,
+                        compiled):
+    """
+    Generate the explanations of `iter_decision_info` for validated input.
+    """
+
+    n_rows = data.shape[0]
+    chunk_size = chunk_size or max(n_rows, 1)
+    print_tab = utils.get_tab(size=tab_size)
+
+    # Always decide on at least one chunk, so that empty
+    # input is reported by the estimators and not ignored.
+    for start in range(0, max(n_rows, 1), chunk_size):
+        chunk = data[start:start + chunk_size]
+
+        # A single row is checked once and then followed down each
+        # tree directly, instead of validating it for every estimator.
+        if chunk.shape[0] == 1:
+            n_features = items[0][1].tree_.n_features
+
+            with profiling.stage(profiler, "check_input"):
+                checked_row = utils.check_input(chunk, n_features)[0]
+        else:
+            checked_row = None
+
+        # Compiled trees take the values of the row as lists, which are
+        # much faster to index into than arrays.
+        if compiled and checked_row is not None and isinstance(chunk,
+                                                               np.ndarray):
+            row_values = (checked_row.tolist(), chunk[0].tolist())
+        else:
+            row_values = None
+
+        # The same features are visited by many of the trees,
+        # so each of their values only needs to be formatted once.
+        feature_scores = [utils.LazyTable(partial(_format_feature_score,
+                                                  chunk, row, precision))
+                          for row in range(chunk.shape[0])]
+
+        explain = partial(_explain_estimator, data=chunk, row=checked_row,
+                          row_values=row_values,
+                          feature_scores=feature_scores,
+                          predict_method=predict_method, precision=precision,
+                          names=names, label_index=label_index,
+                          print_tab=print_tab, profiler=profiler)
+        explanations = list(utils.map_estimators(
+            explain, items, n_jobs=n_jobs))
+
+        for row in range(chunk.shape[0]):
+            yield "".join(rows[row] for rows in explanations)
+
+
+def _explain_estimator(item, data, row, row_values, feature_scores,
+                       predict_method, precision, names, label_index,
+                       print_tab, profiler):
+    """
+    Get the output of `iter_decision_info` for a single estimator.
+
+    Parameters
+    ----------
+    item : tuple
+        The index of the estimator in the model and the estimator itself.
+
+    Returns
+    -------
+    explanations : list
+        The decision path of the estimator for each row of the data.
+    """
+
+    index, estimator = item
+
+    if row_values is not None:
+        explain = _get_compiled_explainer(item, predict_method, precision,
+                                          names, label_index, print_tab)
+
+        if explain is not None:
+            with profiling.stage(profiler, "render", index) as render:
+                output = explain(row_values[0], row_values[1],
+                                 feature_scores[0])
+                render.chars = len(output)
+
+            return [output]
+
+    with profiling.stage(profiler, "decision_path", index) as decision_path:
+        indptr, indices = _get_decision_paths(estimator, data, row)
+        decision_path.nodes = indices.shape[0]
+
+    return _explain_paths(item, data, indptr, indices, feature_scores,
+                          predict_method, precision, names, label_index,
+                          print_tab, profiler)
+
+
+def _explain_paths(item, data, indptr, indices, feature_scores,
+                   predict_method, precision, names, label_index,
+                   print_tab, profiler):
+    """
+    Get the output of `iter_decision_info` from the decision paths of a
+    single estimator, as returned by `_get_decision_paths`.
+    """
+
+    index, estimator = item
+
+    # The leaf is the last node on each of the paths.
+    leaf_ids = indices[indptr[1:] - 1]
+
+    tree = estimator.tree_
+    features = tree.feature
+    thresholds = tree.threshold
+
+    # Unlike for `iter_tree_info`, only the nodes on the decision paths
+    # are formatted, so the strings are few enough to keep across calls.
+    state = utils.get_tree_state(estimator)
+    cutoffs = state.get_table("decision_thresholds", precision,
+                              partial(_lazy_thresholds, tree, precision))
+
+    with profiling.stage(profiler, "scores", index):
+        scores = _get_leaf_scores(state, estimator, index, leaf_ids,
+                                  predict_method, precision, label_index)
+
+    with profiling.stage(profiler, "render", index) as render:
+        explanations = _render_explanations(
+            index, data, indptr, indices, leaf_ids, features, thresholds,
+            cutoffs, scores, feature_scores, names, print_tab)
+
+        if profiler is not None:
+            render.chars = sum(len(output) for output in explanations)
+
+    return explanations
+
+
+def _get_compiled_explainer(item, predict_method, precision, names,
+                            label_index, print_tab):
+    """
+    Get the function compiled from an estimator by `codegen` to explain
+    single rows for `iter_decision_info`.
+
+    The function is compiled once for each set of options, and kept for
+    the lifetime of the estimator (for the most recent options only).
+
+    Returns
+    -------
+    explain : callable or None
+        The compiled function, or None if the tree is too deep to compile.
+    """
+
+    index, estimator = item
+    tree = estimator.tree_
+
+    key = (index, predict_method, precision, frozenset(names.items()),
+           label_index, print_tab)
+
+    try:
+        cached = _compiled_explainers.get(estimator)
+    except TypeError:
+        cached = None
+
+    # The tree of an estimator is replaced when it is refitted.
+    if cached is not None and cached[0] is tree and cached[1] == key:
+        return cached[2]
+
+    state = utils.get_tree_state(estimator)
+    n_nodes = tree.node_count
+
+    if state.topology[0].max() > codegen.MAX_DEPTH:
+        _keep_explainer(estimator, tree, key, None)
+        return None
+
+    is_leaves = state.topology[1]
+    leaf_ids = np.flatnonzero(is_leaves)
+
+    # The scores end up in the lines of the compiled function, so they
+    # are not also kept in the state of the tree.
+    scores = _get_leaf_scores(None, estimator, index, leaf_ids,
+                              predict_method, precision, label_index)
+    leaf_lines = {}
+    node_lines = {}
+
+    for node_id in range(n_nodes):
+        if is_leaves[node_id]:
+            leaf_lines[node_id] = (
+                "{tab}Decision ID Node {node_id} : Scores = {scores}\n"
+                .format(tab=print_tab, node_id=node_id,
+                        scores=scores[node_id]))
+            continue
+
+        feature = tree.feature[node_id]
+
+        default = "Feature {name} Score".format(name=feature)
+        name = names.get(feature, default)
+
+        cutoff = str(utils.maybe_round(tree.threshold[node_id],
+                                       precision=precision))
+        node_lines[node_id] = (
+            "{tab}Decision ID Node {node_id} : {name} = ".format(
+                tab=print_tab, node_id=node_id, name=name),
+            " <= {cutoff}\n".format(cutoff=cutoff),
+            " > {cutoff}\n".format(cutoff=cutoff))
+
+    header = "\nDecision Path for Tree {ind}:\n".format(ind=index)
+    explain = codegen.compile_explainer(tree, node_lines, leaf_lines, header)
+
+    _keep_explainer(estimator, tree, key, explain)
+    return explain
+
+
+def _keep_explainer(estimator, tree, key, explain):
+    try:
+        _compiled_explainers[estimator] = (tree, key, explain)
+    except TypeError:
+        # Estimators that don't allow a weak reference are not kept.
+        pass
+
+
+def _render_explanations(index, data, indptr, indices, leaf_ids, features,
+                         thresholds, cutoffs, scores, feature_scores,
+                         names, print_tab):
+    """
+    Render the decision paths of an estimator for `iter_decision_info`.
+    """
+
+    explanations = []
+
+    for row in range(data.shape[0]):
+        leaf_id = leaf_ids[row]
+        node_index = indices[indptr[row]:indptr[row + 1]]
+
+        output = "\nDecision Path for Tree {ind}:\n".format(ind=index)
+
+        for node_id in node_index:
+            output += print_tab
+
+            if leaf_id != node_id:
+                feature = features[node_id]
+                feature_score = data[row, feature]
+
+                default = "Feature {name} Score".format(name=feature)
+                name = names.get(feature, default)
+
+                if feature_score <= thresholds[node_id]:
+                    threshold_sign = "<="
+                else:
+                    threshold_sign = ">"
 
                 output += ("Decision ID Node {node_id} : {name} = "
                            "{score} {sign} {threshold}\n".format(
-                            node_id=node_id, score=feature_score, name=name,
-                            sign=threshold_sign, threshold=feature_threshold))
+                            node_id=node_id, name=name,
+                            score=feature_scores[row][feature],
+                            sign=threshold_sign, threshold=cutoffs[node_id]))
             else:
                 output += ("Decision ID Node {node_id} : "
-                           "Scores = {scores}\n".format(node_id=node_id,
-                                                        scores=probs))
+                           "Scores = {scores}\n".format(
+                            node_id=node_id, scores=scores[leaf_id]))
+
+        explanations.append(output)
+
+    return explanations
+
+
+def _format_feature_score(data, row, precision, feature):
+    """
+    Format the value of a feature in a row of data for `iter_decision_info`.
+    """
+
+    feature_score = utils.maybe_round(data[row, feature], precision=precision)
+    return "{}".format(feature_score)
+
+
+def _lazy_thresholds(tree, precision):
+    """
+    Create a table of the decision thresholds of a tree, formatted on demand.
+
+    Explaining a decision only visits a few nodes of the tree, so unlike
+    for `iter_tree_info`, we don't format all of the thresholds at once.
+    """
+
+    def format_threshold(node_id):
+        threshold = utils.maybe_round(tree.threshold[node_id],
+                                      precision=precision)
+        return str(threshold)
+
+    return utils.LazyTable(format_threshold)
+
+
+def _get_leaf_scores(state, estimator, index, leaf_ids,
+                     predict_method, precision, label_index):
+    """
+    Get the formatted scores of the leaves reached by `iter_decision_info`.
+
+    The scores of each leaf are formatted once and kept in the state of
+    the tree (if one is provided), and the scores of all leaves missing
+    from it are computed together.
+
+    Returns
+    -------
+    scores : dict
+        A mapping from leaf IDs to formatted scores, containing
+        (at least) all of the leaves that were provided.
+    """
+
+    if state is None:
+        scores = {}
+    else:
+        key = (predict_method, precision, label_index)
+        scores = state.get_table("decision_scores", key, dict)
+
+    missing = [leaf_id for leaf_id in set(leaf_ids.tolist())
+               if leaf_id not in scores]
+
+    if missing:
+        predictions = utils.predict_from_leaves(estimator, np.array(missing),
+                                                predict_method)
+
+        for row, leaf_id in enumerate(missing):
+            probs = _get_scores(predictions, row, index, label_index)
+            probs = utils.maybe_round(probs, precision=precision)
+
+            scores[leaf_id] = str(probs)
+
+    return scores
+
+
+def _get_decision_paths(estimator, data, row=None):
+    """
+    Get the decision paths of an estimator on a chunk of data.
+
+    Parameters
+    ----------
+    estimator : sklearn.tree.tree.BaseDecisionTree
+        The estimator whose decision paths we are extracting.
+    data : np.ndarray
+        A 2-D array of input data.
+    row : numpy.ndarray, default None
+        If the chunk consists of a single row, that row as converted by
+        `utils.check_input`. It is then followed down the tree directly,
+        which avoids the overhead of the estimator's `decision_path` method.
+
+    Returns
+    -------
+    indptr : numpy.ndarray
+        The offsets into `indices` at which the path of each row starts,
+        with a final entry for where the last path ends.
+    indices : numpy.ndarray
+        The concatenated node IDs of the decision paths.
+    """
+
+    if row is not None:
+        indices = np.array(utils.get_decision_path(estimator.tree_, row))
+        indptr = np.array([0, len(indices)])
+
+        return indptr, indices
+
+    node_indicator = estimator.decision_path(data)
+    return node_indicator.indptr, node_indicator.indices
+
+
+def _get_scores(predictions, row, index, label_index):
+    """
+    Extract the output scores of an estimator for a row of a batch.
+
+    Parameters
+    ----------
+    predictions : numpy.ndarray or list
+        The output of the estimator's prediction method on the batch.
+        Multi-output classifiers provide a list of arrays, one per output.
+    row : int
+        The row of the batch whose scores we are extracting.
+    index : int
+        The index of the estimator in the model, used for error messages.
+    label_index : int or None
+        The output to which to restrict the scores, if any.
+
+    Returns
+    -------
+    scores : numpy.ndarray or numeric
+        The scores of the row, matching those that the prediction method
+        would have provided for that row on its own.
+
+    Raises
+    ------
+    IndexError : the label index provided was out of bounds on the array of
+                 output scores.
+    """
+
+    if isinstance(predictions, list):
+        probs = predictions[0][row:row + 1]
+    else:
+        probs = np.atleast_1d(predictions[row])
+
+    if label_index is not None:
+        try:
+            probs = probs[label_index]
+        except IndexError:
+            msg = ("Index {label_index} is out of bounds on "
+                   "decision tree {ind} with {n} possible outputs")
+            prob_counts = probs.shape[0]
+
+            raise IndexError(msg.format(n=prob_counts, ind=index,
+                                        label_index=label_index))
+
+    return probs
+
+
+def get_decision_paths(model, data, chunk_size=None, estimators=None,
+                       n_jobs=None):
+    """
+    Get the decision paths of the tree(s) on a batch of data, compactly.
+
+    The paths of all of the rows through all of the trees are stored in a
+    single sparse structure, along with the value of the feature decided
+    on at each node. This takes a few bytes per node visited, instead of
+    the kilobytes per row of the output of `iter_decision_info`, and the
+    explanation of any row can be rebuilt from it with `get_path_info`.
+
+    Parameters
+    ----------
+    model : sklearn.ensemble.forest.BaseForest or
+            sklearn.tree.tree.BaseDecisionTree
+        The tree-based model that we are to analyze.
+    data : np.ndarray
+        A 2-D array of shape (n_rows, n_features) of input data.
+    chunk_size : int, default None
+        The number of rows for which the estimators decide at once. Larger
+        chunks require more (temporary) memory. If None is provided, all
+        of the rows are processed as a single chunk.
+    estimators : int, slice, array-like of int or bool, default None
+        The indices of the estimators of an ensemble model to follow, a
+        slice of them, or a boolean mask over them.
+    n_jobs : int, default None
+        The number of threads over which to spread the estimators of an
+        ensemble model. None means 1, and -1 means using all processors.
+
+    Returns
+    -------
+    decision_paths : paths.DecisionPaths
+        The decision paths of the rows, which can be saved to a file with
+        its `save` method and loaded back with `load_decision_paths`.
+
+    Raises
+    ------
+    NotImplementedError : the model is not supported for extracting info.
+    ValueError : the input data is not a 2-D array of finite values, or it
+                 does not have the number of features of the model.
+    NotFittedError : the model was not properly fitted yet.
+    """
+
+    utils.check_model_type(model)
+    utils.check_is_fitted(model)
+
+    items = utils.select_estimators(utils.get_estimators(model), estimators)
+    n_features = items[0][1].tree_.n_features
+
+    node_counts = [estimator.tree_.node_count for _, estimator in items]
+    tree_offsets = np.cumsum([0] + node_counts).astype(np.int64)
+    index_dtype = paths.get_index_dtype(tree_offsets[-1])
+
+    n_rows = data.shape[0]
+    chunk_size = chunk_size or max(n_rows, 1)
+
+    row_lengths = [np.zeros(0, dtype=np.int64)]
+    indices = []
+    values = []
+
+    for start in range(0, n_rows, chunk_size):
+        chunk = utils.check_input(data[start:start + chunk_size], n_features)
+        tree_paths = list(utils.map_estimators(
+            partial(_get_path_values, data=chunk), items, n_jobs=n_jobs))
+
+        # The paths of each row are grouped by tree, so the entries of
+        # each tree are scattered to their position within each row.
+        lengths = np.column_stack([np.diff(indptr)
+                                   for indptr, _, _ in tree_paths])
+        ends = np.cumsum(lengths.ravel()).reshape(lengths.shape)
+        starts = ends - lengths
+
+        n_entries = ends[-1, -1]
+        chunk_indices = np.empty(n_entries, dtype=index_dtype)
+        chunk_values = np.empty(n_entries, dtype=np.float32)
+
+        for position, (indptr, node_ids, node_values) in enumerate(
+                tree_paths):
+            offsets = np.repeat(starts[:, position] - indptr[:-1],
+                                lengths[:, position])
+            targets = offsets + np.arange(node_ids.shape[0])
+
+            chunk_indices[targets] = node_ids + tree_offsets[position]
+            chunk_values[targets] = node_values
+
+        row_lengths.append(lengths.sum(axis=1))
+        indices.append(chunk_indices)
+        values.append(chunk_values)
+
+    indptr = np.concatenate([[0], np.cumsum(np.concatenate(row_lengths))])
+
+    return paths.DecisionPaths(
+        indptr=indptr.astype(np.int64),
+        indices=np.concatenate(indices or [np.zeros(0, dtype=index_dtype)]),
+        values=np.concatenate(values or [np.zeros(0, dtype=np.float32)]),
+        tree_offsets=tree_offsets,
+        estimators=np.array([index for index, _ in items], dtype=np.int64))
+
+
+def _get_path_values(item, data):
+    """
+    Get the decision paths of an estimator for `get_decision_paths`.
+
+    Returns
+    -------
+    indptr : numpy.ndarray
+        The offsets into `indices` at which the path of each row starts.
+    indices : numpy.ndarray
+        The concatenated node IDs of the decision paths.
+    values : numpy.ndarray
+        The value of the feature decided on at each node, or NaN at leaves.
+    """
+
+    _, estimator = item
+
+    indptr, indices = _get_decision_paths(estimator, data)
+    features = estimator.tree_.feature[indices]
+
+    # Leaves have a negative placeholder as their feature.
+    is_leaves = features < 0
+    rows = np.repeat(np.arange(data.shape[0]), np.diff(indptr))
+
+    values = data[rows, np.where(is_leaves, 0, features)]
+    values = np.where(is_leaves, np.nan, values).astype(np.float32)
+
+    return indptr, indices, values
+
+
+def get_path_info(model, decision_paths, row, precision=3, names=None,
+                  label_index=None, tab_size=5, filepath_or_buffer=None):
+    """
+    Rebuild the decision process for a row from its stored decision paths.
+
+    The output is that of `get_decision_info` for the row and the trees of
+    `get_decision_paths`, except that the values of the features are those
+    that the trees saw, i.e. after conversion to float32. Only the entries
+    of that row are read, so this is cheap even for paths loaded back from
+    a file of millions of rows.
+
+    Parameters
+    ----------
+    model : sklearn.ensemble.forest.BaseForest or
+            sklearn.tree.tree.BaseDecisionTree
+        The tree-based model with which the decision paths were computed.
+    decision_paths : paths.DecisionPaths
+        The decision paths, as returned by `get_decision_paths` or loaded
+        with `load_decision_paths`.
+    row : int
+        The row whose decision process to rebuild.
+    precision : int or None, default 3
+        The decimal precision with which we display our cutoffs and leaf
+        scores. If None is passed in, no rounding is performed.
+    names : dict, default None
+        A mapping from feature indices to string names.
+    label_index : int, default None
+        Whether we want to display the leaf score for a particular output.
+    tab_size : int, default 5
+        The amount of tabbing to be used when displaying indented lines.
+    filepath_or_buffer : str or file handle, default None
+        The file or buffer to which to write the output. If none is provided,
+        we return the string output as given.
+
+    Returns
+    -------
+    output_or_nothing : If a filepath or buffer was provided, nothing is
+                        returned. Otherwise, the string output is returned.
+
+    Raises
+    ------
+    NotImplementedError : the model is not supported or has a prediction
+                          method that could not be recognized.
+    ValueError : the decision paths were not computed with the model.
+    IndexError : the row was out of bounds on the decision paths, or the
+                 label index provided was out of bounds on the array of
+                 output scores provided at each node.
+    NotFittedError : the model was not properly fitted yet.
+    """
+
+    utils.check_model_type(model)
+    utils.check_is_fitted(model)
+
+    predict_method = _get_predict_method(model)
+    estimators = utils.get_estimators(model)
+
+    node_counts = np.diff(decision_paths.tree_offsets)
+    indices = decision_paths.estimators
+
+    if (indices.shape[0] == 0 or indices.max() >= len(estimators) or
+            any(estimators[index].tree_.node_count != node_count
+                for index, node_count in zip(indices.tolist(),
+                                             node_counts.tolist()))):
+        raise ValueError("The decision paths were not "
+                         "computed with this model")
+
+    n_features = estimators[0].tree_.n_features
+    tree_paths = decision_paths.get_row(row)
+
+    # Rebuild the values of the row that the trees decided on.
+    data = np.full((1, n_features), np.nan)
+
+    for index, node_ids, values in tree_paths:
+        features = estimators[index].tree_.feature[node_ids]
+        is_splits = features >= 0
+
+        data[0, features[is_splits]] = values[is_splits]
+
+    print_tab = utils.get_tab(size=tab_size)
+    feature_scores = [utils.LazyTable(partial(_format_feature_score,
+                                              data, 0, precision))]
+    output = ""
+
+    for index, node_ids, _ in tree_paths:
+        indptr = np.array([0, node_ids.shape[0]])
+        output += _explain_paths((index, estimators[index]), data, indptr,
+                                 node_ids, feature_scores, predict_method,
+                                 precision, names or {}, label_index,
+                                 print_tab, None)[0]
 
     utils.write_to_buf(output, filepath_or_buffer)
     return output if filepath_or_buffer is None else None
+
+
+def get_contributions(model, data, chunk_size=None, estimators=None,
+                      n_jobs=None):
+    """
+    Decompose the predictions of the tree(s) into per-feature contributions.
+
+    Along the decision path of a row, each decision moves the scores from
+    those of the parent node to those of the child node. That change is
+    attributed to the feature of the decision, so that the prediction of
+    each row is the scores at the root (the bias) plus the contribution of
+    each feature. For ensemble models, all of these are averaged across
+    the estimators, like the predictions themselves.
+
+    The changes across every decision of a tree are computed once and kept
+    in the state of the tree, and they are summed per feature for all rows
+    of a chunk at once.
+
+    Parameters
+    ----------
+    model : sklearn.ensemble.forest.BaseForest or
+            sklearn.tree.tree.BaseDecisionTree
+        The tree-based model that we are to analyze.
+    data : np.ndarray
+        A 2-D array of shape (n_rows, n_features) of input data.
+    chunk_size : int, default None
+        The number of rows for which the estimators decide at once. Larger
+        chunks require more memory. If None is provided, all of the rows
+        are processed as a single chunk.
+    estimators : int, slice, array-like of int or bool, default None
+        The indices of the estimators of an ensemble model to average over,
+        a slice of them, or a boolean mask over them.
+    n_jobs : int, default None
+        The number of threads over which to spread the estimators of an
+        ensemble model. None means 1, and -1 means using all processors.
+
+    Returns
+    -------
+    decomposition : dict
+        A mapping from names to arrays, where the scores are probabilities
+        for classifiers (as with `predict_proba`) and the predicted values
+        for regressors, with shape (n_outputs, max_n_classes):
+
+        * "prediction" : the scores of each row, of shape
+                         (n_rows, n_outputs, max_n_classes).
+        * "bias" : the scores at the root(s), of the same shape.
+        * "contributions" : the contribution of each feature to the scores
+                            of each row, of shape
+                            (n_rows, n_features, n_outputs, max_n_classes).
+
+        The prediction is the bias plus the contributions summed over the
+        features, up to rounding error.
+
+    Raises
+    ------
+    NotImplementedError : the model is not supported or has a prediction
+                          method that could not be recognized.
+    ValueError : the input data is not a 2-D array of finite values, or it
+                 does not have the number of features of the model.
+    NotFittedError : the model was not properly fitted yet.
+    """
+
+    utils.check_model_type(model)
+    utils.check_is_fitted(model)
+
+    classifier = _get_predict_method(model) == "predict_proba"
+
+    items = utils.select_estimators(utils.get_estimators(model), estimators)
+    first = items[0][1].tree_
+
+    n_features = first.n_features
+    value_shape = first.value.shape[1:]
+    n_values = int(np.prod(value_shape))
+
+    n_rows = data.shape[0]
+    chunk_size = chunk_size or max(n_rows, 1)
+
+    prediction = np.zeros((n_rows, n_values))
+    contributions = np.zeros((n_rows, n_features, n_values))
+    bias = np.zeros(n_values)
+
+    for _, estimator in items:
+        node_values, _, _ = _get_value_deltas(estimator, classifier)
+        bias += node_values[0]
+
+    for start in range(0, n_rows, chunk_size):
+        stop = min(start + chunk_size, n_rows)
+        chunk = utils.check_input(data[start:stop], n_features)
+
+        decompose = partial(_decompose_estimator, data=chunk,
+                            classifier=classifier)
+
+        for leaf_values, tree_contributions in utils.map_estimators(
+                decompose, items, n_jobs=n_jobs):
+            prediction[start:stop] += leaf_values
+            contributions[start:stop] += tree_contributions
+
+    n_trees = float(len(items))
+
+    return {
+        "prediction": (prediction / n_trees).reshape(
+            (n_rows,) + value_shape),
+        "bias": np.tile(bias / n_trees, (n_rows, 1)).reshape(
+            (n_rows,) + value_shape),
+        "contributions": (contributions / n_trees).reshape(
+            (n_rows, n_features) + value_shape),
+    }
+
+
+def _get_value_deltas(estimator, classifier):
+    """
+    Get the scores of the nodes of an estimator for `get_contributions`,
+    along with how much the decision above each node changes them.
+
+    The arrays are computed once and kept in the state of the tree.
+
+    Returns
+    -------
+    node_values : numpy.ndarray
+        The scores of each node, flattened to shape (n_nodes, n_values).
+    deltas : numpy.ndarray
+        The scores of each node minus those of its parent.
+    parent_features : numpy.ndarray
+        The feature of the decision that leads to each node, or -1.
+    """
+
+    def compute_deltas():
+        tree = estimator.tree_
+        n_nodes = tree.node_count
+
+        # Classifiers predict the normalized class counts at the leaves.
+        if classifier:
+            node_values = state.normalized_values
+        else:
+            node_values = np.asarray(tree.value, dtype=np.float64)
+
+        node_values = node_values[:n_nodes].reshape(n_nodes, -1)
+        deltas, parent_features = utils.get_value_deltas(
+            tree.children_left[:n_nodes], tree.children_right[:n_nodes],
+            tree.feature[:n_nodes], node_values)
+
+        return node_values, deltas, parent_features
+
+    state = utils.get_tree_state(estimator)
+    return state.get_table("contributions", classifier, compute_deltas)
+
+
+def _decompose_estimator(item, data, classifier):
+    """
+    Decompose the scores of an estimator on a chunk for `get_contributions`.
+
+    Returns
+    -------
+    leaf_values : numpy.ndarray
+        The scores of each row, of shape (n_rows, n_values).
+    contributions : numpy.ndarray
+        The contribution of each feature to the scores of each row, of
+        shape (n_rows, n_features, n_values).
+    """
+
+    _, estimator = item
+    node_values, deltas, parent_features = _get_value_deltas(estimator,
+                                                             classifier)
+
+    indptr, indices = _get_decision_paths(estimator, data)
+    n_rows, n_features = data.shape
+
+    # The leaf is the last node on each of the paths.
+    leaf_values = node_values[indices[indptr[1:] - 1]]
+
+    # The root is on every path, but no decision leads to it.
+    rows = np.repeat(np.arange(n_rows), np.diff(indptr))
+    features = parent_features[indices]
+
+    is_decided = features >= 0
+    node_ids = indices[is_decided]
+
+    bins = rows[is_decided] * n_features + features[is_decided]
+    n_bins = n_rows * n_features
+
+    contributions = np.empty((n_bins, node_values.shape[1]))
+
+    for column in range(node_values.shape[1]):
+        contributions[:, column] = np.bincount(
+            bins, weights=deltas[node_ids, column], minlength=n_bins)
+
+    return leaf_values, contributions.reshape(n_rows, n_features, -1)
+
+
+def get_cache_info():
+    """
+    Get the statistics of the cache of state derived from trees.
+
+    State such as the depth of each node is computed once per estimator
+    and reused across calls, until the estimator is refitted or
+    garbage-collected, or is evicted to keep the cache within the size
+    set by `set_cache_size` (or the number of estimators of the forests
+    that are alive, if that is larger).
+
+    Returns
+    -------
+    cache_info : utils.CacheInfo
+        A named tuple of the number of hits and misses, the maximum size,
+        and the current size of the cache.
+    """
+
+    return utils.tree_cache.info()
+
+
+def set_cache_size(maxsize):
+    """
+    Set the maximum number of estimators whose state is cached.
+
+    The cache is least-recently-used, but it always has room for the
+    estimators of every forest that is still alive, so this only bounds
+    how many other estimators are kept, e.g. those of models that were
+    decoded earlier.
+
+    Parameters
+    ----------
+    maxsize : int or None
+        The maximum number of estimators, which is 128 by default. If None
+        is provided, the cache can grow without bound, and if 0 is provided,
+        nothing is cached.
+
+    Raises
+    ------
+    ValueError : the maximum size provided was negative.
+    """
+
+    if maxsize is not None and maxsize < 0:
+        msg = "maxsize must be non-negative, got {maxsize}"
+        raise ValueError(msg.format(maxsize=maxsize))
+
+    utils.tree_cache.resize(maxsize)
+
+
+def clear_cache():
+    """
+    Clear the cache of state derived from trees and reset its statistics.
+
+    This also drops the functions compiled by `get_decision_info` with
+    `compiled=True`, which are otherwise kept for as long as their trees.
+    """
+
+    utils.tree_cache.clear()
+    _compiled_explainers.clear()
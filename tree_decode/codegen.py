@@ -0,0 +1,105 @@
+"""
+Compilation of trees into specialized Python functions.
+
+Explaining a single row with `get_decision_info` looks up the decision of
+every node on its path in the arrays of the tree, and formats the lines of
+the explanation as it goes. For a tree that is explained over and over
+again, we can instead generate a function of nested if/else statements
+that follows the decisions of the tree directly, with the (formatted)
+lines of the explanation inlined as string constants.
+
+The generated code nests one level deeper for each level of the tree, so
+only trees up to `MAX_DEPTH` deep are compiled.
+"""
+
+__all__ = ["MAX_DEPTH", "compile_explainer"]
+
+# The maximum depth of a tree that we compile. Python
+# limits how deeply the blocks of a function can be nested.
+MAX_DEPTH = 50
+
+# The indentation of the generated code.
+_INDENT = "    "
+
+
+def compile_explainer(tree, node_lines, leaf_lines, header):
+    """
+    Compile a tree into a function that explains the decisions on a row.
+
+    Parameters
+    ----------
+    tree : sklearn.tree._tree.Tree or export.TreeArrays
+        The underlying tree structure of a fitted estimator.
+    node_lines : dict
+        A mapping from the ID of each decision node to the parts of its
+        line in the explanation: the part before the value of the feature,
+        and the parts after it when the value is at most (resp. above)
+        the threshold.
+    leaf_lines : dict
+        A mapping from the ID of each leaf to its line in the explanation.
+    header : str
+        The start of the explanation, before the line of the root.
+
+    Returns
+    -------
+    explain : callable or None
+        A function `explain(row, values, scores)` that returns the
+        explanation of a row, where `row` is the sequence of values of the
+        row as converted by `utils.check_input`, which decide the path,
+        `values` the sequence of its original values, which decide the
+        signs that are displayed, and `scores` the mapping from features to
+        the formatted values. None is returned if the tree is too deep.
+    """
+
+    lines = ["def explain(row, values, scores):",
+             _INDENT + "out = [{header!r}]".format(header=header)]
+
+    # Each node is visited along with the indentation of its block. Nodes
+    # are visited depth-first, with the left child first, which is the
+    # order in which the branches of the if/else statements are written.
+    # A node of None marks the "else" between the branches of a node.
+    stack = [(0, 0)]
+
+    while stack:
+        node_id, depth = stack.pop()
+
+        if depth > MAX_DEPTH:
+            return None
+
+        indent = _INDENT * (depth + 1)
+
+        if node_id is None:
+            lines.append(indent + "else:")
+            continue
+
+        left = tree.children_left[node_id]
+        right = tree.children_right[node_id]
+
+        if left == right:
+            lines.append(indent + "out.append({line!r})".format(
+                line=leaf_lines[node_id]))
+            lines.append(indent + "return ''.join(out)")
+            continue
+
+        feature = int(tree.feature[node_id])
+        threshold = repr(float(tree.threshold[node_id]))
+        start, below, above = node_lines[node_id]
+
+        lines.append(indent + "out.append({start!r})".format(start=start))
+        lines.append(indent + "out.append(scores[{feature}])".format(
+            feature=feature))
+        lines.append(indent + ("out.append({below!r} if values[{feature}] "
+                               "<= {threshold} else {above!r})").format(
+            below=below, above=above, feature=feature, threshold=threshold))
+        lines.append(indent + "if row[{feature}] <= {threshold}:".format(
+            feature=feature, threshold=threshold))
+
+        stack.append((right, depth + 1))
+        stack.append((None, depth))
+        stack.append((left, depth + 1))
+
+    namespace = {}
+    code = compile("\n".join(lines) + "\n", "<tree_decode.codegen>", "exec")
+
+    exec(code, namespace)
+    return namespace["explain"]
@@ -0,0 +1,351 @@
+"""
+Compact, memory-mappable export format for decoded tree-based models.
+
+An exported model is a single flat binary file containing the arrays that
+describe the structure of each of its trees, preceded by a small header.
+Loading it back maps the arrays into memory instead of reading them, so
+that decoding a large model does not require unpickling it.
+"""
+
+from . import storage, traversal, utils
+
+import numpy as np
+
+__all__ = ["export_model", "import_model", "MappedTree", "MappedForest"]
+
+# Identifies the file format and its version.
+_MAGIC = b"TDECODE1"
+
+# The node arrays that are exported, with the data types in which they
+# are stored. They are concatenated across all of the trees of a model.
+_NODE_ARRAYS = (("children_left", "<i8"), ("children_right", "<i8"),
+                ("feature", "<i8"), ("threshold", "<f8"),
+                ("n_node_samples", "<i8"), ("value", "<f8"))
+
+
+def export_model(model, filepath):
+    """
+    Export the trees of a tree-based model to a flat binary file.
+
+    The exported model can be loaded back with `import_model`, which
+    provides a lightweight model that can be passed to our API.
+
+    Parameters
+    ----------
+    model : sklearn.ensemble.forest.BaseForest or
+            sklearn.tree.tree.BaseDecisionTree
+        The tree-based model that we are to export.
+    filepath : str
+        The path of the file to which to export the model.
+
+    Raises
+    ------
+    NotImplementedError : the model is not supported for exporting.
+    NotFittedError : the model was not properly fitted yet.
+    """
+
+    utils.check_model_type(model)
+    utils.check_is_fitted(model)
+
+    estimators = utils.get_estimators(model)
+    trees = [estimator.tree_ for estimator in estimators]
+
+    node_counts = [tree.node_count for tree in trees]
+    n_nodes = sum(node_counts)
+
+    first = trees[0]
+    value_shape = [first.n_outputs, first.max_n_classes]
+
+    classifier = hasattr(model, "predict_proba")
+    header = {
+        "forest": not utils.is_tree(model),
+        "classifier": classifier,
+        "n_features": int(first.n_features),
+        "n_outputs": int(first.n_outputs),
+        "n_classes": np.atleast_1d(first.n_classes).tolist(),
+        "node_counts": node_counts,
+        "arrays": {},
+    }
+
+    if classifier:
+        classes = model.classes_
+
+        if header["n_outputs"] == 1:
+            classes = [classes]
+
+        header["classes"] = [np.asarray(c).tolist() for c in classes]
+
+    header["arrays"], _ = storage.lay_out(
+        (name, dtype, [n_nodes] + (value_shape if name == "value" else []))
+        for name, dtype in _NODE_ARRAYS)
+
+    # Write the arrays of one tree at a time, so that we never hold
+    # a concatenated copy of the arrays of all trees in memory.
+    chunks = ((name, (getattr(tree, name)[:tree.node_count]
+                      for tree in trees))
+              for name, _ in _NODE_ARRAYS)
+
+    storage.save_arrays(filepath, _MAGIC, header, chunks)
+
+
+def import_model(filepath, mmap_mode="r"):
+    """
+    Load a model that was exported with `export_model`.
+
+    The arrays of the trees are memory-mapped, so they are only read from
+    the file as they are accessed.
+
+    Parameters
+    ----------
+    filepath : str
+        The path of the file to which the model was exported.
+    mmap_mode : {"r", "r+", "c"}, default "r"
+        The mode with which to memory-map the file. See `numpy.memmap`.
+
+    Returns
+    -------
+    model : MappedForest or MappedTree
+        A lightweight model that can be passed to our API. If the exported
+        model was an ensemble, a `MappedForest` is returned.
+
+    Raises
+    ------
+    ValueError : the file is not a model exported with `export_model`.
+    """
+
+    header, arrays = storage.load_arrays(filepath, _MAGIC,
+                                         mmap_mode=mmap_mode)
+
+    if header is None:
+        msg = "{path} is not an exported tree-based model"
+        raise ValueError(msg.format(path=filepath))
+
+    n_classes = header["n_classes"]
+    classes = header.get("classes")
+
+    if classes is not None:
+        classes = [np.array(c) for c in classes]
+
+    estimators = []
+    start = 0
+
+    for node_count in header["node_counts"]:
+        stop = start + node_count
+        tree = TreeArrays(dict((name, array[start:stop])
+                               for name, array in arrays.items()),
+                          n_features=header["n_features"],
+                          n_classes=n_classes)
+
+        estimators.append(MappedTree(tree, classifier=header["classifier"],
+                                     classes=classes))
+        start = stop
+
+    if header["forest"]:
+        return MappedForest(estimators)
+
+    return estimators[0]
+
+
+class TreeArrays(object):
+    """
+    The underlying tree structure of a `MappedTree`.
+
+    This provides the attributes of scikit-learn's `Tree` that we use.
+
+    Parameters
+    ----------
+    arrays : dict
+        A mapping from the names of the node arrays to the arrays.
+    n_features : int
+        The number of features that the tree was fitted on.
+    n_classes : list
+        The number of classes of each output of the tree.
+    """
+
+    def __init__(self, arrays, n_features, n_classes):
+        self.children_left = arrays["children_left"]
+        self.children_right = arrays["children_right"]
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.n_node_samples = arrays["n_node_samples"]
+        self.value = arrays["value"]
+
+        self.node_count = self.children_left.shape[0]
+        self.n_features = n_features
+        self.n_outputs = self.value.shape[1]
+        self.max_n_classes = self.value.shape[2]
+        self.n_classes = np.array(n_classes, dtype=np.intp)
+
+
+class _MappedModel(object):
+    """
+    Base class for the lightweight models returned by `import_model`.
+    """
+
+    def __init__(self, classifier, classes):
+        self._estimator_type = "classifier" if classifier else "regressor"
+        self._classes = classes
+
+    @property
+    def classes_(self):
+        if self._classes is None:
+            raise AttributeError("Regressors do not have classes")
+
+        return self._classes[0] if self.n_outputs_ == 1 else self._classes
+
+    @property
+    def predict_proba(self):
+        # Like in scikit-learn, only classifiers have this method.
+        if self._estimator_type != "classifier":
+            raise AttributeError("Regressors do not predict probabilities")
+
+        return self._predict_proba
+
+    def predict(self, X):
+        """
+        Predict the target of each row of input data.
+
+        Parameters
+        ----------
+        X : numpy.ndarray
+            A 2-D array of shape (n_rows, n_features) of input data.
+
+        Returns
+        -------
+        predictions : numpy.ndarray
+            The predicted classes or values of each row.
+        """
+
+        if self._estimator_type == "regressor":
+            return self._predict_values(X)
+
+        probas = self.predict_proba(X)
+
+        if self.n_outputs_ == 1:
+            return self.classes_.take(np.argmax(probas, axis=1), axis=0)
+
+        return np.stack([classes.take(np.argmax(proba, axis=1), axis=0)
+                         for classes, proba in zip(self.classes_, probas)],
+                        axis=1)
+
+
+class MappedTree(_MappedModel):
+    """
+    A lightweight decision tree backed by memory-mapped arrays.
+
+    It provides what our API needs from a fitted decision tree of
+    scikit-learn, in particular the `tree_` attribute.
+
+    Parameters
+    ----------
+    tree : TreeArrays
+        The underlying tree structure.
+    classifier : bool
+        Whether the tree is a classifier, as opposed to a regressor.
+    classes : list, default None
+        For classifiers, the class labels of each output.
+    """
+
+    def __init__(self, tree, classifier, classes=None):
+        super(MappedTree, self).__init__(classifier, classes)
+        self.tree_ = tree
+
+    @property
+    def n_outputs_(self):
+        return self.tree_.n_outputs
+
+    @property
+    def n_classes_(self):
+        n_classes = self.tree_.n_classes
+        return n_classes[0] if self.n_outputs_ == 1 else n_classes
+
+    def apply(self, X):
+        """
+        Get the leaf that each row of input data ends up in.
+
+        Parameters
+        ----------
+        X : numpy.ndarray
+            A 2-D array of shape (n_rows, n_features) of input data.
+
+        Returns
+        -------
+        leaf_ids : numpy.ndarray
+            The ID of the leaf of each row.
+        """
+
+        X = utils.check_input(X, self.tree_.n_features)
+        return traversal.apply(self.tree_, X)
+
+    def decision_path(self, X):
+        """
+        Get the nodes that each row of input data goes through.
+
+        Parameters
+        ----------
+        X : numpy.ndarray
+            A 2-D array of shape (n_rows, n_features) of input data.
+
+        Returns
+        -------
+        indicator : scipy.sparse.csr_matrix
+            A matrix of shape (n_rows, n_nodes), whose non-zero entries
+            indicate the nodes that each row goes through.
+        """
+
+        from scipy.sparse import csr_matrix
+
+        X = utils.check_input(X, self.tree_.n_features)
+        indptr, indices = traversal.decision_path(self.tree_, X)
+        data = np.ones(shape=indices.shape[0], dtype=np.intp)
+
+        shape = (X.shape[0], self.tree_.node_count)
+        return csr_matrix((data, indices, indptr), shape=shape)
+
+    def _predict_proba(self, X):
+        return utils.predict_from_leaves(self, self.apply(X), "predict_proba")
+
+    def _predict_values(self, X):
+        return utils.predict_from_leaves(self, self.apply(X), "predict")
+
+
+class MappedForest(_MappedModel):
+    """
+    A lightweight ensemble of decision trees backed by memory-mapped arrays.
+
+    It provides what our API needs from a fitted forest of scikit-learn,
+    in particular the `estimators_` attribute.
+
+    Parameters
+    ----------
+    estimators : list
+        The `MappedTree` estimators of the ensemble.
+    """
+
+    def __init__(self, estimators):
+        first = estimators[0]
+        classifier = first._estimator_type == "classifier"
+
+        super(MappedForest, self).__init__(classifier, first._classes)
+        self.estimators_ = estimators
+
+    @property
+    def n_outputs_(self):
+        return self.estimators_[0].n_outputs_
+
+    @property
+    def n_classes_(self):
+        return self.estimators_[0].n_classes_
+
+    def _predict_proba(self, X):
+        probas = [estimator.predict_proba(X) for estimator in self.estimators_]
+
+        if self.n_outputs_ == 1:
+            return np.mean(probas, axis=0)
+
+        return [np.mean([proba[k] for proba in probas], axis=0)
+                for k in range(self.n_outputs_)]
+
+    def _predict_values(self, X):
+        return np.mean([estimator.predict(X)
+                        for estimator in self.estimators_], axis=0)
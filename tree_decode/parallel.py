@@ -0,0 +1,246 @@
+"""
+Rendering of tree info over a pool of processes backed by shared memory.
+
+Formatting the output of `get_tree_info` is mostly Python code, so it does
+not run in parallel across threads. Instead, the node arrays of the trees
+are published in a single block of shared memory, and each process of a
+pool renders a shard of the trees from them. Only the name and layout of
+the block are sent to the processes, so the model is never pickled.
+
+This requires `multiprocessing.shared_memory`, i.e. Python 3.8 or later.
+"""
+
+from . import api, export, profiling, storage, utils
+
+import multiprocessing
+import numpy as np
+
+__all__ = ["check_backend", "iter_tree_info"]
+
+# The backends over which `iter_tree_info` can spread the estimators.
+BACKENDS = ("threads", "processes")
+
+# The number of shards per process, so that the processes
+# stay busy even if some shards take longer than others.
+_SHARDS_PER_JOB = 4
+
+
+def check_backend(backend):
+    """
+    Check that a backend for spreading estimators is supported.
+
+    Parameters
+    ----------
+    backend : str
+        The backend, which is one of `BACKENDS`.
+
+    Raises
+    ------
+    ValueError : the backend is not one that we support.
+    ImportError : the backend is not available with this version of Python.
+    """
+
+    if backend not in BACKENDS:
+        msg = "backend must be one of {backends}, got {backend!r}"
+        raise ValueError(msg.format(backends=", ".join(BACKENDS),
+                                    backend=backend))
+
+    if backend == "processes":
+        try:
+            from multiprocessing import shared_memory  # noqa
+        except ImportError:
+            raise ImportError("The processes backend requires "
+                              "multiprocessing.shared_memory (Python 3.8+)")
+
+
+def iter_tree_info(items, options, n_jobs, profiler=None):
+    """
+    Generate the output of `api.iter_tree_info` over a pool of processes.
+
+    Parameters
+    ----------
+    items : list
+        The (index, estimator) tuples of the estimators to render.
+    options : dict
+        The options with which to render each estimator, except for the
+        profiler, as passed to `api._get_estimator_info`.
+    n_jobs : int
+        The number of processes over which to spread the estimators.
+    profiler : profiling.Profiler, default None
+        The profiler to which to add the statistics of the processes.
+
+    Returns
+    -------
+    infos : generator
+        A generator of the output for each estimator, in order.
+    """
+
+    from multiprocessing.shared_memory import SharedMemory
+
+    trees = [estimator.tree_ for _, estimator in items]
+
+    with profiling.stage(profiler, "publish"):
+        layout = get_layout(trees)
+        shm = SharedMemory(create=True, size=max(layout["size"], 1))
+
+        try:
+            publish(trees, layout, shm.buf)
+        except Exception:
+            shm.close()
+            shm.unlink()
+            raise
+
+    try:
+        tasks = [(shm.name, layout, shard, options, profiler is not None)
+                 for shard in get_shards(items, layout["node_counts"],
+                                         n_jobs * _SHARDS_PER_JOB)]
+        pool = multiprocessing.Pool(n_jobs)
+
+        try:
+            for infos, stats in pool.imap(_render_shard, tasks):
+                for stat in stats:
+                    profiler.add(stat.stage, stat.time,
+                                 estimator=stat.estimator,
+                                 nodes=stat.nodes, chars=stat.chars)
+
+                for info in infos:
+                    yield info
+        finally:
+            pool.terminate()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def get_layout(trees):
+    """
+    Lay out the node arrays of trees in a single buffer.
+
+    The arrays are laid out as by `export.export_model`: each node array
+    is concatenated across the trees and aligned within the buffer.
+
+    Parameters
+    ----------
+    trees : list
+        The underlying tree structures (i.e. the `tree_` attributes).
+
+    Returns
+    -------
+    layout : dict
+        The offset, data type and shape of each node array, the number of
+        nodes and metadata of each tree, and the total size in bytes.
+    """
+
+    node_counts = [int(tree.node_count) for tree in trees]
+    n_nodes = sum(node_counts)
+
+    value_shape = list(trees[0].value.shape[1:])
+    arrays, size = storage.lay_out(
+        (name, dtype, [n_nodes] + (value_shape if name == "value" else []))
+        for name, dtype in export._NODE_ARRAYS)
+
+    return {
+        "arrays": arrays,
+        "node_counts": node_counts,
+        "n_features": [int(tree.n_features) for tree in trees],
+        "n_classes": [np.atleast_1d(tree.n_classes).tolist()
+                      for tree in trees],
+        "size": size,
+    }
+
+
+def publish(trees, layout, buf):
+    """
+    Copy the node arrays of trees into a buffer, as laid out by `get_layout`.
+    """
+
+    arrays = _get_arrays(layout, buf)
+
+    for name, array in arrays.items():
+        start = 0
+
+        for tree, node_count in zip(trees, layout["node_counts"]):
+            stop = start + node_count
+            array[start:stop] = getattr(tree, name)[:node_count]
+            start = stop
+
+
+def get_shards(items, node_counts, n_shards):
+    """
+    Split estimators into contiguous shards with similar numbers of nodes.
+
+    Parameters
+    ----------
+    items : list
+        The (index, estimator) tuples of the estimators.
+    node_counts : list
+        The number of nodes of each estimator.
+    n_shards : int
+        The maximum number of shards.
+
+    Returns
+    -------
+    shards : list
+        Lists of (index, position) tuples, where the position is that of
+        the estimator in the buffer laid out by `get_layout`.
+    """
+
+    ends = np.cumsum(node_counts)
+    bounds = np.linspace(0, ends[-1], n_shards + 1)[1:-1]
+
+    # Each shard ends with the estimator that crosses its bound.
+    splits = np.unique(np.searchsorted(ends, bounds, side="left") + 1)
+    positions = np.split(np.arange(len(items)), splits)
+
+    return [[(items[position][0], position) for position in shard.tolist()]
+            for shard in positions if shard.size > 0]
+
+
+def _get_arrays(layout, buf):
+    return storage.view_arrays(np.frombuffer(buf, dtype=np.uint8),
+                               layout["arrays"])
+
+
+def _render_shard(task):
+    """
+    Render a shard of the trees published in shared memory.
+
+    This runs in the processes of the pool.
+    """
+
+    from multiprocessing.shared_memory import SharedMemory
+
+    name, layout, shard, options, profile = task
+    shm = SharedMemory(name=name)
+
+    try:
+        profiler = profiling.Profiler() if profile else None
+        infos = _render_trees(shm.buf, layout, shard, options, profiler)
+
+        return infos, [] if profiler is None else profiler.stats
+    finally:
+        shm.close()
+
+
+def _render_trees(buf, layout, shard, options, profiler):
+    # All views of the buffer have to be released before it is
+    # closed, so they only live as long as this function call.
+    arrays = _get_arrays(layout, buf)
+    starts = np.cumsum([0] + layout["node_counts"])
+    infos = []
+
+    for index, position in shard:
+        start, stop = starts[position], starts[position + 1]
+        tree = export.TreeArrays(
+            dict((name, array[start:stop]) for name, array in arrays.items()),
+            n_features=layout["n_features"][position],
+            n_classes=layout["n_classes"][position])
+
+        estimator = export.MappedTree(tree, classifier=False)
+        infos.append(api._get_estimator_info((index, estimator),
+                                             profiler=profiler, **options))
+
+        # The cached state of the tree holds views of the buffer too.
+        utils.tree_cache.clear()
+
+    return infos
@@ -0,0 +1,207 @@
+"""
+Compact storage of the decision paths of many rows through a model.
+
+The decision paths of a batch of rows are stored as a single sparse matrix
+in CSR layout: one row per row of input data, whose entries are the nodes
+that it went through in each of the trees. Nodes are numbered across the
+trees, i.e. node `i` of the `t`-th tree has the global ID
+`tree_offsets[t] + i`, so that the indices fit in 32 bits for all but
+enormous models.
+
+Saved paths are memory-mapped when they are loaded back, so that the
+explanation of any single row can be rebuilt without reading the others.
+"""
+
+from . import storage
+
+import numpy as np
+
+__all__ = ["DecisionPaths", "load_decision_paths"]
+
+# Identifies the file format and its version.
+_MAGIC = b"TDPATHS1"
+
+# The arrays of `DecisionPaths` that are saved, in order.
+_PATH_ARRAYS = ("indptr", "indices", "values", "tree_offsets", "estimators")
+
+
+def get_index_dtype(n_nodes):
+    """
+    Get the smallest data type for the global IDs of a number of nodes.
+    """
+
+    if n_nodes <= np.iinfo(np.int32).max:
+        return np.dtype(np.int32)
+
+    return np.dtype(np.int64)
+
+
+class DecisionPaths(object):
+    """
+    The decision paths of a batch of rows through the trees of a model.
+
+    Parameters
+    ----------
+    indptr : numpy.ndarray
+        The offsets into `indices` at which the path of each row starts,
+        with a final entry for where the last path ends.
+    indices : numpy.ndarray
+        The concatenated global node IDs of the paths of the rows. The
+        nodes of each row are grouped by tree, in the order of the trees.
+    values : numpy.ndarray
+        The value of the feature decided on at each of the nodes in
+        `indices`, after conversion to float32 as the trees see them.
+        Leaves have a value of NaN.
+    tree_offsets : numpy.ndarray
+        The global ID of the first node of each tree, with a final entry
+        for the total number of nodes.
+    estimators : numpy.ndarray
+        The index in the model of each of the trees.
+    """
+
+    def __init__(self, indptr, indices, values, tree_offsets, estimators):
+        self.indptr = indptr
+        self.indices = indices
+        self.values = values
+        self.tree_offsets = tree_offsets
+        self.estimators = estimators
+
+    def __repr__(self):
+        return ("{klass}(n_rows={n_rows}, n_trees={n_trees}, "
+                "n_entries={n_entries})".format(
+                    klass=type(self).__name__, n_rows=self.n_rows,
+                    n_trees=self.n_trees, n_entries=self.indices.shape[0]))
+
+    def __len__(self):
+        return self.n_rows
+
+    @property
+    def n_rows(self):
+        return self.indptr.shape[0] - 1
+
+    @property
+    def n_trees(self):
+        return self.estimators.shape[0]
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in _PATH_ARRAYS)
+
+    def get_row(self, row):
+        """
+        Get the decision paths of a row through each of the trees.
+
+        Parameters
+        ----------
+        row : int
+            The row whose paths to get.
+
+        Returns
+        -------
+        paths : list
+            The (index, node_ids, values) tuples of each tree, where the
+            node IDs are those within the tree, in the order of the path.
+
+        Raises
+        ------
+        IndexError : the row is out of bounds.
+        """
+
+        n_rows = self.n_rows
+
+        if not -n_rows <= row < n_rows:
+            msg = "Row {row} is out of bounds on paths of {n} rows"
+            raise IndexError(msg.format(row=row, n=n_rows))
+
+        row %= n_rows
+        start, stop = self.indptr[row], self.indptr[row + 1]
+
+        indices = np.asarray(self.indices[start:stop], dtype=np.int64)
+        values = np.asarray(self.values[start:stop])
+
+        # Every row goes through (at least) the root of each tree.
+        positions = np.searchsorted(self.tree_offsets, indices,
+                                    side="right") - 1
+        splits = np.flatnonzero(np.diff(positions)) + 1
+
+        return [(int(self.estimators[position]),
+                 node_ids - self.tree_offsets[position], tree_values)
+                for position, node_ids, tree_values in zip(
+                    positions[np.r_[0, splits]],
+                    np.split(indices, splits), np.split(values, splits))]
+
+    def to_csr(self):
+        """
+        Get the decision paths as a scipy CSR matrix.
+
+        Returns
+        -------
+        indicator : scipy.sparse.csr_matrix
+            A matrix of shape (n_rows, n_nodes) like the one returned by
+            the `decision_path` method of scikit-learn forests, whose
+            columns are the global IDs of the nodes.
+        """
+
+        from scipy.sparse import csr_matrix
+
+        data = np.ones(self.indices.shape[0], dtype=np.int8)
+        shape = (self.n_rows, int(self.tree_offsets[-1]))
+
+        return csr_matrix((data, self.indices, self.indptr), shape=shape)
+
+    def save(self, filepath):
+        """
+        Save the decision paths to a flat binary file.
+
+        They can be loaded back with `load_decision_paths`.
+
+        Parameters
+        ----------
+        filepath : str
+            The path of the file to which to save the paths.
+        """
+
+        arrays = [getattr(self, name) for name in _PATH_ARRAYS]
+        header = {}
+
+        header["arrays"], _ = storage.lay_out(
+            (name, array.dtype.newbyteorder("<"), array.shape)
+            for name, array in zip(_PATH_ARRAYS, arrays))
+
+        storage.save_arrays(filepath, _MAGIC, header,
+                            [(name, [array]) for name, array
+                             in zip(_PATH_ARRAYS, arrays)])
+
+
+def load_decision_paths(filepath, mmap_mode="r"):
+    """
+    Load decision paths that were saved with `DecisionPaths.save`.
+
+    The arrays are memory-mapped, so the paths of a row are only read from
+    the file when they are accessed.
+
+    Parameters
+    ----------
+    filepath : str
+        The path of the file to which the paths were saved.
+    mmap_mode : {"r", "r+", "c"}, default "r"
+        The mode with which to memory-map the file. See `numpy.memmap`.
+
+    Returns
+    -------
+    paths : DecisionPaths
+        The decision paths that were saved.
+
+    Raises
+    ------
+    ValueError : the file does not contain saved decision paths.
+    """
+
+    header, arrays = storage.load_arrays(filepath, _MAGIC,
+                                         mmap_mode=mmap_mode)
+
+    if header is None:
+        msg = "{path} does not contain saved decision paths"
+        raise ValueError(msg.format(path=filepath))
+
+    return DecisionPaths(**arrays)
@@ -0,0 +1,301 @@
+"""
+Instrumentation of where the time of our tree-decoding API goes.
+"""
+
+from collections import namedtuple, OrderedDict
+
+import threading
+import timeit
+
+__all__ = ["Profiler", "StageStats"]
+
+StageStats = namedtuple("StageStats", ["estimator", "stage", "calls", "time",
+                                       "nodes", "chars"])
+
+
+class Profiler(object):
+    """
+    Collector of the wall time spent in each stage of our API, per estimator.
+
+    Pass an instance as the `profiler` argument of `get_tree_info`,
+    `iter_tree_info`, `get_decision_info` or `iter_decision_info`. The
+    statistics of several calls accumulate until `reset` is called.
+
+    The stages of `get_tree_info` are:
+
+    * topology - computing the depth of each node and which are leaves.
+      The nodes of the tree (or region of it) that are displayed are
+      counted as visited here.
+    * dedupe - hashing the subtrees and finding the repeats among them,
+      if `dedupe` is True.
+    * normalize - normalizing the label scores of the nodes.
+    * format - formatting the thresholds and leaf scores as strings.
+    * render - generating the lines of output.
+    * write - writing the output to a file or buffer.
+
+    The stages of `get_decision_info` are:
+
+    * check_input - validating the input data.
+    * decision_path - finding the nodes that each row goes through,
+      which are counted as visited here.
+    * scores - predicting and formatting the scores of the leaves reached.
+    * render - generating the explanations of the rows.
+    * write - writing the output to a file or buffer.
+
+    Examples
+    --------
+    >>> profiler = Profiler()
+    >>> output = get_tree_info(model, profiler=profiler)
+    >>> print(profiler.report())
+    """
+
+    def __init__(self):
+        self._stats = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.timer = timeit.default_timer
+
+    def add(self, stage, time, estimator=None, nodes=0, chars=0):
+        """
+        Record a call of a stage.
+
+        Parameters
+        ----------
+        stage : str
+            The name of the stage.
+        time : float
+            The wall time spent in the stage, in seconds.
+        estimator : int, default None
+            The index of the estimator that the stage was for, or None
+            if the stage was not specific to an estimator.
+        nodes : int, default 0
+            The number of nodes that were visited.
+        chars : int, default 0
+            The number of characters of output that were emitted.
+        """
+
+        key = (estimator, stage)
+
+        with self._lock:
+            calls, total, total_nodes, total_chars = self._stats.get(
+                key, (0, 0.0, 0, 0))
+            self._stats[key] = (calls + 1, total + time,
+                                total_nodes + nodes, total_chars + chars)
+
+    def stage(self, stage, estimator=None):
+        """
+        Get a context manager that records the time spent within it.
+
+        Parameters
+        ----------
+        stage : str
+            The name of the stage.
+        estimator : int, default None
+            The index of the estimator that the stage is for, if any.
+        """
+
+        return _Stage(self, stage, estimator)
+
+    def get_time(self, estimator=None):
+        """
+        Get the total time recorded for an estimator, across all stages.
+        """
+
+        with self._lock:
+            return sum(stats[1] for (index, _), stats in self._stats.items()
+                       if index == estimator)
+
+    @property
+    def stats(self):
+        """
+        The statistics of each stage of each estimator, in the
+        order in which they were first recorded.
+
+        Returns
+        -------
+        stats : list of StageStats
+        """
+
+        with self._lock:
+            return [StageStats(estimator, stage, *stats)
+                    for (estimator, stage), stats in self._stats.items()]
+
+    def summary(self):
+        """
+        Get the statistics of each stage, summed over the estimators.
+
+        Returns
+        -------
+        summary : collections.OrderedDict
+            A mapping from the name of each stage to its StageStats, with
+            its `estimator` set to None.
+        """
+
+        summary = OrderedDict()
+
+        for stats in self.stats:
+            previous = summary.get(stats.stage)
+
+            if previous is None:
+                summary[stats.stage] = stats._replace(estimator=None)
+            else:
+                summary[stats.stage] = previous._replace(
+                    calls=previous.calls + stats.calls,
+                    time=previous.time + stats.time,
+                    nodes=previous.nodes + stats.nodes,
+                    chars=previous.chars + stats.chars)
+
+        return summary
+
+    def report(self, per_estimator=False):
+        """
+        Format the statistics as a table.
+
+        Parameters
+        ----------
+        per_estimator : bool, default False
+            Whether to list each estimator separately, instead of
+            summing the statistics of each stage over the estimators.
+
+        Returns
+        -------
+        report : str
+        """
+
+        stats = self.stats if per_estimator else self.summary().values()
+
+        header = "{:>9} {:>13} {:>7} {:>10} {:>10} {:>12}".format(
+            "estimator", "stage", "calls", "time (s)", "nodes", "chars")
+        row = ("{estimator:>9} {stage:>13} {calls:>7} {time:>10.4f} "
+               "{nodes:>10} {chars:>12}")
+
+        lines = [header]
+
+        for stat in stats:
+            estimator = "-" if stat.estimator is None else stat.estimator
+            lines.append(row.format(**dict(stat._asdict(),
+                                           estimator=estimator)))
+
+        return "\n".join(lines)
+
+    def reset(self):
+        """
+        Discard all of the statistics recorded so far.
+        """
+
+        with self._lock:
+            self._stats.clear()
+
+
+class _Stage(object):
+    """
+    Context manager recording the time spent within it for a `Profiler`.
+    """
+
+    def __init__(self, profiler, stage, estimator):
+        self.profiler = profiler
+        self.stage = stage
+        self.estimator = estimator
+
+        # These can be set within the context to be recorded too.
+        self.nodes = 0
+        self.chars = 0
+
+    def __enter__(self):
+        self.start = self.profiler.timer()
+        return self
+
+    def __exit__(self, *args):
+        elapsed = self.profiler.timer() - self.start
+        self.profiler.add(self.stage, elapsed, estimator=self.estimator,
+                          nodes=self.nodes, chars=self.chars)
+
+
+class _NullStage(object):
+    """
+    Context manager that does nothing, used when there is no profiler.
+    """
+
+    nodes = 0
+    chars = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def __setattr__(self, name, value):
+        # The instance is shared, so what is recorded within it is ignored.
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(profiler, name, estimator=None):
+    """
+    Get a context manager recording a stage, if there is a profiler.
+
+    Parameters
+    ----------
+    profiler : Profiler or None
+        The profiler with which to record the stage.
+    name : str
+        The name of the stage.
+    estimator : int, default None
+        The index of the estimator that the stage is for, if any.
+    """
+
+    if profiler is None:
+        return _NULL_STAGE
+
+    return profiler.stage(name, estimator)
+
+
+def profile_lines(lines, profiler, estimator):
+    """
+    Record the time spent generating lines of output as the "render" stage.
+
+    Only the time spent within the generator of lines is recorded, not
+    that spent by its consumer. Stages recorded by the generator itself
+    for the same estimator are not counted towards rendering.
+
+    Parameters
+    ----------
+    lines : iterable of str
+        The lines of output for the estimator.
+    profiler : Profiler
+        The profiler with which to record the stage.
+    estimator : int
+        The index of the estimator that the lines are for.
+
+    Returns
+    -------
+    lines : generator
+        A generator of the same lines.
+    """
+
+    timer = profiler.timer
+    nested = profiler.get_time(estimator)
+
+    lines = iter(lines)
+    elapsed = 0.0
+    chars = 0
+
+    while True:
+        start = timer()
+
+        try:
+            line = next(lines)
+        except StopIteration:
+            break
+        finally:
+            elapsed += timer() - start
+
+        chars += len(line)
+        yield line
+
+    nested = profiler.get_time(estimator) - nested
+    profiler.add("render", elapsed - nested, estimator=estimator,
+                 chars=chars)
@@ -0,0 +1,177 @@
+"""
+Flat binary files of aligned arrays, preceded by a small header.
+
+This is the layout shared by exported models (see `export`) and saved
+decision paths (see `paths`). A file consists of:
+
+* magic bytes, identifying the format and its version.
+* the length of the header, as a little-endian unsigned 64-bit int.
+* the header, as UTF-8 encoded JSON. Its "arrays" entry describes the
+  data type, shape and offset of each array.
+* the arrays, each aligned to `ALIGNMENT` bytes. Offsets are relative
+  to the start of the arrays, which is the first aligned position in
+  the file after the header.
+
+Loading a file back maps the arrays into memory instead of reading them.
+"""
+
+import numpy as np
+import struct
+import json
+
+__all__ = ["ALIGNMENT", "align", "lay_out", "view_arrays", "save_arrays",
+           "load_arrays"]
+
+# Arrays are aligned to this many bytes within the file.
+ALIGNMENT = 64
+
+
+def align(offset):
+    """
+    Round an offset up to the next multiple of `ALIGNMENT`.
+    """
+
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _get_data_start(magic, header_length):
+    return align(len(magic) + 8 + header_length)
+
+
+def lay_out(specs):
+    """
+    Lay out arrays one after another, each aligned to `ALIGNMENT` bytes.
+
+    Parameters
+    ----------
+    specs : iterable
+        The (name, dtype, shape) tuples of the arrays, in order.
+
+    Returns
+    -------
+    arrays : dict
+        The data type, shape and offset of each array, by name, as
+        they are stored in the "arrays" entry of the header.
+    size : int
+        The total size of the arrays in bytes, including padding.
+    """
+
+    arrays = {}
+    offset = 0
+
+    for name, dtype, shape in specs:
+        shape = [int(length) for length in shape]
+        arrays[name] = {"dtype": np.dtype(dtype).str, "shape": shape,
+                        "offset": offset}
+
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        offset = align(offset + nbytes)
+
+    return arrays, offset
+
+
+def view_arrays(buf, arrays, start=0):
+    """
+    Get views of the arrays laid out by `lay_out` in a buffer.
+
+    Parameters
+    ----------
+    buf : numpy.ndarray
+        The buffer, as a 1-D array of bytes (e.g. a `numpy.memmap`).
+    arrays : dict
+        The data type, shape and offset of each array, by name.
+    start : int, default 0
+        The position in the buffer from which the offsets are counted.
+
+    Returns
+    -------
+    views : dict
+        The view of each array into the buffer, by name.
+    """
+
+    views = {}
+
+    for name, spec in arrays.items():
+        dtype = np.dtype(spec["dtype"])
+        shape = tuple(spec["shape"])
+
+        offset = start + spec["offset"]
+        stop = offset + int(np.prod(shape)) * dtype.itemsize
+
+        views[name] = buf[offset:stop].view(dtype).reshape(shape)
+
+    return views
+
+
+def save_arrays(filepath, magic, header, chunks):
+    """
+    Write a header and arrays to a flat binary file.
+
+    Parameters
+    ----------
+    filepath : str
+        The path of the file to which to write.
+    magic : bytes
+        The magic bytes identifying the format.
+    header : dict
+        The header, which must be serializable to JSON. Its "arrays" entry
+        describes the arrays, as laid out by `lay_out`.
+    chunks : iterable
+        The (name, parts) tuples of the arrays, in the order in which they
+        are laid out, where the parts are written one after another to make
+        up the array. This allows writing an array that is concatenated
+        from several others without holding a copy of it in memory.
+    """
+
+    arrays = header["arrays"]
+
+    encoded = json.dumps(header).encode("utf-8")
+    start = _get_data_start(magic, len(encoded))
+
+    with open(filepath, "wb") as f:
+        f.write(magic)
+        f.write(struct.pack("<Q", len(encoded)))
+        f.write(encoded)
+
+        for name, parts in chunks:
+            padding = start + arrays[name]["offset"] - f.tell()
+            f.write(b"\0" * padding)
+
+            for part in parts:
+                f.write(np.ascontiguousarray(
+                    part, dtype=arrays[name]["dtype"]).tobytes())
+
+
+def load_arrays(filepath, magic, mmap_mode="r"):
+    """
+    Load a header and arrays written with `save_arrays`.
+
+    Parameters
+    ----------
+    filepath : str
+        The path of the file from which to load.
+    magic : bytes
+        The magic bytes identifying the format.
+    mmap_mode : {"r", "r+", "c"}, default "r"
+        The mode with which to memory-map the file. See `numpy.memmap`.
+
+    Returns
+    -------
+    header : dict or None
+        The header, or None if the file does not start with the magic bytes.
+    arrays : dict or None
+        The memory-mapped arrays by name, or None if the file does not
+        start with the magic bytes.
+    """
+
+    with open(filepath, "rb") as f:
+        if f.read(len(magic)) != magic:
+            return None, None
+
+        length, = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length).decode("utf-8"))
+
+    buf = np.memmap(filepath, dtype=np.uint8, mode=mmap_mode)
+    start = _get_data_start(magic, length)
+
+    return header, view_arrays(buf, header["arrays"], start=start)
@@ -0,0 +1,111 @@
+from tree_decode.tests.utils import load_test_model
+
+import tree_decode.api as api
+import numpy as np
+import pytest
+import sys
+
+if sys.version_info < (3, 5):
+    pytest.skip("asyncio variants require Python 3.5+",
+                allow_module_level=True)
+
+import tree_decode.aio as aio  # noqa: E402
+import asyncio  # noqa: E402
+
+
+class MockWriter(object):
+    """
+    Mock asyncio stream writer for testing purposes.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.drains = 0
+
+    def write(self, data):
+        assert isinstance(data, bytes)
+        self.chunks.append(data)
+
+    def drain(self):
+        self.drains += 1
+        return asyncio.sleep(0)
+
+    def read(self):
+        return b"".join(self.chunks).decode("utf-8")
+
+
+def run(*coroutines):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    try:
+        if len(coroutines) == 1:
+            return loop.run_until_complete(coroutines[0])
+
+        return loop.run_until_complete(asyncio.gather(*coroutines))
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+class TestGetTreeInfo(object):
+
+    @classmethod
+    def setup_class(cls):
+        cls.model = load_test_model("rfc")
+
+    def test_output(self):
+        expected = api.get_tree_info(self.model, precision=2)
+        assert run(aio.get_tree_info(self.model, precision=2)) == expected
+
+    def test_writer(self):
+        expected = api.get_tree_info(self.model)
+        writer = MockWriter()
+
+        result = run(aio.get_tree_info(self.model, writer, chunk_size=100))
+        assert result is None
+        assert writer.read() == expected
+
+        # Every chunk is drained before the next one is generated.
+        assert len(writer.chunks) > 1
+        assert writer.drains == len(writer.chunks)
+
+    def test_concurrent(self):
+        expected = [api.get_tree_info(self.model, estimators=[index])
+                    for index in range(len(self.model.estimators_))]
+
+        async_calls = [aio.get_tree_info(self.model, estimators=[index],
+                                         chunk_size=50)
+                       for index in range(len(self.model.estimators_))]
+        assert run(*async_calls) == expected
+
+    def test_error(self):
+        match = "is out of bounds on decision tree"
+
+        with pytest.raises(IndexError, match=match):
+            run(aio.get_tree_info(self.model, label_index=10))
+
+
+class TestGetDecisionInfo(object):
+
+    data = np.array([[5.8, 2.8, 5.1, 2.4]])
+
+    @classmethod
+    def setup_class(cls):
+        cls.model = load_test_model("rfc")
+
+    def test_output(self):
+        expected = api.get_decision_info(self.model, self.data, precision=2)
+        result = run(aio.get_decision_info(self.model, self.data,
+                                           precision=2))
+        assert result == expected
+
+    def test_writer(self):
+        expected = api.get_decision_info(self.model, self.data)
+        writer = MockWriter()
+
+        result = run(aio.get_decision_info(self.model, self.data, writer,
+                                           chunk_size=10))
+        assert result is None
+        assert writer.read() == expected
+        assert len(writer.chunks) == -(-len(expected) // 10)
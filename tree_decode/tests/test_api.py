@@ -1,9 +1,15 @@
 from tree_decode.tests.utils import load_model, MockBuffer
+from tree_decode.export import MappedTree, TreeArrays
 from sklearn.exceptions import NotFittedError
 
+import tree_decode.utils as utils
 import tree_decode.api as api
 import numpy as np
+import subprocess
+import copy
 import pytest
+import re
+import sys
 import os
 
 
@@ -567,6 +573,679 @@ node=0: go to node 1 if feature 3 <= 0.8 else to node 2.
         assert buffer.read() == expected
 
 
+class TestIterTreeInfo(BaseApiTest):
+
+    min_args = ()
+
+    @staticmethod
+    def api_call(*args, **kwargs):
+        return "".join(api.iter_tree_info(*args, **kwargs))
+
+    @pytest.mark.parametrize("name", ["dtc", "dtr", "etc", "etr",
+                                      "rfc", "rfr", "etsc", "etsr"])
+    def test_matches_get_tree_info(self, name):
+        model = getattr(self, name + "_model")
+
+        result = self.api_call(model)
+        expected = api.get_tree_info(model)
+        assert result == expected
+
+        result = self.api_call(model, precision=None, normalize=False)
+        expected = api.get_tree_info(model, precision=None, normalize=False)
+        assert result == expected
+
+    @pytest.mark.parametrize("name", ["dtc", "rfc", "etsc", "etsr"])
+    @pytest.mark.parametrize("n_jobs", [2, -1])
+    def test_n_jobs(self, name, n_jobs):
+        model = getattr(self, name + "_model")
+
+        result = self.api_call(model, n_jobs=n_jobs)
+        expected = api.get_tree_info(model)
+        assert result == expected
+
+        buffer = MockBuffer()
+        api.get_tree_info(model, n_jobs=n_jobs, filepath_or_buffer=buffer)
+        assert buffer.read() == expected
+
+    def test_invalid_n_jobs(self):
+        match = "n_jobs == 0 has no meaning"
+        message = "Expected ValueError regarding n_jobs"
+
+        with pytest.raises(ValueError, match=match, message=message):
+            api.iter_tree_info(self.rfc_model, n_jobs=0)
+
+    def test_lines(self):
+        lines = list(api.iter_tree_info(self.rfc_model))
+
+        assert len(lines) > 1
+        assert all(line.endswith("\n") for line in lines)
+
+    def test_label_index(self):
+        label_index = 10
+
+        match = "is out of bounds on decision tree"
+        message = "Expected IndexError before any output is generated"
+
+        # The generator should not need to be consumed for the error.
+        with pytest.raises(IndexError, match=match, message=message):
+            api.iter_tree_info(self.dtc_model, label_index=label_index)
+
+        buffer = MockBuffer()
+
+        with pytest.raises(IndexError, match=match, message=message):
+            api.get_tree_info(self.dtc_model, label_index=label_index,
+                              filepath_or_buffer=buffer)
+
+        assert buffer.read() == ""
+
+    @pytest.mark.parametrize("name", ["dtc", "dtr", "etc", "etr",
+                                      "rfc", "rfr", "etsc", "etsr"])
+    def test_whole_region(self, name):
+        model = getattr(self, name + "_model")
+        expected = api.get_tree_info(model)
+
+        assert self.api_call(model, root_node=0) == expected
+        assert self.api_call(model, max_depth=100) == expected
+
+        expected = api.get_tree_info(model, normalize=False, label_index=0)
+        result = self.api_call(model, normalize=False, label_index=0,
+                               root_node=0)
+        assert result == expected
+
+    def test_max_depth(self):
+        result = self.api_call(self.dtr_model, max_depth=1)
+        expected = """\
+
+
+Info for Decision Tree 0
+
+node=0: go to node 1 if feature 0 <= 3.133 else to node 4.
+     node=1: go to node 2 if feature 0 <= 0.514 else to node 3.
+     node=4: go to node 5 if feature 0 <= 3.85 else to node 6.
+"""
+        assert result == expected
+
+    def test_root_node(self):
+        result = self.api_call(self.dtr_model, root_node=4)
+        expected = """\
+
+
+Info for Decision Tree 0
+
+node=4: go to node 5 if feature 0 <= 3.85 else to node 6.
+     node=5 left node: scores = [[-1.]]
+     node=6 left node: scores = [[-1.]]
+"""
+        assert result == expected
+
+        result = self.api_call(self.dtr_model, root_node=4, max_depth=0)
+        expected = """\
+
+
+Info for Decision Tree 0
+
+node=4: go to node 5 if feature 0 <= 3.85 else to node 6.
+"""
+        assert result == expected
+
+    def test_invalid_region(self):
+        match = "Node 100 is out of bounds on decision tree 0"
+        message = "Expected IndexError regarding the root node"
+
+        with pytest.raises(IndexError, match=match, message=message):
+            api.iter_tree_info(self.rfc_model, root_node=100)
+
+        match = "max_depth must be non-negative"
+        message = "Expected ValueError regarding the maximum depth"
+
+        with pytest.raises(ValueError, match=match, message=message):
+            api.iter_tree_info(self.rfc_model, max_depth=-1)
+
+    @pytest.mark.parametrize("estimators", [[1, 0], slice(1, None), -2])
+    def test_estimators(self, estimators):
+        blocks = api.get_tree_info(self.rfc_model).split("\n\nInfo")[1:]
+        indices = np.arange(len(blocks))[estimators]
+
+        result = self.api_call(self.rfc_model, estimators=estimators)
+        expected = "".join("\n\nInfo" + blocks[index]
+                           for index in np.atleast_1d(indices))
+        assert result == expected
+
+        mask = np.zeros(len(blocks), dtype=bool)
+        mask[indices] = True
+
+        result = self.api_call(self.rfc_model, estimators=mask)
+        expected = "".join("\n\nInfo" + blocks[index]
+                           for index in np.flatnonzero(mask))
+        assert result == expected
+
+    def test_invalid_estimators(self):
+        match = "There is no tree at index 100"
+        message = "Expected IndexError regarding the estimators"
+
+        with pytest.raises(IndexError, match=match, message=message):
+            api.iter_tree_info(self.rfc_model, estimators=[0, 100])
+
+    def test_dedupe(self):
+        result = self.api_call(self.rfr_model, precision=0, dedupe=True,
+                               estimators=0)
+        expected = """\
+
+
+Info for Decision Tree 0
+
+node=0: go to node 1 if feature 2 <= 2.0 else to node 2.
+     node=1 left node: scores = [[0.]]
+
+     node=2: go to node 3 if feature 3 <= 2.0 else to node 8.
+          node=3: go to node 4 if feature 2 <= 5.0 else to node 5.
+               node=4 left node: scores = [[1.]]
+
+               node=5: go to node 6 if feature 1 <= 3.0 else to node 7.
+                    node=6 left node: scores = [[1.]]
+                    node=7 left node: scores = [[1.]]
+
+          node=8: go to node 9 if feature 2 <= 5.0 else to node 12.
+               node=9: same as node 5.
+               node=12 left node: scores = [[1.]]
+"""
+        assert result == expected
+
+        # The subtrees are only the same at the displayed precision.
+        result = self.api_call(self.rfr_model, dedupe=True, estimators=0)
+        assert result == api.get_tree_info(self.rfr_model, estimators=0)
+
+    def test_dedupe_across_trees(self):
+        expected = api.get_tree_info(self.rfc_model).split("\n")
+        result = self.api_call(self.rfc_model, dedupe=True).split("\n")
+
+        # Tree 1 repeats the subtree below node 10 of tree 0 at node 5,
+        # so the lines of its two leaves (nodes 6 and 7) are left out.
+        index = expected.index("               node=5: go to node 6 if "
+                               "feature 2 <= 4.95 else to node 7.")
+
+        assert result[:index] == expected[:index]
+        assert result[index] == ("               node=5: same as node 10 "
+                                 "of Decision Tree 0.")
+        assert result[index + 1:] == expected[index + 3:]
+
+    @pytest.mark.parametrize("name", ["dtc", "dtr", "etc", "etr"])
+    def test_dedupe_unique(self, name):
+        model = getattr(self, name + "_model")
+
+        for kwargs in [dict(), dict(normalize=False, precision=None),
+                       dict(label_index=0)]:
+            result = self.api_call(model, dedupe=True, **kwargs)
+            assert result == api.get_tree_info(model, **kwargs)
+
+    @pytest.mark.parametrize("name", ["rfc", "rfr", "etsc", "etsr"])
+    def test_dedupe_options(self, name):
+        model = getattr(self, name + "_model")
+        expected = self.api_call(model, dedupe=True, precision=0)
+
+        result = self.api_call(model, dedupe=True, precision=0, n_jobs=2)
+        assert result == expected
+
+        result = self.api_call(model, dedupe=True, precision=0, root_node=0)
+        assert result == expected
+
+        buffer = MockBuffer()
+        api.get_tree_info(model, dedupe=True, precision=0,
+                          filepath_or_buffer=buffer)
+        assert buffer.read() == expected
+
+    def test_dedupe_region(self):
+        result = self.api_call(self.rfr_model, precision=0, dedupe=True,
+                               root_node=8, estimators=0)
+        expected = """\
+
+
+Info for Decision Tree 0
+
+node=8: go to node 9 if feature 2 <= 5.0 else to node 12.
+     node=9: go to node 10 if feature 1 <= 3.0 else to node 11.
+          node=10 left node: scores = [[1.]]
+          node=11 left node: scores = [[1.]]
+
+     node=12 left node: scores = [[1.]]
+"""
+        assert result == expected
+
+        match = "max_depth cannot be combined with dedupe"
+        message = "Expected ValueError regarding the maximum depth"
+
+        with pytest.raises(ValueError, match=match, message=message):
+            api.iter_tree_info(self.rfr_model, dedupe=True, max_depth=2)
+
+    def test_dedupe_best_first(self):
+        # Trees grown best-first (e.g. with max_leaf_nodes) are not numbered
+        # depth-first: here, nodes 3 and 4 are the children of node 1, and
+        # nodes 5 and 6 are those of node 2, which repeats node 1.
+        arrays = {
+            "children_left": np.array([1, 3, 5, -1, -1, -1, -1]),
+            "children_right": np.array([2, 4, 6, -1, -1, -1, -1]),
+            "feature": np.array([0, 1, 1, -2, -2, -2, -2]),
+            "threshold": np.array([5.0, 1.0, 1.0, -2.0, -2.0, -2.0, -2.0]),
+            "n_node_samples": np.ones(7, dtype=np.intp),
+            "value": np.array([0, 0, 0, 1, 2, 1, 2],
+                              dtype=np.float64).reshape(7, 1, 1),
+        }
+
+        tree = TreeArrays(arrays, n_features=2, n_classes=[1])
+        model = MappedTree(tree, classifier=False)
+
+        result = self.api_call(model, normalize=False, dedupe=True)
+        expected = """\
+
+
+Info for Decision Tree 0
+
+node=0: go to node 1 if feature 0 <= 5.0 else to node 2.
+     node=1: go to node 3 if feature 1 <= 1.0 else to node 4.
+     node=2: same as node 1.
+          node=3 left node: scores = [[1.]]
+          node=4 left node: scores = [[2.]]
+"""
+        assert result == expected
+
+
+class TestGetModelDiff(object):
+
+    @classmethod
+    def setup_class(cls):
+        cls.dtc_model = BaseApiTest.load_model("dtc-model.pickle")
+        cls.rfc_model = BaseApiTest.load_model("rfc-model.pickle")
+
+    @staticmethod
+    def copy_model(model, tmpdir):
+        # Models imported with copy-on-write arrays can be modified freely.
+        filepath = str(tmpdir.join("model.tdecode"))
+        api.export_model(model, filepath)
+
+        return api.import_model(filepath, mmap_mode="c")
+
+    def test_same(self, tmpdir):
+        assert api.get_model_diff(self.rfc_model, self.rfc_model) == ""
+
+        copy = self.copy_model(self.rfc_model, tmpdir)
+        assert api.get_model_diff(self.rfc_model, copy) == ""
+
+    def test_changes(self, tmpdir):
+        new_model = self.copy_model(self.rfc_model, tmpdir)
+        tree = new_model.estimators_[1].tree_
+
+        tree.threshold[2] = 4.75
+        tree.value[7] = [[0.0, 30.0, 10.0]]
+
+        result = api.get_model_diff(self.rfc_model, new_model)
+        expected = """
+
+Diff for Decision Tree 1
+
+     node=2: go to node 3 if feature 2 <= 4.75 else to node 4. \
+(was: go to node 3 if feature 2 <= 4.85 else to node 4.)
+                    node=7 left node: scores = [[0.   0.75 0.25]] \
+(was: left node: scores = [[0. 0. 1.]])
+"""
+        assert result == expected.replace("\\\n", "")
+
+        result = api.get_model_diff(self.rfc_model, new_model,
+                                    normalize=False, precision=None,
+                                    names={2: "Petal Length"},
+                                    label_index=1, tab_size=1)
+
+        assert " node=2: go to node 3 if Petal Length <= 4.75" in result
+        assert ("    node=7 left node: score = 30.0 "
+                "(was: left node: score = ") in result
+
+    def test_replaced(self):
+        old_model = self.dtc_model
+        new_model = api.get_tree_at(self.rfc_model, 0)
+
+        result = api.get_model_diff(old_model, new_model)
+        lines = result.strip("\n").split("\n")
+
+        assert lines[0] == "Diff for Decision Tree 0"
+        assert lines[2] == ("node=0: go to node 1 if feature 0 <= 5.45 else "
+                            "to node 6. (was: go to node 1 if feature 3 <= "
+                            "0.8 else to node 2.)")
+
+        # The leaf at node 1 became a decision in the new tree.
+        assert lines[3] == ("     node=1: go to node 2 if feature 2 <= 2.6 "
+                            "else to node 3. (was: left node: scores = "
+                            "[[1. 0. 0.]])")
+        assert lines[4] == "          node=2 left node: scores = [[1. 0. 0.]]"
+
+        reverse = api.get_model_diff(new_model, old_model)
+        assert "node=1 left node: scores = [[1. 0. 0.]] (was: go to" in reverse
+
+    def test_estimator_counts(self):
+        result = api.get_model_diff(self.rfc_model, self.dtc_model)
+        assert result.endswith("\n\nDecision Tree 1 was removed\n")
+
+        result = api.get_model_diff(self.dtc_model, self.rfc_model)
+        n_nodes = self.rfc_model.estimators_[1].tree_.node_count
+
+        assert result.endswith("\n\nDecision Tree 1 was added with "
+                               "{n} nodes\n".format(n=n_nodes))
+
+    def test_buffer(self, tmpdir):
+        new_model = self.copy_model(self.dtc_model, tmpdir)
+        new_model.tree_.threshold[0] = 1.0
+
+        buffer = MockBuffer()
+        result = api.get_model_diff(self.dtc_model, new_model,
+                                    filepath_or_buffer=buffer)
+
+        assert result is None
+        assert "(was: go to node 1 if feature 3 <= 0.8" in buffer.read()
+
+        filepath = str(tmpdir.join("diff.txt"))
+        api.get_model_diff(self.dtc_model, new_model,
+                           filepath_or_buffer=filepath)
+
+        with open(filepath) as f:
+            assert f.read() == api.get_model_diff(self.dtc_model, new_model)
+
+    def test_label_index(self):
+        match = "is out of bounds on decision tree"
+        message = "Expected IndexError regarding the label index"
+
+        with pytest.raises(IndexError, match=match, message=message):
+            api.get_model_diff(self.dtc_model, self.dtc_model, label_index=3)
+
+
+class TestGetTreeTable(BaseApiTest):
+
+    min_args = ()
+
+    @staticmethod
+    def api_call(*args, **kwargs):
+        return api.get_tree_table(*args, **kwargs)
+
+    def test_basic(self):
+        result = self.api_call(self.dtc_model)
+        expected = {
+            "tree": [0, 0, 0, 0, 0],
+            "node": [0, 1, 2, 3, 4],
+            "depth": [0, 1, 1, 2, 2],
+            "is_leaf": [False, True, False, True, True],
+            "feature": [3, -2, 2, -2, -2],
+            "left": [1, -1, 3, -1, -1],
+            "right": [2, -1, 4, -1, -1],
+        }
+
+        for column, values in expected.items():
+            assert np.array_equal(result[column], np.array(values))
+
+        threshold = result["threshold"][[0, 2]].round(3)
+        assert np.array_equal(threshold, np.array([0.8, 4.95]))
+
+        value = result["value"][[1, 3, 4]].round(3)
+        expected = np.array([[[1.0, 0.0, 0.0]],
+                             [[0.0, 0.917, 0.083]],
+                             [[0.0, 0.026, 0.974]]])
+        assert np.array_equal(value, expected)
+
+    def test_ensemble(self):
+        result = self.api_call(self.rfc_model)
+        trees = self.rfc_model.estimators_
+
+        n_nodes = sum(tree.tree_.node_count for tree in trees)
+
+        for column in result.values():
+            assert column.shape[0] == n_nodes
+
+        for index, tree in enumerate(trees):
+            mask = result["tree"] == index
+
+            assert np.array_equal(result["node"][mask],
+                                  np.arange(tree.tree_.node_count))
+            assert np.array_equal(result["threshold"][mask],
+                                  tree.tree_.threshold)
+            assert np.array_equal(result["n_node_samples"][mask],
+                                  tree.tree_.n_node_samples)
+
+    def test_normalize(self):
+        result = self.api_call(self.dtc_model, normalize=False)
+        tree = self.dtc_model.tree_
+
+        assert np.array_equal(result["value"], tree.value)
+
+        result = self.api_call(self.dtc_model, normalize=True)
+        sums = result["value"].sum(axis=-1)
+
+        assert np.allclose(sums, 1.0)
+
+
+class TestGetNodeCoverage(BaseApiTest):
+
+    min_args = (np.array([]),)
+
+    data = np.random.RandomState(0).uniform(0, 7, size=(50, 4))
+
+    @staticmethod
+    def api_call(*args, **kwargs):
+        return api.get_node_coverage(*args, **kwargs)
+
+    @pytest.mark.parametrize("name", ["dtc", "etc", "rfc", "etsc"])
+    def test_counts(self, name):
+        model = getattr(self, name + "_model")
+        result = self.api_call(model, self.data)
+
+        trees = getattr(model, "estimators_", [model])
+        n_nodes = sum(tree.tree_.node_count for tree in trees)
+
+        for column in result.values():
+            assert column.shape[0] == n_nodes
+
+        for index, tree in enumerate(trees):
+            mask = result["tree"] == index
+            paths = tree.decision_path(self.data.astype(np.float32))
+
+            expected = np.asarray(paths.sum(axis=0)).ravel()
+            assert np.array_equal(result["count"][mask], expected)
+
+            assert result["count"][mask][0] == self.data.shape[0]
+            assert result["count"][mask & result["is_leaf"]].sum() == 50
+
+        assert np.allclose(result["fraction"], result["count"] / 50.0)
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 100])
+    @pytest.mark.parametrize("n_jobs", [None, 2])
+    def test_chunk_size(self, chunk_size, n_jobs):
+        expected = self.api_call(self.rfc_model, self.data)
+        result = self.api_call(self.rfc_model, self.data,
+                               chunk_size=chunk_size, n_jobs=n_jobs)
+
+        for column, values in expected.items():
+            assert np.array_equal(result[column], values)
+
+    def test_estimators(self):
+        expected = self.api_call(self.rfc_model, self.data)
+        result = self.api_call(self.rfc_model, self.data, estimators=[1])
+
+        mask = expected["tree"] == 1
+        assert np.array_equal(result["tree"], expected["tree"][mask])
+
+        for column, values in expected.items():
+            assert np.array_equal(result[column], values[mask])
+
+    def test_invalid_data(self):
+        match = "features"
+        message = "Expected ValueError regarding the number of features"
+
+        with pytest.raises(ValueError, match=match, message=message):
+            self.api_call(self.dtc_model, self.data[:, :2])
+
+    def test_tree_info(self):
+        coverage = self.api_call(self.dtc_model, self.data)
+        result = api.get_tree_info(self.dtc_model, coverage=coverage)
+
+        counts = coverage["count"]
+        expected = api.get_tree_info(self.dtc_model)
+
+        assert "node=0 (rows = 50): go to node 1" in result
+        assert "node=1 (rows = {count}) left node".format(
+            count=counts[1]) in result
+        assert result.count("rows = ") == 5
+
+        assert re.sub(r" \(rows = \d+\)", "", result) == expected
+
+    def test_tree_info_mismatch(self):
+        coverage = self.api_call(self.rfc_model, self.data, estimators=[0])
+
+        match = "The coverage does not cover decision tree 1"
+        message = "Expected ValueError regarding the coverage"
+
+        with pytest.raises(ValueError, match=match, message=message):
+            api.get_tree_info(self.rfc_model, coverage=coverage)
+
+
+class TestGetFeatureUsage(BaseApiTest):
+
+    min_args = ()
+
+    @staticmethod
+    def api_call(*args, **kwargs):
+        return api.get_feature_usage(*args, **kwargs)
+
+    def test_basic(self):
+        result = self.api_call(self.dtc_model)
+
+        assert np.array_equal(result["feature"], np.arange(4))
+        assert list(result["name"]) == ["feature 0", "feature 1",
+                                        "feature 2", "feature 3"]
+        assert np.array_equal(result["n_splits"], np.array([0, 0, 1, 1]))
+        assert np.array_equal(result["n_trees"], np.array([0, 0, 1, 1]))
+
+        n_node_samples = self.dtc_model.tree_.n_node_samples
+        expected = np.array([0, 0, n_node_samples[2], n_node_samples[0]])
+
+        assert np.array_equal(result["n_node_samples"], expected)
+        assert np.allclose(result["sample_usage"],
+                           expected / float(n_node_samples[0]))
+
+        thresholds = [np.round(cutoffs, 3) for cutoffs in result["thresholds"]]
+        assert [cutoffs.tolist() for cutoffs in thresholds] == [
+            [], [], [4.95], [0.8]]
+
+    @pytest.mark.parametrize("name", ["rfc", "rfr", "etsc", "etsr"])
+    def test_ensemble(self, name):
+        model = getattr(self, name + "_model")
+        result = self.api_call(model)
+        table = api.get_tree_table(model)
+
+        splits = ~table["is_leaf"]
+        features = table["feature"][splits]
+
+        for feature in result["feature"]:
+            mask = features == feature
+            thresholds = table["threshold"][splits][mask]
+
+            assert result["n_splits"][feature] == mask.sum()
+            assert result["n_trees"][feature] == len(
+                np.unique(table["tree"][splits][mask]))
+            assert result["n_node_samples"][feature] == (
+                table["n_node_samples"][splits][mask].sum())
+            assert np.array_equal(result["thresholds"][feature],
+                                  np.sort(thresholds))
+
+    def test_names(self):
+        names = {2: "Petal Length", 3: "Petal Width"}
+        result = self.api_call(self.dtc_model, names=names)
+
+        assert list(result["name"]) == ["feature 0", "feature 1",
+                                        "Petal Length", "Petal Width"]
+
+    def test_estimators(self):
+        tree = self.rfc_model.estimators_[1]
+
+        expected = self.api_call(tree)
+        result = self.api_call(self.rfc_model, estimators=1)
+
+        for column in ("n_splits", "n_trees", "n_node_samples"):
+            assert np.array_equal(result[column], expected[column])
+
+
+class TestGetContributions(BaseApiTest):
+
+    min_args = (np.array([]),)
+
+    @staticmethod
+    def api_call(*args, **kwargs):
+        return api.get_contributions(*args, **kwargs)
+
+    @staticmethod
+    def get_data(name):
+        n_features = 1 if name == "dtr" else 4
+        return np.random.RandomState(0).uniform(0, 7, size=(30, n_features))
+
+    @pytest.mark.parametrize("name", ["dtc", "dtr", "etc", "etr",
+                                      "rfc", "rfr", "etsc", "etsr"])
+    def test_decomposition(self, name):
+        model = getattr(self, name + "_model")
+        data = self.get_data(name)
+
+        result = self.api_call(model, data)
+
+        if hasattr(model, "predict_proba"):
+            expected = model.predict_proba(data)
+        else:
+            expected = model.predict(data)
+
+        prediction = result["prediction"]
+        n_features = data.shape[1]
+
+        assert prediction.shape[0] == data.shape[0]
+        assert result["bias"].shape == prediction.shape
+        assert result["contributions"].shape == (
+            (data.shape[0], n_features) + prediction.shape[1:])
+
+        assert np.allclose(prediction.reshape(expected.shape), expected)
+        assert np.allclose(result["bias"] + result["contributions"].sum(
+            axis=1), prediction)
+
+    def test_single_tree(self):
+        data = np.array([[5.8, 2.8, 5.1, 2.4]])
+        result = self.api_call(self.dtc_model, data)
+
+        tree = self.dtc_model.tree_
+        values = tree.value / tree.value.sum(axis=-1, keepdims=True)
+
+        # The row goes from the root to node 2 on feature 3,
+        # and then to node 4 on feature 2.
+        contributions = np.zeros((1, 4, 1, 3))
+        contributions[0, 3] = values[2] - values[0]
+        contributions[0, 2] = values[4] - values[2]
+
+        assert np.allclose(result["bias"][0], values[0])
+        assert np.allclose(result["contributions"], contributions)
+
+    def test_forest_average(self):
+        data = self.get_data("rfc")
+        result = self.api_call(self.rfc_model, data)
+
+        trees = [self.api_call(self.rfc_model, data, estimators=index)
+                 for index in range(len(self.rfc_model.estimators_))]
+
+        for column, values in result.items():
+            expected = np.mean([tree[column] for tree in trees], axis=0)
+            assert np.allclose(values, expected)
+
+    @pytest.mark.parametrize("chunk_size", [1, 7])
+    @pytest.mark.parametrize("n_jobs", [None, 2])
+    def test_chunk_size(self, chunk_size, n_jobs):
+        data = self.get_data("etsr")
+
+        expected = self.api_call(self.etsr_model, data)
+        result = self.api_call(self.etsr_model, data,
+                               chunk_size=chunk_size, n_jobs=n_jobs)
+
+        for column, values in expected.items():
+            assert np.allclose(result[column], values)
+
+
 class TestGetDecisionInfo(BaseApiTest):
 
     min_args = (np.array([]),)
@@ -718,6 +1397,20 @@ Decision Path for Tree 0:
 """
         assert result == expected
 
+    @pytest.mark.parametrize("compiled", [False, True])
+    def test_float32(self, compiled):
+        data = np.array([[5.8, 2.8, -0.501, 2.4]], dtype=np.float32)
+        result = self.api_call(self.dtc_model, data, precision=None,
+                               compiled=compiled)
+        expected = """\
+
+Decision Path for Tree 0:
+     Decision ID Node 0 : Feature 3 Score = 2.4000000953674316 > 0.800000011920929
+     Decision ID Node 2 : Feature 2 Score = -0.5009999871253967 <= 4.949999809265137
+     Decision ID Node 3 : Scores = [0.         0.91666667 0.08333333]
+"""  # noqa
+        assert result == expected
+
     def test_names(self):
         names = {0: "Sepal Length", 1: "Sepal Width",
                  2: "Petal Length", 3: "Petal Width"}
@@ -797,3 +1490,274 @@ Decision Path for Tree 0:
         # is not returned to the user.
         assert result is None
         assert buffer.read() == expected
+
+    def test_wrong_features(self):
+        data = np.array([[5.8, 2.8, 5.1]])
+
+        match = "Number of features of the model must match the input"
+        message = "Expected ValueError regarding the number of features"
+
+        with pytest.raises(ValueError, match=match, message=message):
+            self.api_call(self.dtc_model, data)
+
+    @pytest.mark.parametrize("name", ["dtc", "dtr", "etc", "etr",
+                                      "rfc", "rfr", "etsc", "etsr"])
+    def test_compiled(self, name):
+        model = getattr(self, name + "_model")
+        n_features = getattr(self, name + "_data").shape[1]
+
+        # Values rounded to one decimal lie close to many of the
+        # thresholds, which checks that the same signs are displayed.
+        data = np.random.RandomState(0).uniform(0, 7, size=(20, n_features))
+        data = data.round(1)
+
+        for row in range(data.shape[0]):
+            expected = self.api_call(model, data[row:row + 1])
+            result = self.api_call(model, data[row:row + 1], compiled=True)
+
+            assert result == expected
+
+    def test_compiled_options(self):
+        names = {2: "Petal Length", 3: "Petal Width"}
+        kwargs = dict(precision=1, names=names, label_index=2, tab_size=2)
+
+        for options in ({}, kwargs, dict(kwargs, precision=None)):
+            expected = self.api_call(self.rfc_model, self.rfc_data, **options)
+            result = self.api_call(self.rfc_model, self.rfc_data,
+                                   compiled=True, **options)
+
+            assert result == expected
+
+    def test_compiled_cache(self, monkeypatch):
+        calls = []
+        compile_explainer = api.codegen.compile_explainer
+
+        def counted(*args):
+            calls.append(args)
+            return compile_explainer(*args)
+
+        monkeypatch.setattr(api.codegen, "compile_explainer", counted)
+        api.clear_cache()
+
+        for _ in range(3):
+            self.api_call(self.dtc_model, self.dtc_data, compiled=True)
+
+        assert len(calls) == 1
+
+        self.api_call(self.dtc_model, self.dtc_data, compiled=True,
+                      precision=2)
+        assert len(calls) == 2
+
+    def test_compiled_large_forest(self, monkeypatch):
+        calls = []
+        compile_explainer = api.codegen.compile_explainer
+
+        def counted(*args):
+            calls.append(args)
+            return compile_explainer(*args)
+
+        # The forest has more trees than the tree cache can hold.
+        model = make_large_forest(self.rfc_model, n_estimators=150)
+        data = self.rfc_data
+
+        monkeypatch.setattr(api.codegen, "compile_explainer", counted)
+        api.clear_cache()
+
+        expected = self.api_call(model, data, compiled=True)
+        assert len(calls) == 150
+        assert expected == self.api_call(model, data)
+
+        assert self.api_call(model, data, compiled=True) == expected
+        assert len(calls) == 150
+
+        api.clear_cache()
+
+
+class TestIterDecisionInfo(BaseApiTest):
+
+    min_args = (np.array([]),)
+
+    dtr_data = np.array([[5.8], [0.3], [3.5]])
+    iris_data = np.array([[5.8, 2.8, 5.1, 2.4],
+                          [5.0, 3.6, 1.4, 0.2],
+                          [6.4, 3.2, 4.5, 1.5],
+                          [7.7, 2.6, 6.9, 2.3]])
+
+    @staticmethod
+    def api_call(*args, **kwargs):
+        return list(api.iter_decision_info(*args, **kwargs))
+
+    @pytest.mark.parametrize("name", ["dtc", "dtr", "etc", "etr",
+                                      "rfc", "rfr", "etsc", "etsr"])
+    @pytest.mark.parametrize("chunk_size", [None, 1, 3])
+    def test_matches_get_decision_info(self, name, chunk_size):
+        model = getattr(self, name + "_model")
+        data = self.dtr_data if name == "dtr" else self.iris_data
+
+        result = self.api_call(model, data, chunk_size=chunk_size)
+        expected = [api.get_decision_info(model, data[[row]])
+                    for row in range(data.shape[0])]
+        assert result == expected
+
+    @pytest.mark.parametrize("n_jobs", [None, 2])
+    def test_estimators(self, n_jobs):
+        estimators = [1, 1, 0]
+        full = self.api_call(self.rfc_model, self.iris_data)
+
+        result = self.api_call(self.rfc_model, self.iris_data,
+                               estimators=estimators, n_jobs=n_jobs)
+
+        for output, expected in zip(result, full):
+            paths = expected.split("\nDecision Path for Tree ")[1:]
+            assert output == "".join("\nDecision Path for Tree " +
+                                     paths[index] for index in estimators)
+
+        expected = api.get_decision_info(self.rfc_model, self.iris_data[:1],
+                                         estimators=estimators)
+        assert result[0] == expected
+
+    @pytest.mark.parametrize("name", ["dtc", "rfc", "etsc", "etsr"])
+    @pytest.mark.parametrize("n_jobs", [2, -1])
+    def test_n_jobs(self, name, n_jobs):
+        model = getattr(self, name + "_model")
+
+        result = self.api_call(model, self.iris_data, n_jobs=n_jobs)
+        expected = self.api_call(model, self.iris_data)
+        assert result == expected
+
+        data = self.iris_data[[0]]
+        result = api.get_decision_info(model, data, n_jobs=n_jobs)
+        expected = api.get_decision_info(model, data)
+        assert result == expected
+
+    def test_options(self):
+        names = {0: "Sepal Length", 1: "Sepal Width",
+                 2: "Petal Length", 3: "Petal Width"}
+        kwargs = dict(precision=2, names=names, label_index=2, tab_size=2)
+
+        result = self.api_call(self.rfc_model, self.iris_data, **kwargs)
+        expected = [api.get_decision_info(self.rfc_model,
+                                          self.iris_data[[row]], **kwargs)
+                    for row in range(self.iris_data.shape[0])]
+        assert result == expected
+
+    def test_label_index(self):
+        label_index = 10
+
+        match = "is out of bounds on decision tree"
+        message = "Expected IndexError regarding no support"
+
+        with pytest.raises(IndexError, match=match, message=message):
+            self.api_call(self.dtc_model, self.iris_data,
+                          label_index=label_index)
+
+
+def test_cache():
+    model = BaseApiTest.load_model("rfc-model.pickle")
+    n_estimators = len(model.estimators_)
+
+    api.clear_cache()
+    expected = api.get_tree_info(model)
+
+    cache_info = api.get_cache_info()
+    assert cache_info.misses == n_estimators
+    assert cache_info.hits == 0
+
+    # The topology of the trees should now be reused.
+    assert api.get_tree_info(model) == expected
+
+    cache_info = api.get_cache_info()
+    assert cache_info.misses == n_estimators
+    assert cache_info.hits == n_estimators
+
+    # The formatted output should not outlive the call.
+    for estimator in model.estimators_:
+        state = utils.get_tree_state(estimator)
+        assert not {"thresholds", "scores"} & set(state._tables)
+
+    data = TestGetDecisionInfo.rfc_data
+    api.get_decision_info(model, data, compiled=True)
+    api.get_decision_info(model, data)
+    api.get_decision_info(model, data, precision=1)
+
+    # Decisions only keep the strings of the nodes on their
+    # paths, and only for the most recent options.
+    for estimator in model.estimators_:
+        state = utils.get_tree_state(estimator)
+        n_nodes = estimator.decision_path(data).indices.shape[0]
+
+        precision, cutoffs = state._tables["decision_thresholds"]
+        assert precision == 1
+        assert len(cutoffs) == n_nodes - 1
+
+        key, scores = state._tables["decision_scores"]
+        assert key == ("predict_proba", 1, None)
+        assert len(scores) == 1
+
+    api.clear_cache()
+    assert api.get_cache_info().currsize == 0
+
+
+def make_large_forest(model, n_estimators):
+    # Copies of the estimators are distinct estimators for the cache.
+    model = copy.deepcopy(model)
+    model.estimators_ = [copy.deepcopy(model.estimators_[i % 2])
+                         for i in range(n_estimators)]
+    model.n_estimators = n_estimators
+
+    return model
+
+
+def test_cache_size():
+    model = make_large_forest(BaseApiTest.load_model("rfc-model.pickle"),
+                              n_estimators=200)
+    api.clear_cache()
+
+    try:
+        # The forest is larger than the default size but still fits.
+        api.get_tree_info(model)
+        api.get_tree_info(model)
+
+        cache_info = api.get_cache_info()
+        assert cache_info.maxsize == 128
+        assert cache_info.hits == 200
+
+        # A smaller size does not evict the trees of a live forest...
+        api.set_cache_size(10)
+        assert api.get_cache_info().currsize == 200
+
+        # ...but disabling the cache does.
+        api.set_cache_size(0)
+        assert api.get_cache_info().currsize == 0
+    finally:
+        api.set_cache_size(128)
+        api.clear_cache()
+
+    match = "maxsize must be non-negative"
+    message = "Expected ValueError regarding the cache size"
+
+    with pytest.raises(ValueError, match=match, message=message):
+        api.set_cache_size(-1)
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7),
+                    reason="Imports are only deferred on Python 3.7+")
+def test_lazy_import():
+    code = ("import sys, tree_decode; "
+            "assert 'sklearn.ensemble' not in sys.modules; "
+            "assert 'tree_decode.api' not in sys.modules; "
+            "assert callable(tree_decode.get_tree_info); "
+            "assert 'sklearn.ensemble' not in sys.modules")
+    subprocess.check_call([sys.executable, "-c", code])
+
+
+def test_all():
+    import tree_decode
+
+    assert set(api.__all__) <= set(tree_decode.__all__)
+
+    for name in tree_decode.__all__:
+        assert hasattr(tree_decode, name)
+
+    with pytest.raises(AttributeError, match="no attribute"):
+        getattr(tree_decode, "missing")
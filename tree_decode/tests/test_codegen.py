@@ -0,0 +1,79 @@
+from tree_decode.codegen import MAX_DEPTH, compile_explainer
+from tree_decode.export import TreeArrays
+
+import numpy as np
+
+
+def make_chain_tree(depth):
+    # Each split sends values up to its threshold to a leaf on the left.
+    n_nodes = 2 * depth + 1
+    splits = np.arange(0, n_nodes - 1, 2)
+
+    children_left = np.full(n_nodes, -1, dtype=np.intp)
+    children_right = np.full(n_nodes, -1, dtype=np.intp)
+    children_left[splits] = splits + 1
+    children_right[splits] = splits + 2
+
+    feature = np.full(n_nodes, -2, dtype=np.intp)
+    feature[splits] = 0
+
+    threshold = np.full(n_nodes, -2.0)
+    threshold[splits] = np.arange(splits.shape[0], dtype=np.float64)
+
+    arrays = {
+        "children_left": children_left,
+        "children_right": children_right,
+        "feature": feature,
+        "threshold": threshold,
+        "n_node_samples": np.ones(n_nodes, dtype=np.intp),
+        "value": np.ones((n_nodes, 1, 1)),
+    }
+
+    return TreeArrays(arrays, n_features=1, n_classes=[1])
+
+
+def compile_tree(tree):
+    node_lines = {}
+    leaf_lines = {}
+
+    for node_id in range(tree.node_count):
+        if tree.children_left[node_id] == tree.children_right[node_id]:
+            leaf_lines[node_id] = "leaf {node}\n".format(node=node_id)
+        else:
+            node_lines[node_id] = ("node {node}: ".format(node=node_id),
+                                   " <=\n", " >\n")
+
+    return compile_explainer(tree, node_lines, leaf_lines, "start\n")
+
+
+class TestCompileExplainer(object):
+
+    def test_explain(self):
+        explain = compile_tree(make_chain_tree(3))
+        scores = {0: "x"}
+
+        assert explain([-1.0], [-1.0], scores) == (
+            "start\nnode 0: x <=\nleaf 1\n")
+        assert explain([1.5], [1.5], scores) == (
+            "start\nnode 0: x >\nnode 2: x >\nnode 4: x <=\nleaf 5\n")
+        assert explain([9.0], [9.0], scores) == (
+            "start\nnode 0: x >\nnode 2: x >\nnode 4: x >\nleaf 6\n")
+
+    def test_signs(self):
+        explain = compile_tree(make_chain_tree(1))
+
+        # The row decides the path, while the values decide the signs.
+        assert explain([0.0], [0.5], {0: "x"}) == (
+            "start\nnode 0: x >\nleaf 1\n")
+
+    def test_quoting(self):
+        tree = make_chain_tree(1)
+        node_lines = {0: ("'\"\\ ", "\n<= '", "\n> \"")}
+        leaf_lines = {1: "'", 2: "\""}
+
+        explain = compile_explainer(tree, node_lines, leaf_lines, "\\")
+        assert explain([0.0], [0.0], {0: "x"}) == "\\'\"\\ x\n<= ''"
+
+    def test_max_depth(self):
+        assert compile_tree(make_chain_tree(MAX_DEPTH)) is not None
+        assert compile_tree(make_chain_tree(MAX_DEPTH + 1)) is None
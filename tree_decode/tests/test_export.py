@@ -0,0 +1,135 @@
+from tree_decode.tests.utils import (MODEL_NAMES, load_test_model,
+                                     get_test_data)
+from tree_decode.export import (export_model, import_model,
+                                MappedForest, MappedTree)
+from sklearn.exceptions import NotFittedError
+
+import tree_decode.api as api
+import tree_decode.utils as utils
+import numpy as np
+import pytest
+
+
+class TestExportModel(object):
+
+    @classmethod
+    def setup_class(cls):
+        cls.models = dict((name, load_test_model(name))
+                          for name in MODEL_NAMES)
+
+    def export_and_import(self, name, tmpdir):
+        filepath = str(tmpdir.join(name + ".tdecode"))
+        export_model(self.models[name], filepath)
+
+        return import_model(filepath)
+
+    @pytest.mark.parametrize("name", MODEL_NAMES)
+    def test_model_type(self, name, tmpdir):
+        model = self.models[name]
+        mapped = self.export_and_import(name, tmpdir)
+
+        if utils.is_forest(model):
+            assert isinstance(mapped, MappedForest)
+            assert len(mapped.estimators_) == len(model.estimators_)
+        else:
+            assert isinstance(mapped, MappedTree)
+
+        assert utils.is_tree(mapped) or utils.is_forest(mapped)
+        assert (hasattr(mapped, "predict_proba") ==
+                hasattr(model, "predict_proba"))
+
+    @pytest.mark.parametrize("name", MODEL_NAMES)
+    def test_tree_arrays(self, name, tmpdir):
+        model = self.models[name]
+        mapped = self.export_and_import(name, tmpdir)
+
+        for estimator, mapped_estimator in zip(utils.get_estimators(model),
+                                               utils.get_estimators(mapped)):
+            tree = estimator.tree_
+            mapped_tree = mapped_estimator.tree_
+
+            assert isinstance(mapped_tree.threshold, np.memmap)
+            assert mapped_tree.node_count == tree.node_count
+            assert mapped_tree.n_features == tree.n_features
+
+            for name in ["children_left", "children_right", "feature",
+                         "threshold", "n_node_samples", "value"]:
+                assert np.array_equal(getattr(mapped_tree, name),
+                                      getattr(tree, name))
+
+    @pytest.mark.parametrize("name", MODEL_NAMES)
+    def test_get_tree_info(self, name, tmpdir):
+        model = self.models[name]
+        mapped = self.export_and_import(name, tmpdir)
+
+        for kwargs in [{}, dict(normalize=False, precision=None),
+                       dict(label_index=0)]:
+            result = api.get_tree_info(mapped, **kwargs)
+            expected = api.get_tree_info(model, **kwargs)
+            assert result == expected
+
+    @pytest.mark.parametrize("name", MODEL_NAMES)
+    def test_get_decision_info(self, name, tmpdir):
+        model = self.models[name]
+        mapped = self.export_and_import(name, tmpdir)
+        data = get_test_data(name)
+
+        result = api.get_decision_info(mapped, data[[0]])
+        expected = api.get_decision_info(model, data[[0]])
+        assert result == expected
+
+        result = list(api.iter_decision_info(mapped, data))
+        expected = list(api.iter_decision_info(model, data))
+        assert result == expected
+
+    @pytest.mark.parametrize("name", MODEL_NAMES)
+    def test_predict(self, name, tmpdir):
+        model = self.models[name]
+        mapped = self.export_and_import(name, tmpdir)
+        data = get_test_data(name)
+
+        assert np.allclose(mapped.predict(data), model.predict(data))
+
+        if hasattr(model, "predict_proba"):
+            assert np.allclose(mapped.predict_proba(data),
+                               model.predict_proba(data))
+
+        for estimator, mapped_estimator in zip(utils.get_estimators(model),
+                                               utils.get_estimators(mapped)):
+            assert np.array_equal(mapped_estimator.apply(data),
+                                  estimator.apply(data))
+
+            indicator = mapped_estimator.decision_path(data)
+            expected = estimator.decision_path(data)
+            assert (indicator != expected).nnz == 0
+
+    def test_unfitted(self, tree, tmpdir):
+        match = "instance is not fitted yet"
+        message = "Expected NotFittedError regarding fitting"
+
+        filepath = str(tmpdir.join("model.tdecode"))
+
+        with pytest.raises(NotFittedError, match=match, message=message):
+            export_model(tree(), filepath)
+
+    def test_unsupported(self, tmpdir):
+        match = "Function support is not implemented for"
+        message = "Expected NotImplementedError regarding no support"
+
+        filepath = str(tmpdir.join("model.tdecode"))
+
+        with pytest.raises(NotImplementedError, match=match, message=message):
+            export_model([], filepath)
+
+
+def test_import_invalid(tmpdir):
+    filepath = str(tmpdir.join("model.tdecode"))
+
+    with open(filepath, "wb") as f:
+        f.write(b"not a model")
+
+    match = "is not an exported tree-based model"
+    message = "Expected ValueError regarding the file format"
+
+    with pytest.raises(ValueError, match=match, message=message):
+        import_model(filepath)
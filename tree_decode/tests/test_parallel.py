@@ -0,0 +1,84 @@
+from tree_decode.tests.utils import load_test_model
+
+import tree_decode.parallel as parallel
+import tree_decode.api as api
+import numpy as np
+import pytest
+import sys
+
+requires_shared_memory = pytest.mark.skipif(
+    sys.version_info < (3, 8), reason="Shared memory requires Python 3.8+")
+
+
+class TestCheckBackend(object):
+
+    @pytest.mark.parametrize("backend", ["threads", "processes"])
+    def test_supported(self, backend):
+        if backend == "processes" and sys.version_info < (3, 8):
+            pytest.skip("Shared memory requires Python 3.8+")
+
+        parallel.check_backend(backend)
+
+    def test_unsupported(self):
+        with pytest.raises(ValueError, match="backend must be one of"):
+            parallel.check_backend("dask")
+
+
+class TestGetShards(object):
+
+    items = [(10, "a"), (11, "b"), (12, "c"), (13, "d")]
+
+    def test_balanced(self):
+        shards = parallel.get_shards(self.items, [5, 5, 5, 5], 2)
+        assert shards == [[(10, 0), (11, 1)], [(12, 2), (13, 3)]]
+
+    def test_unbalanced(self):
+        shards = parallel.get_shards(self.items, [30, 1, 1, 1], 2)
+        assert shards == [[(10, 0)], [(11, 1), (12, 2), (13, 3)]]
+
+    def test_more_shards_than_items(self):
+        shards = parallel.get_shards(self.items[:2], [5, 5], 8)
+        assert shards == [[(10, 0)], [(11, 1)]]
+
+
+def test_publish():
+    model = load_test_model("rfc")
+    trees = [estimator.tree_ for estimator in model.estimators_]
+
+    layout = parallel.get_layout(trees)
+    buf = bytearray(layout["size"])
+    parallel.publish(trees, layout, buf)
+
+    arrays = parallel._get_arrays(layout, buf)
+    start = 0
+
+    for tree in trees:
+        stop = start + tree.node_count
+
+        for name in ("children_left", "children_right", "feature",
+                     "threshold", "value"):
+            assert np.array_equal(arrays[name][start:stop],
+                                  getattr(tree, name))
+
+        start = stop
+
+
+@requires_shared_memory
+@pytest.mark.parametrize("name", ["dtc", "rfc", "etsc", "etsr"])
+def test_processes(name):
+    model = load_test_model(name)
+    expected = api.get_tree_info(model, precision=2)
+
+    result = api.get_tree_info(model, precision=2, n_jobs=2,
+                               backend="processes")
+    assert result == expected
+
+    profiler = api.Profiler()
+    result = "".join(api.iter_tree_info(model, precision=2, n_jobs=2,
+                                        backend="processes",
+                                        profiler=profiler))
+    assert result == expected
+
+    summary = profiler.summary()
+    assert summary["publish"].calls == 1
+    assert summary["render"].chars == len(expected)
@@ -0,0 +1,194 @@
+from tree_decode.tests.utils import (MODEL_NAMES, load_test_model,
+                                     get_test_data)
+from tree_decode.paths import DecisionPaths, load_decision_paths
+
+import tree_decode.api as api
+import tree_decode.utils as utils
+import numpy as np
+import pytest
+
+
+class TestGetDecisionPaths(object):
+
+    @classmethod
+    def setup_class(cls):
+        cls.models = dict((name, load_test_model(name))
+                          for name in MODEL_NAMES)
+
+    @pytest.mark.parametrize("name", MODEL_NAMES)
+    def test_paths(self, name):
+        model = self.models[name]
+        data = get_test_data(name)
+
+        result = api.get_decision_paths(model, data)
+        estimators = utils.get_estimators(model)
+
+        assert isinstance(result, DecisionPaths)
+        assert len(result) == data.shape[0]
+        assert result.n_trees == len(estimators)
+        assert result.indices.dtype == np.int32
+
+        for row in range(data.shape[0]):
+            tree_paths = result.get_row(row)
+            assert [index for index, _, _ in tree_paths] == list(
+                range(len(estimators)))
+
+            for index, node_ids, values in tree_paths:
+                tree = estimators[index].tree_
+                expected = utils.get_decision_path(
+                    tree, data[row].astype(np.float32))
+
+                assert np.array_equal(node_ids, np.array(expected))
+
+                features = tree.feature[node_ids]
+                assert np.isnan(values[-1])
+                assert np.array_equal(values[:-1],
+                                      data[row, features[:-1]])
+
+    def test_csr(self):
+        model = self.models["rfc"]
+        data = get_test_data("rfc")
+
+        result = api.get_decision_paths(model, data).to_csr()
+        expected, n_nodes_ptr = model.decision_path(data)
+
+        assert result.shape == expected.shape
+        assert (result != expected).nnz == 0
+
+    @pytest.mark.parametrize("chunk_size", [1, 6, 100])
+    @pytest.mark.parametrize("n_jobs", [None, 2])
+    def test_chunk_size(self, chunk_size, n_jobs):
+        model = self.models["etsc"]
+        data = get_test_data("etsc")
+
+        expected = api.get_decision_paths(model, data)
+        result = api.get_decision_paths(model, data, chunk_size=chunk_size,
+                                        n_jobs=n_jobs)
+
+        for name in ("indptr", "indices", "values", "tree_offsets",
+                     "estimators"):
+            np.testing.assert_array_equal(getattr(result, name),
+                                          getattr(expected, name))
+
+    def test_estimators(self):
+        model = self.models["rfc"]
+        data = get_test_data("rfc")
+
+        result = api.get_decision_paths(model, data, estimators=[1])
+        tree = model.estimators_[1].tree_
+
+        assert np.array_equal(result.estimators, np.array([1]))
+        assert np.array_equal(result.tree_offsets,
+                              np.array([0, tree.node_count]))
+
+        for row in range(data.shape[0]):
+            (index, node_ids, _), = result.get_row(row)
+            assert index == 1
+
+    def test_get_row(self):
+        data = get_test_data("dtc", n_rows=3)
+        result = api.get_decision_paths(self.models["dtc"], data)
+
+        assert np.array_equal(result.get_row(-1)[0][1],
+                              result.get_row(2)[0][1])
+
+        match = "Row 3 is out of bounds on paths of 3 rows"
+        message = "Expected IndexError regarding the row"
+
+        with pytest.raises(IndexError, match=match, message=message):
+            result.get_row(3)
+
+
+class TestGetPathInfo(object):
+
+    @classmethod
+    def setup_class(cls):
+        cls.models = dict((name, load_test_model(name))
+                          for name in MODEL_NAMES)
+
+    @pytest.mark.parametrize("name", MODEL_NAMES)
+    def test_path_info(self, name):
+        model = self.models[name]
+        data = get_test_data(name)
+
+        decision_paths = api.get_decision_paths(model, data)
+        expected = list(api.iter_decision_info(model, data))
+
+        for row in range(data.shape[0]):
+            result = api.get_path_info(model, decision_paths, row)
+            assert result == expected[row]
+
+    def test_options(self):
+        model = self.models["rfc"]
+        data = get_test_data("rfc", n_rows=3)
+
+        names = {0: "Sepal Length", 2: "Petal Length"}
+        kwargs = dict(precision=1, names=names, label_index=2, tab_size=2,
+                      estimators=slice(1, None))
+
+        decision_paths = api.get_decision_paths(
+            model, data, estimators=kwargs.pop("estimators"))
+        expected = list(api.iter_decision_info(
+            model, data, estimators=slice(1, None), **kwargs))
+
+        for row in range(data.shape[0]):
+            result = api.get_path_info(model, decision_paths, row, **kwargs)
+            assert result == expected[row]
+
+    def test_model_mismatch(self):
+        data = get_test_data("rfc", n_rows=3)
+        decision_paths = api.get_decision_paths(self.models["rfc"], data)
+
+        match = "The decision paths were not computed with this model"
+        message = "Expected ValueError regarding the model"
+
+        with pytest.raises(ValueError, match=match, message=message):
+            api.get_path_info(self.models["dtc"], decision_paths, 0)
+
+
+class TestSaveDecisionPaths(object):
+
+    @pytest.mark.parametrize("name", ["dtc", "rfc", "etsr"])
+    def test_round_trip(self, name, tmpdir):
+        model = load_test_model(name)
+        data = get_test_data(name)
+
+        decision_paths = api.get_decision_paths(model, data)
+        filepath = str(tmpdir.join(name + ".tdpaths"))
+
+        decision_paths.save(filepath)
+        loaded = load_decision_paths(filepath)
+
+        assert isinstance(loaded.indices, np.memmap)
+
+        for array in ("indptr", "indices", "values", "tree_offsets",
+                      "estimators"):
+            np.testing.assert_array_equal(getattr(loaded, array),
+                                          getattr(decision_paths, array))
+
+        for row in range(data.shape[0]):
+            assert (api.get_path_info(model, loaded, row) ==
+                    api.get_path_info(model, decision_paths, row))
+
+    def test_empty(self, tmpdir):
+        model = load_test_model("dtc")
+        decision_paths = api.get_decision_paths(model, np.zeros((0, 4)))
+
+        assert len(decision_paths) == 0
+
+        filepath = str(tmpdir.join("empty.tdpaths"))
+        decision_paths.save(filepath)
+
+        assert len(load_decision_paths(filepath)) == 0
+
+    def test_invalid_file(self, tmpdir):
+        filepath = str(tmpdir.join("invalid.tdpaths"))
+
+        with open(filepath, "wb") as f:
+            f.write(b"not decision paths")
+
+        match = "does not contain saved decision paths"
+        message = "Expected ValueError regarding the file"
+
+        with pytest.raises(ValueError, match=match, message=message):
+            load_decision_paths(filepath)
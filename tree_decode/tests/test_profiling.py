@@ -0,0 +1,147 @@
+from tree_decode.tests.utils import load_test_model, MockBuffer
+from tree_decode.profiling import Profiler, StageStats
+
+import tree_decode.profiling as profiling
+import tree_decode.api as api
+import numpy as np
+import pytest
+
+TREE_INFO_STAGES = ["topology", "normalize", "format", "render"]
+DECISION_INFO_STAGES = ["decision_path", "scores", "render"]
+
+
+class TestProfiler(object):
+
+    def test_add(self):
+        profiler = Profiler()
+
+        profiler.add("render", 0.5, estimator=0, nodes=3, chars=10)
+        profiler.add("render", 0.25, estimator=0, nodes=2, chars=5)
+        profiler.add("write", 1.0)
+
+        assert profiler.stats == [StageStats(0, "render", 2, 0.75, 5, 15),
+                                  StageStats(None, "write", 1, 1.0, 0, 0)]
+
+    def test_summary(self):
+        profiler = Profiler()
+
+        profiler.add("topology", 1.0, estimator=0)
+        profiler.add("topology", 2.0, estimator=1)
+        profiler.add("render", 0.5, estimator=1, nodes=7)
+
+        summary = profiler.summary()
+
+        assert list(summary) == ["topology", "render"]
+        assert summary["topology"] == StageStats(None, "topology",
+                                                 2, 3.0, 0, 0)
+        assert summary["render"] == StageStats(None, "render", 1, 0.5, 7, 0)
+
+    def test_stage(self):
+        profiler = Profiler()
+        times = iter([1.0, 3.5])
+        profiler.timer = lambda: next(times)
+
+        with profiler.stage("scores", estimator=2) as stage:
+            stage.nodes = 4
+
+        assert profiler.stats == [StageStats(2, "scores", 1, 2.5, 4, 0)]
+        assert profiler.get_time(2) == 2.5
+        assert profiler.get_time(None) == 0
+
+    def test_null_stage(self):
+        with profiling.stage(None, "scores", 0) as stage:
+            stage.nodes = 4
+
+        assert stage.nodes == 0
+
+    def test_profile_lines(self):
+        profiler = Profiler()
+        lines = ["a\n", "bc\n"]
+
+        result = profiling.profile_lines(lines, profiler, 0)
+        assert list(result) == lines
+
+        stats, = profiler.stats
+        assert stats.stage == "render"
+        assert stats.chars == 5
+
+    def test_report(self):
+        profiler = Profiler()
+        profiler.add("render", 0.5, estimator=0, nodes=3, chars=10)
+
+        report = profiler.report().splitlines()
+        assert len(report) == 2
+        assert report[1].split() == ["-", "render", "1", "0.5000", "3", "10"]
+
+        report = profiler.report(per_estimator=True).splitlines()
+        assert report[1].split()[0] == "0"
+
+    def test_reset(self):
+        profiler = Profiler()
+        profiler.add("write", 1.0)
+        profiler.reset()
+
+        assert profiler.stats == []
+
+
+class TestApiProfiling(object):
+
+    @classmethod
+    def setup_class(cls):
+        cls.model = load_test_model("rfc")
+        cls.data = np.array([[5.8, 2.8, 5.1, 2.4],
+                             [5.0, 3.6, 1.4, 0.2]])
+
+    def setup_method(self):
+        api.clear_cache()
+
+    @pytest.mark.parametrize("n_jobs", [None, 2])
+    def test_tree_info(self, n_jobs):
+        profiler = api.Profiler()
+        buffer = MockBuffer()
+
+        expected = api.get_tree_info(self.model)
+        api.get_tree_info(self.model, filepath_or_buffer=buffer,
+                          profiler=profiler, n_jobs=n_jobs)
+        assert buffer.read() == expected
+
+        n_estimators = len(self.model.estimators_)
+        stats = profiler.stats
+
+        for index in range(n_estimators):
+            stages = [stat.stage for stat in stats if stat.estimator == index]
+            assert sorted(stages) == sorted(TREE_INFO_STAGES)
+
+        summary = profiler.summary()
+        n_nodes = sum(estimator.tree_.node_count
+                      for estimator in self.model.estimators_)
+
+        assert summary["topology"].nodes == n_nodes
+        assert summary["render"].chars == len(expected)
+        assert summary["write"].chars == len(expected)
+        assert all(stat.time >= 0 for stat in stats)
+
+    def test_decision_info(self):
+        profiler = api.Profiler()
+
+        expected = list(api.iter_decision_info(self.model, self.data))
+        result = list(api.iter_decision_info(self.model, self.data,
+                                             profiler=profiler))
+        assert result == expected
+
+        summary = profiler.summary()
+
+        assert list(summary) == DECISION_INFO_STAGES
+        assert summary["render"].chars == sum(len(output)
+                                              for output in expected)
+
+        paths = [estimator.decision_path(self.data).nnz
+                 for estimator in self.model.estimators_]
+        assert summary["decision_path"].nodes == sum(paths)
+
+    def test_single_row(self):
+        profiler = api.Profiler()
+
+        api.get_decision_info(self.model, self.data[:1], profiler=profiler)
+        assert list(profiler.summary()) == (["check_input"] +
+                                            DECISION_INFO_STAGES)
@@ -0,0 +1,71 @@
+import tree_decode.storage as storage
+import numpy as np
+import pytest
+
+MAGIC = b"TDTEST01"
+
+
+class TestLayOut(object):
+
+    def test_aligned(self):
+        arrays, size = storage.lay_out([("a", "<i8", [3]),
+                                        ("b", "<f4", [2, 5]),
+                                        ("c", "|u1", [0])])
+
+        assert arrays["a"] == {"dtype": "<i8", "shape": [3], "offset": 0}
+        assert arrays["b"] == {"dtype": "<f4", "shape": [2, 5],
+                               "offset": storage.ALIGNMENT}
+        assert arrays["c"]["offset"] == 2 * storage.ALIGNMENT
+        assert size == 2 * storage.ALIGNMENT
+
+    def test_view_arrays(self):
+        arrays, size = storage.lay_out([("a", "<i8", [3]),
+                                        ("b", "<f8", [2, 2])])
+
+        buf = np.zeros(size, dtype=np.uint8)
+        views = storage.view_arrays(buf, arrays)
+
+        views["a"][:] = [1, 2, 3]
+        views["b"][:] = [[0.5, 1.5], [2.5, 3.5]]
+
+        views = storage.view_arrays(buf, arrays)
+
+        assert np.array_equal(views["a"], np.array([1, 2, 3]))
+        assert np.array_equal(views["b"], np.array([[0.5, 1.5],
+                                                    [2.5, 3.5]]))
+
+
+class TestSaveArrays(object):
+
+    def test_round_trip(self, tmpdir):
+        first = np.arange(5, dtype=np.int64)
+        second = np.linspace(0, 1, 6).reshape(3, 2)
+
+        header = {"name": "test"}
+        header["arrays"], _ = storage.lay_out([("first", "<i8", [8]),
+                                               ("second", "<f8", [3, 2])])
+
+        # The parts of an array are written one after another.
+        chunks = [("first", [first, first[:3]]), ("second", [second])]
+        filepath = str(tmpdir.join("arrays.bin"))
+
+        storage.save_arrays(filepath, MAGIC, header, chunks)
+        loaded, arrays = storage.load_arrays(filepath, MAGIC)
+
+        assert loaded == header
+        assert isinstance(arrays["first"], np.memmap)
+
+        assert np.array_equal(arrays["first"], np.r_[first, first[:3]])
+        assert np.array_equal(arrays["second"], second)
+
+        for array in arrays.values():
+            assert array.ctypes.data % storage.ALIGNMENT == 0
+
+    @pytest.mark.parametrize("content", [b"", b"TDDIFF01", b"not arrays"])
+    def test_wrong_magic(self, content, tmpdir):
+        filepath = str(tmpdir.join("other.bin"))
+
+        with open(filepath, "wb") as f:
+            f.write(content)
+
+        assert storage.load_arrays(filepath, MAGIC) == (None, None)
@@ -0,0 +1,115 @@
+from tree_decode.tests.utils import (MODEL_NAMES, load_test_model,
+                                     get_test_data)
+from tree_decode.export import MappedTree, TreeArrays
+
+import tree_decode.traversal as traversal
+import tree_decode.utils as utils
+import numpy as np
+import pytest
+
+
+def make_deep_tree(n_leaves):
+    # Each split sends values below its threshold to a leaf on the left.
+    n_nodes = 2 * n_leaves - 1
+    splits = np.arange(0, n_nodes - 1, 2)
+
+    children_left = np.full(n_nodes, -1, dtype=np.intp)
+    children_right = np.full(n_nodes, -1, dtype=np.intp)
+    children_left[splits] = splits + 1
+    children_right[splits] = splits + 2
+
+    feature = np.full(n_nodes, -2, dtype=np.intp)
+    feature[splits] = 0
+
+    threshold = np.full(n_nodes, -2.0)
+    threshold[splits] = np.arange(splits.shape[0], dtype=np.float64)
+
+    arrays = {
+        "children_left": children_left,
+        "children_right": children_right,
+        "feature": feature,
+        "threshold": threshold,
+        "n_node_samples": np.ones(n_nodes, dtype=np.intp),
+        "value": np.ones((n_nodes, 1, 1)),
+    }
+
+    return TreeArrays(arrays, n_features=1, n_classes=[1])
+
+
+class TestTraversal(object):
+
+    @classmethod
+    def setup_class(cls):
+        cls.models = dict((name, load_test_model(name))
+                          for name in MODEL_NAMES)
+
+    @pytest.mark.parametrize("name", MODEL_NAMES)
+    def test_apply(self, name):
+        data = get_test_data(name, n_rows=50)
+        data = utils.check_input(data, data.shape[1])
+
+        for estimator in utils.get_estimators(self.models[name]):
+            result = traversal.apply(estimator.tree_, data)
+            assert np.array_equal(result, estimator.apply(data))
+
+    @pytest.mark.parametrize("name", MODEL_NAMES)
+    def test_decision_path(self, name):
+        data = get_test_data(name, n_rows=50)
+        data = utils.check_input(data, data.shape[1])
+
+        for estimator in utils.get_estimators(self.models[name]):
+            indptr, indices = traversal.decision_path(estimator.tree_, data)
+            expected = estimator.decision_path(data)
+
+            assert np.array_equal(indptr, expected.indptr)
+            assert np.array_equal(indices, expected.indices)
+
+    def test_single_row(self):
+        tree = self.models["dtc"].tree_
+        data = get_test_data("dtc", n_rows=1)
+        data = utils.check_input(data, data.shape[1])
+
+        indptr, indices = traversal.decision_path(tree, data)
+        expected = utils.get_decision_path(tree, data[0])
+
+        assert np.array_equal(indptr, np.array([0, len(expected)]))
+        assert np.array_equal(indices, np.array(expected))
+
+    def test_empty(self):
+        tree = self.models["dtc"].tree_
+        data = np.zeros((0, 4), dtype=np.float32)
+
+        assert traversal.apply(tree, data).shape == (0,)
+
+        indptr, indices = traversal.decision_path(tree, data)
+
+        assert np.array_equal(indptr, np.array([0]))
+        assert indices.shape == (0,)
+
+    def test_deep_tree(self):
+        tree = make_deep_tree(200)
+        data = np.array([[-1.0], [0.5], [150.5], [1000.0]], dtype=np.float32)
+
+        indptr, indices = traversal.decision_path(tree, data)
+
+        for row in range(data.shape[0]):
+            expected = utils.get_decision_path(tree, data[row])
+            assert np.array_equal(indices[indptr[row]:indptr[row + 1]],
+                                  np.array(expected))
+
+        leaf_ids = traversal.apply(tree, data)
+        assert np.array_equal(leaf_ids, np.array([1, 3, 303, 398]))
+
+    def test_mapped_tree(self):
+        tree = make_deep_tree(20)
+        estimator = MappedTree(tree, classifier=False)
+
+        data = np.linspace(-1, 20, 30).reshape(-1, 1)
+        expected = traversal.decision_path(tree, data.astype(np.float32))
+
+        result = estimator.decision_path(data)
+
+        assert np.array_equal(result.indptr, expected[0])
+        assert np.array_equal(result.indices, expected[1])
+        assert np.array_equal(estimator.apply(data),
+                              expected[1][expected[0][1:] - 1])
@@ -4,6 +4,8 @@ from sklearn.exceptions import NotFittedError
 import tree_decode.utils as utils
 import numpy as np
 import pytest
+import sys
+import gc
 
 
 class TestCheckEstimatorType(object):
@@ -21,6 +23,24 @@ class TestCheckEstimatorType(object):
         with pytest.raises(NotImplementedError, match=match, message=message):
             utils.check_model_type([])
 
+    def test_alias_modules(self, model, monkeypatch):
+        # Later versions of scikit-learn define the base classes in private
+        # modules, and only provide these as aliases that are not imported.
+        for module_name in ("sklearn.tree.tree", "sklearn.ensemble.forest"):
+            monkeypatch.delitem(sys.modules, module_name, raising=False)
+
+        utils.check_model_type(model())
+
+    def test_same_name(self):
+        class BaseDecisionTree(object):
+            pass
+
+        match = "Function support is not implemented for"
+        message = "Expected NotImplementedError regarding no support"
+
+        with pytest.raises(NotImplementedError, match=match, message=message):
+            utils.check_model_type(BaseDecisionTree())
+
 
 class TestCheckIsFitted(object):
 
@@ -83,6 +103,555 @@ class TestExtractEstimators(object):
             utils.get_estimators([])
 
 
+class TestGetTopology(object):
+
+    def test_single_node(self):
+        children_left = np.array([-1])
+        children_right = np.array([-1])
+
+        node_depths, is_leaves = utils.get_topology(children_left,
+                                                    children_right)
+
+        assert np.array_equal(node_depths, np.array([0]))
+        assert np.array_equal(is_leaves, np.array([True]))
+
+    def test_depth_first(self):
+        children_left = np.array([1, 2, -1, -1, 5, -1, -1])
+        children_right = np.array([4, 3, -1, -1, 6, -1, -1])
+
+        node_depths, is_leaves = utils.get_topology(children_left,
+                                                    children_right)
+
+        expected = np.array([0, 1, 2, 2, 1, 2, 2])
+        assert np.array_equal(node_depths, expected)
+
+        expected = np.array([False, False, True, True, False, True, True])
+        assert np.array_equal(is_leaves, expected)
+
+    def test_best_first(self):
+        # Trees grown with `max_leaf_nodes` are not numbered depth-first.
+        children_left = np.array([1, 3, -1, 5, -1, -1, -1])
+        children_right = np.array([2, 4, -1, 6, -1, -1, -1])
+
+        node_depths, is_leaves = utils.get_topology(children_left,
+                                                    children_right)
+
+        expected = np.array([0, 1, 1, 2, 2, 3, 3])
+        assert np.array_equal(node_depths, expected)
+
+        expected = np.array([False, False, True, False, True, True, True])
+        assert np.array_equal(is_leaves, expected)
+
+
+class TestGetSubtree(object):
+
+    children_left = np.array([1, 3, -1, 5, -1, -1, -1])
+    children_right = np.array([2, 4, -1, 6, -1, -1, -1])
+
+    def test_whole_tree(self):
+        node_ids, node_depths, is_leaves = utils.get_subtree(
+            self.children_left, self.children_right)
+        expected = utils.get_topology(self.children_left, self.children_right)
+
+        assert np.array_equal(node_ids, np.arange(7))
+        assert np.array_equal(node_depths, expected[0])
+        assert np.array_equal(is_leaves, expected[1])
+
+    def test_max_depth(self):
+        node_ids, node_depths, is_leaves = utils.get_subtree(
+            self.children_left, self.children_right, max_depth=1)
+
+        assert np.array_equal(node_ids, np.array([0, 1, 2]))
+        assert np.array_equal(node_depths, np.array([0, 1, 1]))
+        assert np.array_equal(is_leaves, np.array([False, False, True]))
+
+    def test_root_node(self):
+        node_ids, node_depths, is_leaves = utils.get_subtree(
+            self.children_left, self.children_right, root_node=1)
+
+        assert np.array_equal(node_ids, np.array([1, 3, 4, 5, 6]))
+        assert np.array_equal(node_depths, np.array([0, 1, 1, 2, 2]))
+        assert np.array_equal(is_leaves,
+                              np.array([False, False, True, True, True]))
+
+    def test_leaf(self):
+        node_ids, node_depths, is_leaves = utils.get_subtree(
+            self.children_left, self.children_right, root_node=2,
+            max_depth=0)
+
+        assert np.array_equal(node_ids, np.array([2]))
+        assert np.array_equal(node_depths, np.array([0]))
+        assert np.array_equal(is_leaves, np.array([True]))
+
+
+class TestSumOverSubtrees(object):
+
+    children_left = np.array([1, 3, -1, 5, -1, -1, -1])
+    children_right = np.array([2, 4, -1, 6, -1, -1, -1])
+    node_depths = np.array([0, 1, 1, 2, 2, 3, 3])
+
+    def test_sums(self):
+        counts = np.array([0, 0, 4, 0, 3, 2, 1])
+        result = utils.sum_over_subtrees(self.children_left,
+                                         self.children_right,
+                                         self.node_depths, counts)
+
+        assert np.array_equal(result, np.array([10, 6, 4, 3, 3, 2, 1]))
+        assert np.array_equal(counts, np.array([0, 0, 4, 0, 3, 2, 1]))
+
+    def test_leaf(self):
+        result = utils.sum_over_subtrees(np.array([-1]), np.array([-1]),
+                                         np.array([0]), np.array([5]))
+        assert np.array_equal(result, np.array([5]))
+
+
+class TestHashSubtrees(object):
+
+    # The subtrees at nodes 1 and 4 are the same.
+    children_left = np.array([1, 2, -1, -1, 5, -1, -1])
+    children_right = np.array([4, 3, -1, -1, 6, -1, -1])
+    features = np.array([0, 1, -2, -2, 1, -2, -2])
+    thresholds = np.array([0.5, 1.5, -2.0, -2.0, 1.5, -2.0, -2.0])
+    values = np.array([[9.0], [9.0], [1.0], [2.0], [8.0], [1.0], [2.0]])
+
+    def hash_subtrees(self, **kwargs):
+        arrays = dict(children_left=self.children_left,
+                      children_right=self.children_right,
+                      features=self.features, thresholds=self.thresholds,
+                      values=self.values)
+        arrays.update(kwargs)
+
+        node_depths, _ = utils.get_topology(arrays["children_left"],
+                                            arrays["children_right"])
+        return utils.hash_subtrees(node_depths=node_depths, **arrays)
+
+    def test_hashes(self):
+        hashes = self.hash_subtrees()
+
+        assert hashes.dtype == np.uint64
+        assert hashes[1] == hashes[4]
+        assert hashes[2] == hashes[5]
+        assert len(set(hashes.tolist())) == 4
+
+    def test_leaf_values(self):
+        expected = self.hash_subtrees()
+
+        values = self.values.copy()
+        values[6] = 2.5
+        hashes = self.hash_subtrees(values=values)
+
+        changed = np.flatnonzero(hashes != expected)
+        assert np.array_equal(changed, np.array([0, 4, 6]))
+
+        # Only the values of leaves are hashed.
+        values = self.values.copy()
+        values[4] = 0.0
+
+        assert np.array_equal(self.hash_subtrees(values=values), expected)
+
+    def test_decisions(self):
+        expected = self.hash_subtrees()
+
+        thresholds = self.thresholds.copy()
+        thresholds[1] = 1.25
+        hashes = self.hash_subtrees(thresholds=thresholds)
+
+        assert np.array_equal(np.flatnonzero(hashes != expected),
+                              np.array([0, 1]))
+
+        features = self.features.copy()
+        features[4] = 0
+        hashes = self.hash_subtrees(features=features)
+
+        assert np.array_equal(np.flatnonzero(hashes != expected),
+                              np.array([0, 4]))
+
+    def test_children(self):
+        # Swapping the children of a node changes its decisions.
+        children_left = self.children_left.copy()
+        children_right = self.children_right.copy()
+        children_left[1], children_right[1] = 3, 2
+
+        hashes = self.hash_subtrees(children_left=children_left,
+                                    children_right=children_right)
+        assert hashes[1] != hashes[4]
+
+
+class TestGetValueDeltas(object):
+
+    children_left = np.array([1, 3, -1, -1, -1])
+    children_right = np.array([2, 4, -1, -1, -1])
+    features = np.array([0, 2, -2, -2, -2])
+    values = np.array([[0.5, 0.5], [0.8, 0.2], [0.2, 0.8],
+                       [1.0, 0.0], [0.6, 0.4]])
+
+    def test_deltas(self):
+        deltas, parent_features = utils.get_value_deltas(
+            self.children_left, self.children_right, self.features,
+            self.values)
+
+        expected = np.array([[0.0, 0.0], [0.3, -0.3], [-0.3, 0.3],
+                             [0.2, -0.2], [-0.2, 0.2]])
+
+        assert np.allclose(deltas, expected)
+        assert np.array_equal(parent_features, np.array([-1, 0, 0, 2, 2]))
+
+    def test_leaf(self):
+        deltas, parent_features = utils.get_value_deltas(
+            np.array([-1]), np.array([-1]), np.array([-2]),
+            np.array([[1.5]]))
+
+        assert np.array_equal(deltas, np.array([[0.0]]))
+        assert np.array_equal(parent_features, np.array([-1]))
+
+
+class TestNormalizeValues(object):
+
+    def test_normalize(self):
+        values = np.array([[[1.0, 3.0]], [[0.0, 0.0]], [[-1.0, 1.0]]])
+        expected = np.array([[[0.25, 0.75]], [[0.0, 0.0]], [[-0.5, 0.5]]])
+
+        result = utils.normalize_values(values)
+        assert np.array_equal(result, expected)
+
+    def test_matches_sklearn(self):
+        from sklearn.preprocessing import normalize
+
+        values = np.array([[2.0, 5.0, 1.0], [-3.0, 0.0, 0.5]])
+        expected = normalize(values, norm="l1")
+
+        result = utils.normalize_values(values)
+        assert np.array_equal(result, expected)
+
+
+class MockTree(object):
+    """
+    Mock of the underlying tree structure of a fitted estimator.
+    """
+
+    children_left = np.array([1, -1, 3, -1, -1])
+    children_right = np.array([2, -1, 4, -1, -1])
+
+    feature = np.array([0, -2, 1, -2, -2])
+    threshold = np.array([0.1, -2.0, 5.0, -2.0, -2.0])
+    value = np.array([[[3.0, 1.0]], [[2.0, 0.0]], [[1.0, 1.0]],
+                      [[0.0, 1.0]], [[1.0, 0.0]]])
+
+    n_features = 2
+
+
+class TestCheckInput(object):
+
+    def test_convert(self):
+        data = np.array([[0.1, 5.0]])
+        result = utils.check_input(data, n_features=2)
+
+        assert result.dtype == np.float32
+        assert np.array_equal(result, data.astype(np.float32))
+
+    def test_wrong_features(self):
+        match = "Number of features of the model must match the input"
+        message = "Expected ValueError regarding the number of features"
+
+        with pytest.raises(ValueError, match=match, message=message):
+            utils.check_input(np.array([[1.0, 2.0, 3.0]]), n_features=2)
+
+    def test_wrong_dimensions(self):
+        match = "Expected 2-D input data"
+        message = "Expected ValueError regarding the input dimensions"
+
+        with pytest.raises(ValueError, match=match, message=message):
+            utils.check_input(np.array([1.0, 2.0]), n_features=2)
+
+    def test_not_finite(self):
+        match = "Input contains NaN"
+        message = "Expected ValueError regarding missing values"
+
+        with pytest.raises(ValueError, match=match, message=message):
+            utils.check_input(np.array([[np.nan, 2.0]]), n_features=2)
+
+
+class TestSelectEstimators(object):
+
+    estimators = ["a", "b", "c", "d"]
+
+    def test_all(self):
+        expected = [(0, "a"), (1, "b"), (2, "c"), (3, "d")]
+        assert utils.select_estimators(self.estimators) == expected
+
+    @pytest.mark.parametrize("selection,expected", [
+        (2, [(2, "c")]),
+        (-1, [(3, "d")]),
+        ([3, 0], [(3, "d"), (0, "a")]),
+        (np.array([1, 2]), [(1, "b"), (2, "c")]),
+        (slice(1, None, 2), [(1, "b"), (3, "d")]),
+        ([True, False, False, True], [(0, "a"), (3, "d")]),
+    ])
+    def test_selection(self, selection, expected):
+        assert utils.select_estimators(self.estimators, selection) == expected
+
+    @pytest.mark.parametrize("selection,error,match", [
+        ([4], IndexError, "There is no tree at index 4"),
+        ([-5], IndexError, "There is no tree at index -5"),
+        ([True, False], IndexError, "does not match the 4 estimators"),
+        ([0.5], TypeError, "must be selected with indices"),
+        ([], ValueError, "No estimators were selected"),
+        (slice(4, None), ValueError, "No estimators were selected"),
+        ([False] * 4, ValueError, "No estimators were selected"),
+    ])
+    def test_invalid(self, selection, error, match):
+        with pytest.raises(error, match=match):
+            utils.select_estimators(self.estimators, selection)
+
+
+class TestGetDecisionPath(object):
+
+    @pytest.mark.parametrize("row,expected", [([0.0, 0.0], [0, 1]),
+                                              ([0.2, 5.0], [0, 2, 3]),
+                                              ([0.2, 6.0], [0, 2, 4])])
+    def test_path(self, row, expected):
+        row = np.array(row, dtype=np.float32)
+        assert utils.get_decision_path(MockTree(), row) == expected
+
+    def test_single_precision(self):
+        # 0.1 in single precision is slightly larger than the double-precision
+        # threshold, so a converted row should go right, like scikit-learn.
+        row = utils.check_input(np.array([[0.1, 0.0]]), n_features=2)[0]
+        assert utils.get_decision_path(MockTree(), row) == [0, 2, 3]
+
+
+class MockEstimator(object):
+    """
+    Mock of a fitted estimator.
+    """
+
+    def __init__(self):
+        self.tree_ = MockTree()
+
+
+class TestTreeCache(object):
+
+    def test_hits(self):
+        cache = utils.TreeCache(maxsize=2)
+        estimator = MockEstimator()
+
+        state = cache.get(estimator)
+        assert cache.get(estimator) is state
+        assert cache.info() == utils.CacheInfo(hits=1, misses=1,
+                                               maxsize=2, currsize=1)
+
+        node_depths, is_leaves = state.topology
+        assert np.array_equal(node_depths, np.array([0, 1, 1, 2, 2]))
+
+        expected = utils.normalize_values(estimator.tree_.value)
+        assert np.array_equal(state.normalized_values, expected)
+        assert state.normalized_values is state.normalized_values
+
+    def test_refit(self):
+        cache = utils.TreeCache(maxsize=2)
+        estimator = MockEstimator()
+
+        state = cache.get(estimator)
+        estimator.tree_ = MockTree()
+
+        assert cache.get(estimator) is not state
+        assert cache.info().misses == 2
+
+    def test_lru(self):
+        cache = utils.TreeCache(maxsize=2)
+        estimators = [MockEstimator() for _ in range(3)]
+
+        states = [cache.get(estimator) for estimator in estimators[:2]]
+        cache.get(estimators[0])
+        cache.get(estimators[2])
+
+        # The second estimator was the least recently used.
+        assert len(cache) == 2
+        assert cache.get(estimators[0]) is states[0]
+        assert cache.get(estimators[1]) is not states[1]
+
+    def test_garbage_collected(self):
+        cache = utils.TreeCache(maxsize=2)
+        estimator = MockEstimator()
+
+        cache.get(estimator)
+        assert len(cache) == 1
+
+        del estimator
+        gc.collect()
+
+        assert len(cache) == 0
+
+    def test_unbounded(self):
+        cache = utils.TreeCache(maxsize=None)
+        estimators = [MockEstimator() for _ in range(200)]
+
+        for estimator in estimators:
+            cache.get(estimator)
+
+        assert len(cache) == 200
+
+    def test_resize(self):
+        cache = utils.TreeCache(maxsize=3)
+        estimators = [MockEstimator() for _ in range(3)]
+
+        states = [cache.get(estimator) for estimator in estimators]
+        cache.resize(1)
+
+        assert len(cache) == 1
+        assert cache.get(estimators[2]) is states[2]
+
+        cache.resize(None)
+
+        for estimator in estimators:
+            cache.get(estimator)
+
+        assert len(cache) == 3
+
+    def test_reserve(self):
+        cache = utils.TreeCache(maxsize=2)
+        model = MockEstimator()
+        estimators = [MockEstimator() for _ in range(3)]
+
+        cache.reserve(model, len(estimators))
+        states = [cache.get(estimator) for estimator in estimators]
+
+        assert len(cache) == 3
+        assert cache.get(estimators[0]) is states[0]
+        assert cache.info().maxsize == 2
+
+        # The reservation is dropped along with the model.
+        del model
+        gc.collect()
+
+        cache.resize(2)
+        assert len(cache) == 2
+
+    def test_disabled(self):
+        cache = utils.TreeCache(maxsize=0)
+        estimator = MockEstimator()
+
+        assert cache.get(estimator) is not cache.get(estimator)
+        assert len(cache) == 0
+
+    def test_clear(self):
+        cache = utils.TreeCache()
+        estimator = MockEstimator()
+
+        cache.get(estimator)
+        cache.get(estimator)
+        cache.clear()
+
+        assert cache.info() == utils.CacheInfo(hits=0, misses=0,
+                                               maxsize=128, currsize=0)
+
+
+class TestGetTable(object):
+
+    def test_reuse(self):
+        state = utils.TreeState(MockTree())
+        calls = []
+
+        def factory():
+            calls.append(1)
+            return ["table"]
+
+        table = state.get_table("kind", 3, factory)
+        assert state.get_table("kind", 3, factory) is table
+        assert len(calls) == 1
+
+        # Only the most recent table of a kind is kept.
+        state.get_table("kind", 2, factory)
+        state.get_table("kind", 3, factory)
+        assert len(calls) == 3
+
+        state.get_table("other-kind", 3, factory)
+        assert len(calls) == 4
+
+
+class TestLazyTable(object):
+
+    def test_lazy(self):
+        calls = []
+
+        def func(key):
+            calls.append(key)
+            return key * 2
+
+        table = utils.LazyTable(func)
+
+        assert table[2] == 4
+        assert table[2] == 4
+        assert table[3] == 6
+        assert calls == [2, 3]
+
+
+class TestFormatNumbers(object):
+
+    def test_matches_str(self):
+        values = np.array([0.8, 4.95, -1.0, 0.0, -0.0, 1e-05, 1e16,
+                           123.456789, np.inf, np.nan, 1.0 / 3])
+
+        for precision in [None, 0, 2, 3]:
+            rounded = utils.maybe_round(values, precision=precision)
+            expected = [str(value) for value in rounded]
+
+            assert utils.format_numbers(rounded) == expected
+
+
+class TestFormatArrays(object):
+
+    def test_matches_str(self):
+        arrays = np.array([[[1.0, 0.0, 0.0]],
+                           [[0.0, 0.917, 0.083]],
+                           [[1.0, 0.0, 0.0]],
+                           [[-0.0, 0.5, 0.5]],
+                           [[0.0, 0.5, 0.5]]])
+        expected = [str(array) for array in arrays]
+
+        assert utils.format_arrays(arrays) == expected
+
+    def test_formatted(self):
+        arrays = np.array([[[1.0, 0.0]], [[0.25, 0.75]]])
+        formatted = {arrays[1].tobytes(): "cached"}
+
+        result = utils.format_arrays(arrays, formatted=formatted)
+
+        assert result == [str(arrays[0]), "cached"]
+        assert formatted[arrays[0].tobytes()] == str(arrays[0])
+
+
+class TestGetNJobs(object):
+
+    @pytest.mark.parametrize("n_jobs,expected", [(None, 1), (1, 1), (4, 4)])
+    def test_positive(self, n_jobs, expected):
+        assert utils.get_n_jobs(n_jobs) == expected
+
+    def test_negative(self):
+        n_cpus = utils.cpu_count()
+
+        assert utils.get_n_jobs(-1) == n_cpus
+        assert utils.get_n_jobs(-2) == max(n_cpus - 1, 1)
+        assert utils.get_n_jobs(-n_cpus - 5) == 1
+
+    def test_zero(self):
+        match = "n_jobs == 0 has no meaning"
+        message = "Expected ValueError regarding n_jobs"
+
+        with pytest.raises(ValueError, match=match, message=message):
+            utils.get_n_jobs(0)
+
+
+@pytest.mark.parametrize("n_jobs", [None, 1, 3])
+def test_map_estimators(n_jobs):
+    items = list(range(20))
+    expected = [item ** 2 for item in items]
+
+    result = list(utils.map_estimators(lambda item: item ** 2, items,
+                                       n_jobs=n_jobs))
+    assert result == expected
+
+
 @pytest.mark.parametrize("tab_size", [-5, 0, 2, 5, None])
 def test_get_tab(tab_size):
     tab_size = 5 if tab_size is None else max(0, tab_size)
@@ -171,6 +740,18 @@ class TestWriteToBuf(object):
         assert buffer.read() == self.data
         assert not buffer.closed
 
+    def test_iterable(self):
+        buffer = MockBuffer()
+        chunks = (chunk for chunk in ["example", "-", "data"])
+
+        utils.write_to_buf(chunks, filepath_or_buffer=buffer)
+        assert buffer.read() == self.data
+
+    @mock_open(data, filepath)
+    def test_cat_iterable(self):
+        chunks = ["example", "-", "data"]
+        utils.write_to_buf(chunks, filepath_or_buffer=self.filepath)
+
     @mock_open(data, filepath)
     def test_cat(self):
         utils.write_to_buf(self.data, filepath_or_buffer=self.filepath)
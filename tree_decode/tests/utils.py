@@ -2,12 +2,17 @@
 Useful utilities for our tree-decode testing.
 """
 
+import numpy as np
 import pickle
 import sys
+import os
 
 PY3 = sys.version_info >= (3, 0, 0)
 PY2 = sys.version_info >= (2, 0, 0) and not PY3
 
+# The abbreviated names of the pickled models that we test against.
+MODEL_NAMES = ["dtc", "dtr", "etc", "etr", "rfc", "rfr", "etsc", "etsr"]
+
 if PY3:
     import builtins
 else:
@@ -119,3 +124,49 @@ def load_model(filename, **kwargs):
 
     with open(filename, "rb") as f:
         return pickle.load(f, **kwargs)
+
+
+def load_test_model(name):
+    """
+    Load one of the pickled models that we test against.
+
+    Parameters
+    ----------
+    name : str
+        The abbreviated name of the model (see `MODEL_NAMES`).
+
+    Returns
+    -------
+    unpickled_model : object
+        The decision-tree model stored under that name.
+    """
+
+    directory = os.path.dirname(__file__)
+    filename = os.path.join(directory, "models", name + "-model.pickle")
+
+    return load_model(filename)
+
+
+def get_test_data(name, n_rows=20):
+    """
+    Generate random input data for one of the models that we test against.
+
+    Parameters
+    ----------
+    name : str
+        The abbreviated name of the model (see `MODEL_NAMES`).
+    n_rows : int, default 20
+        The number of rows of data to generate.
+
+    Returns
+    -------
+    data : numpy.ndarray
+        A 2-D array of shape (n_rows, n_features) of input data.
+    """
+
+    n_features = 1 if name == "dtr" else 4
+    data = np.random.RandomState(0).uniform(0, 7, size=(n_rows, n_features))
+
+    # Values that float32 represents exactly are decided on identically
+    # by the trees and by the rendering of `get_decision_info`.
+    return data.astype(np.float32).astype(np.float64)
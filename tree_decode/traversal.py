@@ -0,0 +1,117 @@
+"""
+Batch traversal of trees using only their node arrays.
+
+All rows of a batch are advanced down a tree together, one level at a
+time, by indexing into the `children_left`, `children_right`, `feature`
+and `threshold` arrays of the tree. Only these arrays are used, so the
+same code follows rows down the trees of fitted scikit-learn estimators
+and the memory-mapped trees of `export.import_model` alike, without going
+through the input validation of scikit-learn for every tree.
+"""
+
+import numpy as np
+
+__all__ = ["apply", "decision_path"]
+
+
+def _iter_levels(tree, data):
+    """
+    Advance all rows of input data down a tree, one level at a time.
+
+    Yields
+    ------
+    rows : numpy.ndarray
+        The rows that reached a node at the level.
+    node_ids : numpy.ndarray
+        The IDs of the nodes that those rows reached. The first level is
+        the root, which all of the rows reach.
+    """
+
+    children_left = tree.children_left
+    children_right = tree.children_right
+
+    features = tree.feature
+    thresholds = tree.threshold
+
+    rows = np.arange(data.shape[0])
+    node_ids = np.zeros(data.shape[0], dtype=np.intp)
+
+    while rows.shape[0] > 0:
+        yield rows, node_ids
+
+        # Rows stop advancing once they reach a leaf.
+        left = children_left[node_ids]
+        is_splits = left != children_right[node_ids]
+
+        rows = rows[is_splits]
+        node_ids = node_ids[is_splits]
+        left = left[is_splits]
+
+        go_left = data[rows, features[node_ids]] <= thresholds[node_ids]
+
+        node_ids = np.where(go_left, left, children_right[node_ids])
+
+
+def apply(tree, data):
+    """
+    Get the leaf of a tree that each row of input data ends up in.
+
+    Parameters
+    ----------
+    tree : sklearn.tree._tree.Tree or export.TreeArrays
+        The underlying tree structure of a fitted estimator.
+    data : numpy.ndarray
+        A 2-D array of input data, as converted by `utils.check_input`.
+
+    Returns
+    -------
+    leaf_ids : numpy.ndarray
+        The ID of the leaf of each row.
+    """
+
+    leaf_ids = np.zeros(data.shape[0], dtype=np.intp)
+
+    for rows, node_ids in _iter_levels(tree, data):
+        leaf_ids[rows] = node_ids
+
+    return leaf_ids
+
+
+def decision_path(tree, data):
+    """
+    Get the nodes of a tree that each row of input data goes through.
+
+    Parameters
+    ----------
+    tree : sklearn.tree._tree.Tree or export.TreeArrays
+        The underlying tree structure of a fitted estimator.
+    data : numpy.ndarray
+        A 2-D array of input data, as converted by `utils.check_input`.
+
+    Returns
+    -------
+    indptr : numpy.ndarray
+        The offsets into `indices` at which the path of each row starts,
+        with a final entry for where the last path ends.
+    indices : numpy.ndarray
+        The concatenated node IDs of the decision paths, from the root
+        to the leaf of each row, as in the CSR matrix returned by the
+        `decision_path` method of scikit-learn estimators.
+    """
+
+    levels = list(_iter_levels(tree, data))
+    lengths = np.zeros(data.shape[0], dtype=np.intp)
+
+    for rows, _ in levels:
+        lengths[rows] += 1
+
+    indptr = np.zeros(data.shape[0] + 1, dtype=np.intp)
+    np.cumsum(lengths, out=indptr[1:])
+
+    # The node of a row at the k-th level is the k-th node of its path.
+    indices = np.empty(indptr[-1], dtype=np.intp)
+
+    for depth, (rows, node_ids) in enumerate(levels):
+        indices[indptr[rows] + depth] = node_ids
+
+    return indptr, indices
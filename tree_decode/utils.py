@@ -2,10 +2,101 @@
 Useful utilities for our tree-decoding API.
 """
 
-from sklearn.utils.validation import check_is_fitted as _check_is_fitted
-from sklearn.tree.tree import BaseDecisionTree
-from sklearn.ensemble.forest import BaseForest
-from sklearn.exceptions import NotFittedError
+from multiprocessing import cpu_count
+from collections import namedtuple, OrderedDict
+from functools import partial
+
+import numpy as np
+import threading
+import weakref
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+def _is_sklearn_instance(model, class_name):
+    """
+    Check whether a model is an instance of a base class of scikit-learn.
+
+    Importing scikit-learn is slow, so rather than importing the class to
+    check against, we look for it by name among the classes from which the
+    model inherits. This also does not depend on the (private) module that
+    defines the class, which differs between versions of scikit-learn.
+
+    Parameters
+    ----------
+    model : object
+        The model to check.
+    class_name : str
+        The name of the base class, e.g. "BaseForest".
+
+    Returns
+    -------
+    is_instance : bool
+        Whether the model inherits from a class of that name
+        that is defined by scikit-learn.
+    """
+
+    for klass in type(model).__mro__:
+        if (klass.__name__ == class_name and
+                klass.__module__.startswith("sklearn.")):
+            return True
+
+    return False
+
+
+def _is_sklearn_tree(model):
+    return _is_sklearn_instance(model, "BaseDecisionTree")
+
+
+def _is_sklearn_forest(model):
+    return _is_sklearn_instance(model, "BaseForest")
+
+
+def _get_not_fitted_error():
+    # Only import scikit-learn when an error is actually raised.
+    from sklearn.exceptions import NotFittedError
+    return NotFittedError
+
+
+def is_tree(model):
+    """
+    Check whether a model is a single decision tree that we support.
+
+    Parameters
+    ----------
+    model : object
+        The model to check.
+
+    Returns
+    -------
+    is_tree : bool
+        Whether the model is a single decision tree, either from
+        scikit-learn or loaded with `export.import_model`.
+    """
+
+    # Imported here, as the export module depends on this one.
+    from .export import MappedTree
+    return isinstance(model, MappedTree) or _is_sklearn_tree(model)
+
+
+def is_forest(model):
+    """
+    Check whether a model is an ensemble of decision trees that we support.
+
+    Parameters
+    ----------
+    model : object
+        The model to check.
+
+    Returns
+    -------
+    is_forest : bool
+        Whether the model is an ensemble of decision trees, either from
+        scikit-learn or loaded with `export.import_model`.
+    """
+
+    from .export import MappedForest
+    return isinstance(model, MappedForest) or _is_sklearn_forest(model)
 
 
 def check_model_type(model):
@@ -24,6 +115,9 @@ def check_model_type(model):
     * ExtraTreesClassifier
     * ExtraTreesRegressor
 
+    as well as any of them exported and loaded back with the
+    `export` module (i.e. `MappedTree` and `MappedForest`).
+
     Parameters
     ----------
     model : object
@@ -35,7 +129,7 @@ def check_model_type(model):
                           we do not support at the moment.
     """
 
-    if not isinstance(model, (BaseDecisionTree, BaseForest)):
+    if not (is_tree(model) or is_forest(model)):
         klass = type(model).__name__
         raise NotImplementedError("Function support is not implemented for "
                                   "{klass}.".format(klass=klass))
@@ -63,10 +157,14 @@ def check_is_fitted(model):
     NotImplementedError : the data type of the model is not supported.
     """
 
-    if isinstance(model, BaseDecisionTree):
-        _check_is_fitted(model, "tree_")
-    elif isinstance(model, BaseForest):
-        _check_is_fitted(model, "estimators_")
+    if _is_sklearn_tree(model):
+        from sklearn.utils.validation import check_is_fitted
+        check_is_fitted(model, "tree_")
+    elif _is_sklearn_forest(model):
+        from sklearn.utils.validation import check_is_fitted
+        check_is_fitted(model, "estimators_")
+    elif is_tree(model) or is_forest(model):
+        return  # Exported models can only be loaded fitted.
     else:
         klass = type(model).__name__
         raise NotImplementedError("Function support is not implemented for "
@@ -94,21 +192,950 @@ def get_estimators(model):
         an estimator(s) from the model.
     """
 
-    if isinstance(model, BaseDecisionTree):
+    if is_tree(model):
         return [model]
-    elif isinstance(model, BaseForest):
+    elif is_forest(model):
         try:
-            return model.estimators_
+            estimators = model.estimators_
         except AttributeError:
             msg = ("The ensemble model needs to be fitted first "
                    "before estimators can be extracted")
-            raise NotFittedError(msg)
+            raise _get_not_fitted_error()(msg)
+
+        # Make sure that the state of every tree in the forest can
+        # be cached, however large the forest is.
+        tree_cache.reserve(model, len(estimators))
+        return estimators
     else:
         klass = type(model).__name__
         raise NotImplementedError("Cannot extract estimators for "
                                   "{klass}.".format(klass=klass))
 
 
+def select_estimators(estimators, selection=None):
+    """
+    Select some of the estimators of a model, along with their indices.
+
+    Parameters
+    ----------
+    estimators : list
+        The estimators of the model, as returned by `get_estimators`.
+    selection : int, slice, array-like of int or bool, default None
+        The indices of the estimators to select, a slice of them, or a
+        boolean mask over them. If None is provided, all are selected.
+
+    Returns
+    -------
+    selected : list
+        A list of (index, estimator) tuples of the selected estimators,
+        where the index is the position of the estimator in the model.
+
+    Raises
+    ------
+    IndexError : an index was out of bounds, or the mask provided did not
+                 match the number of estimators.
+    TypeError : the selection was not indices, a slice or a boolean mask.
+    ValueError : no estimators were selected.
+    """
+
+    n_estimators = len(estimators)
+
+    if selection is None:
+        return list(enumerate(estimators))
+
+    if isinstance(selection, slice):
+        indices = list(range(n_estimators)[selection])
+    else:
+        selection = np.atleast_1d(selection)
+
+        if selection.size == 0:
+            indices = []
+        elif selection.dtype == bool:
+            if selection.shape != (n_estimators,):
+                msg = ("Boolean mask of shape {shape} does not "
+                       "match the {n} estimators of the model")
+                raise IndexError(msg.format(shape=selection.shape,
+                                            n=n_estimators))
+
+            indices = np.flatnonzero(selection).tolist()
+        elif selection.dtype.kind in "iu" and selection.ndim == 1:
+            indices = []
+
+            for index in selection.tolist():
+                if not -n_estimators <= index < n_estimators:
+                    msg = "There is no tree at index {i}"
+                    raise IndexError(msg.format(i=index))
+
+                indices.append(index % n_estimators)
+        else:
+            raise TypeError("Estimators must be selected with indices, "
+                            "a slice or a boolean mask")
+
+    if not indices:
+        raise ValueError("No estimators were selected")
+
+    return [(index, estimators[index]) for index in indices]
+
+
+def get_topology(children_left, children_right):
+    """
+    Compute the depth of every node in a tree and whether it is a leaf.
+
+    The tree is traversed level by level, starting from the root (node 0),
+    so that all nodes at a given depth are processed with a single set of
+    array operations instead of one at a time.
+
+    Parameters
+    ----------
+    children_left : numpy.ndarray
+        The array mapping each node to its left child. Leaves map to
+        the same value in both `children_left` and `children_right`.
+    children_right : numpy.ndarray
+        The array mapping each node to its right child.
+
+    Returns
+    -------
+    node_depths : numpy.ndarray
+        An integer array containing the depth of each node, with the
+        root at depth zero.
+    is_leaves : numpy.ndarray
+        A boolean array indicating whether each node is a leaf.
+    """
+
+    children_left = np.asarray(children_left)
+    children_right = np.asarray(children_right)
+
+    n_nodes = children_left.shape[0]
+    node_depths = np.zeros(shape=n_nodes, dtype=np.int64)
+    is_leaves = children_left == children_right
+
+    depth = 0
+    frontier = np.zeros(shape=min(n_nodes, 1), dtype=np.int64)
+
+    while frontier.size > 0:
+        node_depths[frontier] = depth
+        frontier = frontier[~is_leaves[frontier]]
+        frontier = np.concatenate((children_left[frontier],
+                                   children_right[frontier]))
+        depth += 1
+
+    return node_depths, is_leaves
+
+
+def get_subtree(children_left, children_right, root_node=0, max_depth=None):
+    """
+    Get the nodes of a region of a tree, along with their depths.
+
+    Like `get_topology`, the region is traversed level by level, but only
+    the nodes within it are visited, so that the cost does not depend on
+    the size of the rest of the tree.
+
+    Parameters
+    ----------
+    children_left : numpy.ndarray
+        The array mapping each node to its left child.
+    children_right : numpy.ndarray
+        The array mapping each node to its right child.
+    root_node : int, default 0
+        The ID of the node at the root of the region.
+    max_depth : int, default None
+        The maximum depth of the nodes in the region, relative to its
+        root. If None is provided, the region extends to the leaves.
+
+    Returns
+    -------
+    node_ids : numpy.ndarray
+        The IDs of the nodes in the region, in ascending order.
+    node_depths : numpy.ndarray
+        The depth of each node relative to the root of the region.
+    is_leaves : numpy.ndarray
+        A boolean array indicating whether each node is a leaf of the tree.
+    """
+
+    levels = []
+    depth = 0
+    frontier = np.array([root_node], dtype=np.int64)
+
+    while frontier.size > 0:
+        levels.append(frontier)
+
+        if max_depth is not None and depth >= max_depth:
+            break
+
+        frontier = frontier[children_left[frontier] !=
+                            children_right[frontier]]
+        frontier = np.concatenate((children_left[frontier],
+                                   children_right[frontier]))
+        depth += 1
+
+    node_ids = np.concatenate(levels)
+    node_depths = np.repeat(np.arange(len(levels), dtype=np.int64),
+                            [level.shape[0] for level in levels])
+
+    order = np.argsort(node_ids, kind="mergesort")
+    node_ids = node_ids[order]
+
+    is_leaves = children_left[node_ids] == children_right[node_ids]
+    return node_ids, node_depths[order], is_leaves
+
+
+def sum_over_subtrees(children_left, children_right, node_depths, counts):
+    """
+    Sum counts at the leaves of a tree over the subtree of every node.
+
+    The sums are computed level by level, from the deepest splits up to
+    the root, so that all splits at a given depth are summed at once.
+
+    Parameters
+    ----------
+    children_left : numpy.ndarray
+        The array mapping each node to its left child.
+    children_right : numpy.ndarray
+        The array mapping each node to its right child.
+    node_depths : numpy.ndarray
+        The depth of each node, as computed by `get_topology`.
+    counts : numpy.ndarray
+        The counts at each node, of which only those at leaves are used.
+
+    Returns
+    -------
+    sums : numpy.ndarray
+        The sum of the counts at the leaves below each node. For leaves,
+        this is the count at the leaf itself.
+    """
+
+    sums = np.array(counts, copy=True)
+
+    splits = np.flatnonzero(children_left != children_right)
+    split_depths = node_depths[splits]
+
+    # Group the splits by depth, with the deepest splits first.
+    order = np.argsort(-split_depths, kind="mergesort")
+    splits = splits[order]
+    starts = np.flatnonzero(np.diff(split_depths[order])) + 1
+
+    for level in np.split(splits, starts):
+        sums[level] = sums[children_left[level]] + sums[children_right[level]]
+
+    return sums
+
+
+# The constants of the 64-bit hashes of `hash_subtrees`, from SplitMix64.
+_HASH_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_HASH_MULTIPLIERS = (np.uint64(0xBF58476D1CE4E5B9),
+                     np.uint64(0x94D049BB133111EB))
+_HASH_SHIFTS = (np.uint64(30), np.uint64(27), np.uint64(31))
+
+
+def _mix_hashes(hashes, values):
+    """
+    Mix 64-bit values into arrays of 64-bit hashes, with wrap-around.
+    """
+
+    hashes = hashes * _HASH_GAMMA + values
+
+    hashes ^= hashes >> _HASH_SHIFTS[0]
+    hashes *= _HASH_MULTIPLIERS[0]
+    hashes ^= hashes >> _HASH_SHIFTS[1]
+    hashes *= _HASH_MULTIPLIERS[1]
+    hashes ^= hashes >> _HASH_SHIFTS[2]
+
+    return hashes
+
+
+def hash_subtrees(children_left, children_right, node_depths, features,
+                  thresholds, values):
+    """
+    Hash the subtree below every node of a tree into 64 bits.
+
+    The hash of a leaf covers its values, and the hash of a split covers
+    its feature, its threshold and the hashes of its children. Subtrees
+    with the same decisions and leaf values thus have the same hash,
+    regardless of the IDs of their nodes. The hashes are computed level
+    by level, from the deepest splits up to the root.
+
+    Parameters
+    ----------
+    children_left : numpy.ndarray
+        The array mapping each node to its left child.
+    children_right : numpy.ndarray
+        The array mapping each node to its right child.
+    node_depths : numpy.ndarray
+        The depth of each node, as computed by `get_topology`.
+    features : numpy.ndarray
+        The array mapping each node to the feature of its decision.
+    thresholds : numpy.ndarray
+        The array mapping each node to the threshold of its decision.
+    values : numpy.ndarray
+        The values (e.g. scores) of each node, as an array whose first
+        dimension is the nodes.
+
+    Returns
+    -------
+    hashes : numpy.ndarray
+        The hash of the subtree below each node, as unsigned 64-bit ints.
+    """
+
+    n_nodes = children_left.shape[0]
+    is_leaves = children_left == children_right
+
+    hashes = np.zeros(n_nodes, dtype=np.uint64)
+    hashes = _mix_hashes(hashes, is_leaves.astype(np.uint64))
+
+    # Hash the bits of the numbers, so that no two of them collide.
+    leaf_values = np.ascontiguousarray(values[is_leaves], dtype=np.float64)
+    leaf_values = leaf_values.reshape(leaf_values.shape[0], -1)
+    leaf_hashes = hashes[is_leaves]
+
+    for column in leaf_values.view(np.uint64).T:
+        leaf_hashes = _mix_hashes(leaf_hashes, column)
+
+    hashes[is_leaves] = leaf_hashes
+
+    splits = np.flatnonzero(~is_leaves)
+    split_hashes = _mix_hashes(hashes[splits], np.asarray(
+        features[splits], dtype=np.int64).view(np.uint64))
+    hashes[splits] = _mix_hashes(split_hashes, np.ascontiguousarray(
+        thresholds[splits], dtype=np.float64).view(np.uint64))
+
+    split_depths = node_depths[splits]
+
+    # Group the splits by depth, with the deepest splits first.
+    order = np.argsort(-split_depths, kind="mergesort")
+    splits = splits[order]
+    starts = np.flatnonzero(np.diff(split_depths[order])) + 1
+
+    for level in np.split(splits, starts):
+        level_hashes = _mix_hashes(hashes[level],
+                                   hashes[children_left[level]])
+        hashes[level] = _mix_hashes(level_hashes,
+                                    hashes[children_right[level]])
+
+    return hashes
+
+
+def get_value_deltas(children_left, children_right, features, values):
+    """
+    Get how much the decision above each node of a tree changes its values.
+
+    Parameters
+    ----------
+    children_left : numpy.ndarray
+        The array mapping each node to its left child.
+    children_right : numpy.ndarray
+        The array mapping each node to its right child.
+    features : numpy.ndarray
+        The array mapping each node to the feature of its decision.
+    values : numpy.ndarray
+        The values (e.g. scores) of each node, as a 2-D array of shape
+        (n_nodes, n_values).
+
+    Returns
+    -------
+    deltas : numpy.ndarray
+        The values of each node minus those of its parent. The root has
+        no parent, so its deltas are zero.
+    parent_features : numpy.ndarray
+        The feature of the decision that leads to each node, i.e. that of
+        its parent, to which the deltas are attributed. The root has -1.
+    """
+
+    n_nodes = values.shape[0]
+    splits = np.flatnonzero(children_left != children_right)
+
+    parents = np.full(n_nodes, -1, dtype=np.intp)
+    parents[children_left[splits]] = splits
+    parents[children_right[splits]] = splits
+
+    has_parents = parents >= 0
+    deltas = np.zeros_like(values)
+    deltas[has_parents] = values[has_parents] - values[parents[has_parents]]
+
+    parent_features = np.full(n_nodes, -1, dtype=np.intp)
+    parent_features[has_parents] = features[parents[has_parents]]
+
+    return deltas, parent_features
+
+
+def normalize_values(values):
+    """
+    Normalize arrays of scores so that their absolute values sum to one.
+
+    This is the same L1-normalization as scikit-learn's `normalize`, but it
+    is applied along the last axis of an array of any dimension, so that
+    the scores of all nodes of a tree can be normalized at once.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        The array of scores to normalize (e.g. the `value` array of a tree).
+
+    Returns
+    -------
+    normalized_values : numpy.ndarray
+        The normalized scores. Arrays of scores that are all zero are
+        left as they are.
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+
+    norms = np.abs(values).sum(axis=-1, keepdims=True)
+    norms[norms == 0.0] = 1.0
+
+    return values / norms
+
+
+def check_input(data, n_features):
+    """
+    Check and convert input data before following it down a tree.
+
+    Scikit-learn compares input data to the decision thresholds of its
+    trees in single precision, so we convert to that precision as well.
+    Otherwise, we could take a different path when a value lies between
+    the single and double-precision versions of a threshold.
+
+    Parameters
+    ----------
+    data : numpy.ndarray or scipy.sparse matrix
+        A 2-D array of input data.
+    n_features : int
+        The number of features that the tree was fitted on.
+
+    Returns
+    -------
+    checked_data : numpy.ndarray
+        A dense 2-D array of the input data in single precision.
+
+    Raises
+    ------
+    ValueError : the input data has the wrong number of features or
+                 contains missing or infinite values.
+    """
+
+    if hasattr(data, "toarray"):
+        data = data.toarray()
+
+    data = np.asarray(data, dtype=np.float32)
+
+    if data.ndim != 2:
+        msg = "Expected 2-D input data, got {ndim}-D input data instead"
+        raise ValueError(msg.format(ndim=data.ndim))
+
+    if data.shape[1] != n_features:
+        msg = ("Number of features of the model must match the input. "
+               "Model n_features is {expected} and input n_features "
+               "is {actual}")
+        raise ValueError(msg.format(expected=n_features,
+                                    actual=data.shape[1]))
+
+    if not np.isfinite(data).all():
+        raise ValueError("Input contains NaN, infinity or a value "
+                         "too large for dtype('float32').")
+
+    return data
+
+
+def get_decision_path(tree, row):
+    """
+    Follow a single row of input data from the root of a tree to a leaf.
+
+    Parameters
+    ----------
+    tree : sklearn.tree._tree.Tree
+        The underlying tree structure of a fitted estimator.
+    row : numpy.ndarray
+        A 1-D array of input data, as converted by `check_input`.
+
+    Returns
+    -------
+    node_path : list
+        The IDs of the nodes on the path, from the root to the leaf (which
+        is the last node of the path).
+    """
+
+    children_left = tree.children_left
+    children_right = tree.children_right
+
+    features = tree.feature
+    thresholds = tree.threshold
+
+    node_id = 0
+    node_path = [node_id]
+
+    while children_left[node_id] != children_right[node_id]:
+        if row[features[node_id]] <= thresholds[node_id]:
+            node_id = children_left[node_id]
+        else:
+            node_id = children_right[node_id]
+
+        node_path.append(node_id)
+
+    return node_path
+
+
+def predict_from_leaves(estimator, leaf_ids, predict_method):
+    """
+    Compute the output of an estimator's prediction method from its leaves.
+
+    Parameters
+    ----------
+    estimator : sklearn.tree.tree.BaseDecisionTree
+        The fitted estimator whose prediction we are to compute.
+    leaf_ids : numpy.ndarray
+        The IDs of the leaves that were reached, one per row of input data.
+    predict_method : str
+        Either "predict_proba" or "predict".
+
+    Returns
+    -------
+    predictions : numpy.ndarray or list
+        The output that the prediction method of the estimator would have
+        returned for the rows of input data that reached these leaves.
+    """
+
+    values = estimator.tree_.value[leaf_ids]
+
+    if predict_method == "predict_proba":
+        n_classes = np.atleast_1d(estimator.n_classes_)
+        probas = []
+
+        for k, n in enumerate(n_classes):
+            proba = values[:, k, :n]
+
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            probas.append(proba / normalizer)
+
+        return probas[0] if len(probas) == 1 else probas
+
+    if values.shape[1] == 1:
+        return values[:, 0, 0]
+
+    return values[:, :, 0]
+
+
+def get_n_jobs(n_jobs=None):
+    """
+    Get the actual number of jobs to run in parallel.
+
+    The semantics are the same as for scikit-learn's `n_jobs` parameters.
+
+    Parameters
+    ----------
+    n_jobs : int, default None
+        The requested number of jobs. None means 1, and negative values
+        count backwards from the number of processors (e.g. -1 means using
+        all processors, -2 means all but one of them, etc.)
+
+    Returns
+    -------
+    n_jobs : int
+        The number of jobs to run in parallel, which is at least 1.
+
+    Raises
+    ------
+    ValueError : zero jobs were requested.
+    """
+
+    if n_jobs is None:
+        return 1
+
+    if n_jobs == 0:
+        raise ValueError("n_jobs == 0 has no meaning")
+
+    if n_jobs < 0:
+        return max(cpu_count() + 1 + n_jobs, 1)
+
+    return n_jobs
+
+
+def map_estimators(func, items, n_jobs=None):
+    """
+    Apply a function to each estimator of a model, possibly in parallel.
+
+    Parameters
+    ----------
+    func : callable
+        The function to apply to each item.
+    items : iterable
+        The items (e.g. estimators) to which to apply the function.
+    n_jobs : int, default None
+        The number of threads over which to spread the items. See
+        `get_n_jobs` for the meaning of this parameter.
+
+    Returns
+    -------
+    results : generator
+        A generator of the results of the function, in the same order as
+        the items, regardless of the order in which they were computed.
+    """
+
+    n_jobs = get_n_jobs(n_jobs)
+
+    if n_jobs == 1:
+        for item in items:
+            yield func(item)
+    else:
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(n_jobs)
+
+        try:
+            for result in pool.imap(func, items):
+                yield result
+        finally:
+            pool.terminate()
+
+
+class TreeState(object):
+    """
+    State derived from the underlying tree of an estimator.
+
+    Each piece of state is computed the first time that it is accessed.
+    Instances are shared between calls through a `TreeCache`.
+
+    Parameters
+    ----------
+    tree : sklearn.tree._tree.Tree
+        The underlying tree structure of a fitted estimator.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self._topology = None
+        self._normalized_values = None
+        self._tables = {}
+
+    @property
+    def topology(self):
+        """
+        The depth of every node and whether it is a leaf.
+
+        See `get_topology` for more information.
+        """
+
+        if self._topology is None:
+            self._topology = get_topology(self.tree.children_left,
+                                          self.tree.children_right)
+
+        return self._topology
+
+    @property
+    def normalized_values(self):
+        """
+        The scores of every node, normalized with `normalize_values`.
+        """
+
+        if self._normalized_values is None:
+            self._normalized_values = normalize_values(self.tree.value)
+
+        return self._normalized_values
+
+    def get_table(self, kind, key, factory):
+        """
+        Get a table (e.g. of formatted strings) derived from the tree.
+
+        Only the most recently used table of each kind is kept, so that
+        the memory used by the state of a tree stays bounded.
+
+        Parameters
+        ----------
+        kind : str
+            The kind of table, e.g. "thresholds".
+        key : hashable
+            The options with which the table is built, e.g. the precision.
+            If they differ from those of the table that is kept for this
+            kind, a new table is built.
+        factory : callable
+            The function, called without arguments, that builds the table.
+
+        Returns
+        -------
+        table : object
+            The table built by the factory for the given options.
+        """
+
+        cached = self._tables.get(kind)
+
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        table = factory()
+        self._tables[kind] = (key, table)
+
+        return table
+
+
+class TreeCache(object):
+    """
+    Least-recently-used cache of `TreeState`, keyed by estimator identity.
+
+    Entries are evicted as soon as their estimator is garbage-collected,
+    and when their estimator is refitted, its state is recomputed.
+
+    Parameters
+    ----------
+    maxsize : int or None, default 128
+        The maximum number of estimators whose state is cached. If None is
+        provided, the cache can grow without bound. The cache holds more
+        than this if the models reserved with `reserve` need more room.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._reserved = weakref.WeakKeyDictionary()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, estimator):
+        """
+        Get the state of an estimator, computing it if it is not cached.
+
+        Parameters
+        ----------
+        estimator : sklearn.tree.tree.BaseDecisionTree
+            The fitted estimator whose state we want.
+
+        Returns
+        -------
+        state : TreeState
+            The state derived from the estimator's tree.
+        """
+
+        key = id(estimator)
+        tree = estimator.tree_
+
+        with self._lock:
+            entry = self._entries.pop(key, None)
+
+            # The identity of an estimator can be reused once it has been
+            # garbage-collected, and its tree is replaced when it is refitted.
+            if (entry is not None and entry[0]() is estimator and
+                    entry[1].tree is tree):
+                self.hits += 1
+            else:
+                self.misses += 1
+
+                try:
+                    ref = weakref.ref(estimator, partial(self._evict, key))
+                except TypeError:
+                    # Without a weak reference, we would not know when to
+                    # evict, so don't cache estimators that don't allow one.
+                    return TreeState(tree)
+
+                entry = (ref, TreeState(tree))
+
+            if self.maxsize is None or self.maxsize > 0:
+                self._entries[key] = entry
+                self._trim()
+
+            return entry[1]
+
+    def reserve(self, model, size):
+        """
+        Make room in the cache for the estimators of a model.
+
+        As long as the model is alive, the cache holds at least as many
+        entries as are reserved by all live models together, so that one
+        pass over a large forest does not evict its own estimators before
+        the next pass can reuse them. This has no effect on a cache that
+        is disabled (i.e. a maximum size of 0).
+
+        Parameters
+        ----------
+        model : object
+            The model whose estimators are decoded. Its reservation is
+            dropped once it is garbage-collected.
+        size : int
+            The number of estimators of the model.
+        """
+
+        with self._lock:
+            try:
+                self._reserved[model] = size
+            except TypeError:
+                # Models that don't allow a weak reference get the
+                # default size, as we would not know when to drop them.
+                pass
+
+    def _get_bound(self):
+        if self.maxsize is None or self.maxsize == 0:
+            return self.maxsize
+
+        return max(self.maxsize, sum(self._reserved.values()))
+
+    def _trim(self):
+        # Only sum the reservations once the entries outgrow the maximum.
+        if self.maxsize is None or len(self._entries) <= self.maxsize:
+            return
+
+        bound = self._get_bound()
+
+        while len(self._entries) > bound:
+            self._entries.popitem(last=False)
+
+    def resize(self, maxsize):
+        """
+        Change the maximum number of estimators whose state is cached.
+
+        The least recently used entries are evicted if there are more
+        than the new maximum, or than is reserved for live models.
+
+        Parameters
+        ----------
+        maxsize : int or None
+            The new maximum size. If None is provided, the cache can grow
+            without bound.
+        """
+
+        with self._lock:
+            self.maxsize = maxsize
+            self._trim()
+
+    def _evict(self, key, ref):
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] is ref:
+                del self._entries[key]
+
+    def info(self):
+        """
+        Get the statistics of the cache.
+
+        Returns
+        -------
+        cache_info : CacheInfo
+            The number of hits and misses, the maximum size, and the current
+            size of the cache, as with `functools.lru_cache`.
+        """
+
+        return CacheInfo(hits=self.hits, misses=self.misses,
+                         maxsize=self.maxsize, currsize=len(self))
+
+    def clear(self):
+        """
+        Remove all entries from the cache and reset its statistics.
+        """
+
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# The cache shared by all calls to our API.
+tree_cache = TreeCache()
+
+
+def get_tree_state(estimator):
+    """
+    Get the state derived from an estimator's tree from the shared cache.
+
+    Parameters
+    ----------
+    estimator : sklearn.tree.tree.BaseDecisionTree
+        The fitted estimator whose state we want.
+
+    Returns
+    -------
+    state : TreeState
+        The state derived from the estimator's tree.
+    """
+
+    return tree_cache.get(estimator)
+
+
+class LazyTable(dict):
+    """
+    A mapping whose values are computed from their keys on first access.
+
+    Parameters
+    ----------
+    func : callable
+        The function, called with a missing key, that computes its value.
+    """
+
+    def __init__(self, func):
+        super(LazyTable, self).__init__()
+        self.func = func
+
+    def __missing__(self, key):
+        value = self[key] = self.func(key)
+        return value
+
+
+def format_numbers(values):
+    """
+    Format an array of numbers as strings in bulk.
+
+    Each string is the same as that of the corresponding element of the
+    array on its own, i.e. the shortest string that identifies the number.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        The array of numbers to format. It should already be rounded, if
+        rounding is desired (see `maybe_round`).
+
+    Returns
+    -------
+    strings : list
+        The formatted numbers, in the same order as the array.
+    """
+
+    # The `repr` of a float is its shortest round-tripping form, which
+    # is what NumPy uses when printing double-precision scalars.
+    return [repr(value) for value in np.asarray(values,
+                                                dtype=np.float64).tolist()]
+
+
+def format_arrays(arrays, formatted=None):
+    """
+    Format each of the sub-arrays of an array as strings.
+
+    Sub-arrays that are identical (e.g. the scores of pure leaves) are
+    only formatted once.
+
+    Parameters
+    ----------
+    arrays : numpy.ndarray
+        The array whose sub-arrays along the first axis we are to format.
+    formatted : dict, default None
+        A mapping from the bytes of sub-arrays to their formatted strings,
+        which is used and updated in place. Passing the same mapping to
+        several calls formats identical sub-arrays only once across all
+        of them, as long as all of the arrays have the same shape.
+
+    Returns
+    -------
+    strings : list
+        The formatted sub-arrays, in the same order as the array.
+    """
+
+    if formatted is None:
+        formatted = {}
+
+    strings = []
+
+    for array in arrays:
+        # Compare bytes, so that e.g. 0.0 and -0.0 are told apart.
+        key = array.tobytes()
+        string = formatted.get(key)
+
+        if string is None:
+            string = formatted[key] = str(array)
+
+        strings.append(string)
+
+    return strings
+
+
 def get_tab(size=5):
     """
     Get a tab composed of a given number of spaces.
@@ -158,14 +1185,14 @@ def get_tree_at(ensemble, index):
     TypeError : The object passed in was not a valid ensemble model.
     """
 
-    if not isinstance(ensemble, BaseForest):
+    if not is_forest(ensemble):
         raise TypeError("This is not a valid tree ensemble model")
 
     try:
         return ensemble.estimators_[index]
     except AttributeError:
         msg = "This model has not been fitted yet"
-        raise NotFittedError(msg)
+        raise _get_not_fitted_error()(msg)
     except IndexError:
         msg = "There is no tree at index {i}"
         raise IndexError(msg.format(i=index))
@@ -198,21 +1225,28 @@ def maybe_round(val, precision=None):
         return round(val, precision)
 
 
-def write_to_buf(output, filepath_or_buffer=None):
+def write_to_buf(output, filepath_or_buffer=None, profiler=None):
     """
     Write output to a file or buffer. If none is provided, nothing happens.
 
     Parameters
     ----------
-    output : str
-        The output to write.
+    output : str or iterable of str
+        The output to write. If an iterable (e.g. a generator) of strings is
+        provided, each string is written as soon as it is produced, so that
+        the full output never has to be held in memory.
     filepath_or_buffer : str or file handle, default None
         The file or buffer to which to write the output.
+    profiler : profiling.Profiler, default None
+        The profiler with which to record the time spent writing.
     """
 
     if filepath_or_buffer is None:
         return
 
+    if isinstance(output, str):
+        output = [output]
+
     # We want to preserve state when writing to a buffer.
     # If a buffer was provided, we don't close it. If a
     # path is provided, we close the file buffer once we
@@ -225,7 +1259,30 @@ def write_to_buf(output, filepath_or_buffer=None):
         close_file = False
 
     try:
-        f.write(output)
+        if profiler is None:
+            for chunk in output:
+                f.write(chunk)
+        else:
+            _profile_writes(output, f, profiler)
     finally:
         if close_file:
             f.close()
+
+
+def _profile_writes(output, f, profiler):
+    """
+    Write output to a file, recording the time spent in the "write" stage.
+    """
+
+    timer = profiler.timer
+    elapsed = 0.0
+    chars = 0
+
+    for chunk in output:
+        start = timer()
+        f.write(chunk)
+
+        elapsed += timer() - start
+        chars += len(chunk)
+
+    profiler.add("write", elapsed, chars=chars)